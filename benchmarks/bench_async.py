@@ -0,0 +1,73 @@
+"""Tail latency of concurrent requests sharing one event loop.
+
+All requests arrive together; each parses and reduces a scaled fizzbuzz on its
+own Host, and its latency runs from the common arrival time to its end. A
+heartbeat task wakes every millisecond and records how late it was, which is
+how long the loop was blocked. The blocking variant calls Host.execute.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from ivm.extrinsics import ExtVal
+from benchmarks.common import quiet_host, scaled_fizzbuzz
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def serve(path: str, requests: int, mode: str) -> tuple[list[float], list[float]]:
+    lateness: list[float] = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lateness.append(time.perf_counter() - before - 0.001)
+
+    async def request(arrival: float) -> float:
+        host = quiet_host(program_cache=False)
+        host.parse_file(path)
+        host.boot("::main", ExtVal(0))
+        if mode == "execute":
+            host.execute()
+        elif mode == "interactions":
+            await host.run_async(slice_interactions=200)
+        else:
+            await host.run_async(slice_interactions=100, slice_seconds=0.001)
+        return time.perf_counter() - arrival
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    arrival = time.perf_counter()
+    latencies = await asyncio.gather(*(request(arrival) for _ in range(requests)))
+    done.set()
+    await beat
+    return list(latencies), lateness
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    path = scaled_fizzbuzz(n)
+    print(f"{requests} concurrent fizzbuzz-to-{n} requests on one loop (ms):")
+    print(f"  {'mode':<14}{'req p50':>9}{'req p99':>9}{'beat p50':>10}{'beat p99':>10}{'beat max':>10}")
+    for mode in ("execute", "interactions", "seconds"):
+        latencies, lateness = asyncio.run(serve(path, requests, mode))
+        print(
+            f"  {mode:<14}"
+            f"{statistics.median(latencies) * 1000:>9.1f}"
+            f"{percentile(latencies, 99) * 1000:>9.1f}"
+            f"{statistics.median(lateness) * 1000:>10.2f}"
+            f"{percentile(lateness, 99) * 1000:>10.2f}"
+            f"{max(lateness) * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Throughput of Host.map over many inputs as the worker count grows."""
+
+import os
+import sys
+import time
+
+from benchmarks.common import quiet_host, run_file, scaled_fizzbuzz
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    path = scaled_fizzbuzz(n)
+    cpus = len(os.sched_getaffinity(0))
+    print(f"{count} runs of fizzbuzz to {n}, {cpus} CPU(s) available:")
+
+    start = time.perf_counter()
+    for _ in range(count):
+        run_file(path, program_cache=True)  # as py-ivm would
+    print(f"  run_file per input  {count / (time.perf_counter() - start):>8.1f} runs/s")
+
+    host = quiet_host(program_cache=False)
+    host.parse_file(path)
+    baseline = None
+    processes = 1
+    while processes <= max(2, cpus):
+        start = time.perf_counter()
+        for _ in host.map(range(count), processes=processes):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"  {f'map processes={processes}':<19} {count / elapsed:>8.1f} runs/s"
+            f"  ({baseline / elapsed:.2f}x)"
+        )
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Batched extrinsic calls: one call into the compat numeric set per label and batch.
+
+::sum builds a full binary tree of the given depth and folds it back up with
+n32_add, n32_mul and n32_rem at every node, so each level's calls become
+ready together and batch_calls can hand a whole level to one batched call.
+"""
+
+import sys
+from collections import Counter
+
+from ivm.compat import BATCHED_NUMERIC
+from ivm.extrinsics import ExtVal
+from ivm.globals import GlobalPort
+from ivm.heap import CombPort, WirePort, make_wire_pair
+from ivm.labels import intern
+from ivm.vm import IVM
+from benchmarks.common import best_of, quiet_host, write_temp
+
+SUM_SOURCE = """
+::sum {
+  fn(dup(d0 d1) r)
+  d0 = ?(::one ::node fn(d1 r))
+}
+
+::one { fn(_ 1) }
+
+::node {
+  fn(d r)
+  d = @n32_sub(1 dup(a b))
+  ::sum = fn(a x)
+  ::sum = fn(b y)
+  x = @n32_mul(3 x3)
+  x3 = @n32_add(y s)
+  s = @n32_rem(65521 r)
+}
+"""
+
+
+def expected(depth: int) -> int:
+    r = 1
+    for _ in range(depth):
+        r = (r * 3 + r) % 65521
+    return r
+
+
+def fold(depth: int, batch_calls: int, batches: Counter | None = None) -> int:
+    host = quiet_host(program_cache=False, ivm=IVM(batch_calls=batch_calls))
+    if batches is not None:
+        for name, fn in BATCHED_NUMERIC.items():
+            host.ivm.extrinsics.batched_ext_fns[name] = counted(batches, name, fn)
+    host.parse_file(write_temp(SUM_SOURCE))
+    wire = make_wire_pair()[0]
+    wire.target = ExtVal(depth)
+    host.ivm.link(
+        GlobalPort(global_ref=host.gs["::sum"]), CombPort(target=wire, label=intern("fn"))
+    )
+    host.execute()
+    return host.ivm.follow(WirePort(wire=wire.other_half), False).value
+
+
+def counted(batches: Counter, name: str, fn):
+    def batched(lhs, rhs):
+        batches[name] += 1
+        return fn(lhs, rhs)
+
+    return batched
+
+
+def functions_only(count: int) -> tuple[float, float]:
+    """n32_add over count pairs, one scalar call each versus one batched call."""
+    host = quiet_host()
+    scalar = host.ivm.extrinsics.ext_fns["n32_add"]
+    batched = BATCHED_NUMERIC["n32_add"]
+    lhs, rhs = list(range(count)), list(range(count, 0, -1))
+    per_call, _ = best_of(5, lambda: [scalar(a, b) for a, b in zip(lhs, rhs)])
+    at_once, _ = best_of(5, lambda: list(batched(lhs, rhs)))
+    return per_call, at_once
+
+
+def main() -> None:
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+    calls = 4 * (2**depth - 1)
+    per_call, at_once = functions_only(calls)
+    print(f"n32_add alone over {calls:_} pairs: {per_call * 1000:.1f}ms per call, "
+          f"{at_once * 1000:.1f}ms batched")
+    print(f"folding a depth-{depth} tree: {calls:_} numeric calls")
+    print(f"  {'batch_calls':>11}{'best of 3':>12}{'batches':>10}{'mean size':>11}")
+    for batch_calls in (0, 64, 4096):
+        batches: Counter = Counter()
+        assert fold(depth, batch_calls, batches) == expected(depth)
+        best, _ = best_of(3, lambda: fold(depth, batch_calls))
+        n = sum(batches.values())
+        size = f"{calls / n:.1f}" if n else "-"
+        print(f"  {batch_calls:>11}{best * 1000:>10.1f}ms{n:>10_}{size:>11}")
+
+
+if __name__ == "__main__":
+    main()
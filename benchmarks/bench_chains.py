@@ -0,0 +1,88 @@
+"""Wire chains: how long follow's walks are, and what finishing wires saves.
+
+::pipe is an identity function whose argument passes through ``width``
+annihilating pairs, each of which joins two wires; ::loop threads a value
+through ::pipe ``n`` times. Joined wires form chains that the next link
+through them walks.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from ivm.extrinsics import ExtVal
+from ivm.globals import GlobalPort
+from ivm.heap import CombPort, make_wire_pair
+from ivm.labels import intern
+from ivm.stats import Stats
+from ivm.vm import IVM
+from benchmarks.common import quiet_host, write_temp
+
+LOOP_SOURCE = """
+::loop {
+  fn(dup(n0 n1) fn(v r))
+  n0 = ?(::done ::step fn(n1 fn(v r)))
+}
+
+::done { fn(_ fn(v v)) }
+
+::step {
+  fn(n fn(v r))
+  n = @n32_sub(1 m)
+  ::pipe = fn(v w)
+  ::loop = fn(m fn(w r))
+}
+"""
+
+
+def pipe_source(width: int) -> str:
+    pairs = "".join(f"  x(a{i} _) = x(a{i + 1} _)\n" for i in range(width))
+    # With the root as a pair listed last, its annihilation is queued first
+    # and so reduced last: the argument arrives once the chain is built.
+    return f"::pipe {{\n  f\n{pairs}  f = fn(a0 a{width})\n}}\n"
+
+
+def measure(
+    n: int, width: int, stats: Stats | None = None, trace: bool = False
+) -> tuple[float, int, object]:
+    """Runs the loop; returns the time, the traced peak (if trace) and the result."""
+    host = quiet_host(program_cache=False, ivm=IVM(stats=stats))
+    host.parse_file(write_temp(LOOP_SOURCE + pipe_source(width)))
+    outer, inner = make_wire_pair()[0], make_wire_pair()[0]
+    outer.target = ExtVal(n)
+    inner.target = ExtVal(42)
+    outer.other_half.target = CombPort(target=inner, label=intern("fn"))
+    host.ivm.link(
+        GlobalPort(global_ref=host.gs["::loop"]), CombPort(target=outer, label=intern("fn"))
+    )
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    host.ivm.run()
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak, host.ivm.follow(inner.other_half.target, False)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"  {'width':<8}{'follows':>10}{'mean chain':>12}{'time':>10}{'peak':>12}")
+    for width in (8, 64, 512):
+        stats = Stats()
+        _, _, result = measure(n, width, stats)
+        assert isinstance(result, ExtVal) and result.value == 42, result
+        elapsed = min(measure(n, width)[0] for _ in range(5))
+        peak = measure(n, width, trace=True)[1]
+        print(
+            f"  {width:<8}{stats.follows:>10_}{stats.mean_chain:>12.2f}"
+            f"{elapsed * 1000:>8.0f}ms{peak / 1024:>10.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Expansion throughput of compiled globals versus the instruction interpreter."""
+
+import sys
+
+from ivm.codegen import compile_global
+from ivm.globals import GlobalPort
+from ivm.heap import Port
+from ivm.vm import IVM
+from benchmarks.common import best_of, quiet_host, run_file, scaled_fizzbuzz
+
+
+class CountingIVM(IVM):
+    expansions = 0
+
+    def expand(self, a, b):
+        self.expansions += 1
+        super().expand(a, b)
+
+
+def expansions_per_second(g, iterations: int) -> float:
+    ivm = IVM()
+    port = GlobalPort(global_ref=g)
+
+    def run():
+        for _ in range(iterations):
+            ivm.expand(port, Port.ERASE)
+            ivm.active_fast.clear()
+            ivm.active_slow.clear()
+
+    elapsed, _ = best_of(3, run)
+    return iterations / elapsed
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    path = scaled_fizzbuzz(n)
+
+    host = quiet_host(program_cache=False)
+    host.parse_file(path)
+    print("per-global expansions/s (interpreted -> compiled):")
+    for name, g in host.gs.items():
+        interpreted = expansions_per_second(g, 20000)
+        g.compiled = compile_global(g)
+        compiled = expansions_per_second(g, 20000)
+        print(
+            f"  {name:<14} {len(g.instructions.instructions):>3} instrs  "
+            f"{interpreted:>10,.0f} -> {compiled:>10,.0f}  ({compiled / interpreted:.2f}x)"
+        )
+
+    counted = run_file(path, program_cache=False, ivm=CountingIVM())
+    expansions = counted.ivm.expansions
+    t_interp, _ = best_of(3, lambda: run_file(path, program_cache=False))
+    t_comp, _ = best_of(
+        3, lambda: run_file(path, program_cache=False, compile_globals=True)
+    )
+    print(f"fizzbuzz to {n}: {expansions} expansions")
+    print(f"  interpreted: {t_interp:.3f}s")
+    print(f"  compiled:    {t_comp:.3f}s  ({t_interp / t_comp:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
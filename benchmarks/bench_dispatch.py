@@ -0,0 +1,73 @@
+"""Interactions per second through IVM.link/IVM.interact."""
+
+import sys
+import time
+
+from ivm.extrinsics import ExtVal, ExtFnPort
+from ivm.heap import CombPort, Port, make_wire_pair
+from ivm.labels import intern
+from ivm.vm import IVM
+from benchmarks.common import best_of, quiet_host, scaled_fizzbuzz
+
+
+def pairs_per_second(make_pair, iterations: int = 100_000) -> float:
+    ivm = IVM()
+    ivm.extrinsics.ext_fns["n32_add"] = lambda a, b: a + b
+    pairs = [make_pair() for _ in range(iterations)]
+
+    start = time.perf_counter()
+    for a, b in pairs:
+        ivm.link(a, b)
+        for _ in ivm.normalize():
+            pass
+    return iterations / (time.perf_counter() - start)
+
+
+def annihilate():
+    return CombPort(label=intern("x"), target=make_wire_pair()[0]), CombPort(
+        label=intern("x"), target=make_wire_pair()[0]
+    )
+
+
+def commute():
+    return CombPort(label=intern("x"), target=make_wire_pair()[0]), CombPort(
+        label=intern("y"), target=make_wire_pair()[0]
+    )
+
+
+def erase():
+    return Port.ERASE, CombPort(label=intern("x"), target=make_wire_pair()[0])
+
+
+def call():
+    w = make_wire_pair()[0]
+    w.target = ExtVal(1)
+    return ExtFnPort(label=intern("n32_add"), target=w), ExtVal(2)
+
+
+def fizzbuzz(path: str) -> tuple[int, float]:
+    host = quiet_host(program_cache=False)
+    host.parse_file(path)
+    host.boot("::main", ExtVal(0))
+    count = 0
+    start = time.perf_counter()
+    for _ in host.ivm.normalize():
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name, make_pair in [
+        ("annihilate", annihilate),
+        ("commute", commute),
+        ("erase", erase),
+        ("call", call),
+    ]:
+        print(f"{name:<11} {pairs_per_second(make_pair):>12,.0f} pairs/s")
+    _, (count, elapsed) = best_of(3, lambda: fizzbuzz(scaled_fizzbuzz(n)))
+    print(f"fizzbuzz to {n}: {count} interactions, {count / elapsed:,.0f} interactions/s")
+
+
+if __name__ == "__main__":
+    main()
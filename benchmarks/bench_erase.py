@@ -0,0 +1,75 @@
+"""Erasing a built tree: one queued interaction per node, or one eager sweep.
+
+Builds the tree of bench_memory.TREE_SOURCE to the given depth, then links an
+erase to its root and times reducing that alone.
+"""
+
+import sys
+import time
+import tracemalloc
+
+from ivm.array_vm import ArrayIVM, COMB, ERASE, LABEL_BITS, TAG_BITS
+from ivm.extrinsics import ExtVal
+from ivm.globals import GlobalPort
+from ivm.heap import CombPort, ErasePort, WirePort, make_wire_pair
+from ivm.labels import intern
+from ivm.stats import Stats
+from ivm.vm import IVM
+from benchmarks.bench_memory import TREE_SOURCE
+from benchmarks.common import quiet_host, write_temp
+
+
+def erase_tree(engine: str, depth: int, eager: bool) -> tuple[float, int, int, int]:
+    """Returns the erase's time, its erase interactions, the peak fast queue and
+    the traced peak while erasing."""
+    stats = Stats()
+    make = ArrayIVM if engine == "array" else IVM
+    host = quiet_host(program_cache=False, ivm=make(stats=stats, eager_erase=eager))
+    host.parse_file(write_temp(TREE_SOURCE))
+    ivm = host.ivm
+    if isinstance(ivm, ArrayIVM):
+        node = ivm.alloc_node()
+        ivm.heap[node] = ivm.new_value(depth)
+        fn = (node << LABEL_BITS | intern("fn")) << TAG_BITS | COMB
+        ivm.link(ivm.global_word(host.gs["::tree"]), fn)
+        ivm.run()
+        stats.interactions.clear()
+        stats.peak_fast = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        ivm.link_wire(node ^ 1, ERASE)
+        ivm.run()
+    else:
+        wire = make_wire_pair()[0]
+        wire.target = ExtVal(depth)
+        ivm.link(GlobalPort(global_ref=host.gs["::tree"]), CombPort(target=wire, label=intern("fn")))
+        ivm.run()
+        stats.interactions.clear()
+        stats.peak_fast = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        ivm.link(WirePort(wire=wire.other_half), ErasePort())
+        ivm.run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, stats.interactions["erase"], stats.peak_fast, peak
+
+
+def main() -> None:
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+    print(f"erasing a depth-{depth} tree")
+    print(f"  {'engine':<8}{'mode':<8}{'erases':>10}{'peak fast':>11}{'best of 5':>12}{'traced peak':>13}")
+    for engine in ("object", "array"):
+        for eager in (False, True):
+            runs = [erase_tree(engine, depth, eager) for _ in range(5)]
+            _, erases, peak, traced = runs[-1]
+            best = min(run[0] for run in runs)
+            print(
+                f"  {engine:<8}{'eager' if eager else 'queued':<8}{erases:>10_}{peak:>11_}"
+                f"{best * 1000:>10.1f}ms{traced / 1024:>11.0f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
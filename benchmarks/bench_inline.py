@@ -0,0 +1,54 @@
+"""Expansions and time saved by inlining small globals at load time."""
+
+import sys
+import time
+from io import BytesIO, TextIOWrapper
+
+from ivm.extrinsics import ExtVal
+from ivm.stats import Stats
+from ivm.vm import IVM
+from benchmarks.common import quiet_host, scaled_fizzbuzz
+
+THRESHOLDS = (0, 4, 16, 64)
+
+
+def measure(path: str, threshold: int) -> tuple[int, Stats, float, bytes]:
+    host = quiet_host(program_cache=False, ivm=IVM(stats=Stats()))
+    host.stdin = TextIOWrapper(BytesIO())
+    host.inline_threshold = threshold
+    host.parse_file(path)
+    size = sum(len(g.instructions.instructions) for g in host.gs.values())
+    host.boot("::main", ExtVal(0))
+    start = time.perf_counter()
+    host.execute()
+    elapsed = time.perf_counter() - start
+    host.stdout.flush()
+    return size, host.ivm.stats, elapsed, host.stdout.buffer.getvalue()
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    path = scaled_fizzbuzz(n)
+    print(f"fizzbuzz to {n}")
+    print(f"  {'threshold':<10}{'instrs':>8}{'expand':>10}{'total':>10}{'best of 5':>12}")
+    expected = None
+    # Interleave the thresholds so drift affects them all alike.
+    best = {threshold: float("inf") for threshold in THRESHOLDS}
+    results = {}
+    for _ in range(5):
+        for threshold in THRESHOLDS:
+            size, stats, elapsed, out = measure(path, threshold)
+            expected = expected or out
+            assert out == expected, threshold
+            best[threshold] = min(best[threshold], elapsed)
+            results[threshold] = size, stats
+    for threshold in THRESHOLDS:
+        size, stats = results[threshold]
+        print(
+            f"  {threshold:<10}{size:>8}{stats.interactions['expand']:>10}"
+            f"{stats.total:>10}{best[threshold] * 1000:>10.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
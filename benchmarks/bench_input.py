@@ -0,0 +1,101 @@
+"""Input throughput: io_read_byte through InputChannel versus one read per byte.
+
+The "unbuffered" baseline is the io_read_byte this replaced, which called
+``stdin.buffer.read(1)`` for every byte. The input is piped in from a child
+process writing a file, first to io_read_byte called directly, then through
+cat.iv, whose output goes to /dev/null.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from io import TextIOWrapper
+
+from ivm.extrinsics import ExtVal
+from benchmarks.common import PROGRAMS_DIR, quiet_host
+
+EOF = 0xFFFFFFFF
+
+
+def unbuffered(host) -> None:
+    def io_read_byte(io):
+        result = host.stdin.buffer.read(1)[:1]
+        if not result:
+            return EOF, 0
+        return int.from_bytes(result), 0
+
+    host.ivm.extrinsics.split_ext_fns["io_read_byte"] = io_read_byte
+
+
+def piped(path: str) -> tuple[subprocess.Popen, TextIOWrapper]:
+    writer = subprocess.Popen(["cat", path], stdout=subprocess.PIPE)
+    assert writer.stdout is not None
+    return writer, TextIOWrapper(writer.stdout)
+
+
+def read_alone(path: str, mode: str) -> float:
+    """Calls io_read_byte until EOF; returns the time taken."""
+    writer, stdin = piped(path)
+    host = quiet_host(stdin=stdin, prefetch_stdin=mode == "prefetch")
+    if mode == "unbuffered":
+        unbuffered(host)
+    read_byte = host.ivm.extrinsics.split_ext_fns["io_read_byte"]
+    start = time.perf_counter()
+    while read_byte(0)[0] != EOF:
+        pass
+    elapsed = time.perf_counter() - start
+    writer.wait()
+    return elapsed
+
+
+def cat(path: str, mode: str) -> float:
+    """Reduces cat.iv over the file; returns the time taken."""
+    writer, stdin = piped(path)
+    with open(os.devnull, "w") as devnull:
+        host = quiet_host(
+            program_cache=False, stdin=stdin, stdout=devnull,
+            prefetch_stdin=mode == "prefetch",
+        )
+        if mode == "unbuffered":
+            unbuffered(host)
+        host.parse_file(os.path.join(PROGRAMS_DIR, "cat.iv"))
+        host.boot("::main", ExtVal(0))
+        start = time.perf_counter()
+        host.execute()
+        elapsed = time.perf_counter() - start
+    writer.wait()
+    return elapsed
+
+
+def temp_file(size: int) -> str:
+    fd, path = tempfile.mkstemp()
+    block = bytes(range(256)) * 4096
+    with os.fdopen(fd, "wb") as f:
+        for offset in range(0, size, len(block)):
+            f.write(block[: size - offset])
+    return path
+
+
+def main() -> None:
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    kilobytes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    modes = ("unbuffered", "chunked", "prefetch")
+    big, small = temp_file(megabytes << 20), temp_file(kilobytes << 10)
+    try:
+        print(f"io_read_byte alone, {megabytes} MB piped in:")
+        for mode in modes:
+            elapsed = read_alone(big, mode)
+            print(f"  {mode:<11}{elapsed:>8.2f}s{megabytes / elapsed:>8.1f} MB/s")
+        print(f"cat.iv, {kilobytes} KB piped in:")
+        for mode in modes:
+            best = min(cat(small, mode) for _ in range(3))
+            print(f"  {mode:<11}{best * 1000:>7.0f}ms{kilobytes / best:>8.1f} KB/s")
+    finally:
+        os.remove(big)
+        os.remove(small)
+
+
+if __name__ == "__main__":
+    main()
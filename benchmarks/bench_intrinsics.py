@@ -0,0 +1,50 @@
+"""Intrinsic numeric calls versus the generic extrinsic path, on arithmetic-heavy programs.
+
+Both runs use the same operations from ivm.intrinsics; the generic run only
+empties Extrinsics.intrinsics, so each call goes through the name lookup,
+the split check and _wrap_result as any other extrinsic does.
+"""
+
+import sys
+import time
+
+from ivm.array_vm import ArrayIVM
+from ivm.extrinsics import ExtVal
+from ivm.vm import IVM
+from benchmarks.bench_batch_calls import SUM_SOURCE
+from benchmarks.common import quiet_host, scaled_fizzbuzz, write_temp
+
+FOLD_MAIN = """
+::main { fn(_ r) ::sum = fn(12 r) }
+"""
+
+
+def run(path: str, engine: str, intrinsics: bool) -> float:
+    """Loads path and returns how long reducing it took."""
+    host = quiet_host(program_cache=False, ivm=ArrayIVM() if engine == "array" else IVM())
+    if not intrinsics:
+        host.ivm.extrinsics.intrinsics.clear()
+    host.parse_file(path)
+    host.boot("::main", ExtVal(0))
+    start = time.perf_counter()
+    host.execute()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    programs = {
+        f"fizzbuzz to {n}": scaled_fizzbuzz(n),
+        "fold depth 12": write_temp(SUM_SOURCE + FOLD_MAIN),
+    }
+    print(f"{'program':<18}{'engine':<8}{'generic':>10}{'intrinsic':>11}{'speedup':>9}")
+    for name, path in programs.items():
+        for engine in ("object", "array"):
+            generic = min(run(path, engine, False) for _ in range(5))
+            native = min(run(path, engine, True) for _ in range(5))
+            print(f"{name:<18}{engine:<8}{generic * 1000:>8.1f}ms{native * 1000:>9.1f}ms"
+                  f"{generic / native:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compares the streaming Lexer against the original restart-per-token lexer."""
+
+import sys
+
+from ivm import lexer
+from ivm.lexer import Lexer, p, p_in_comment, open_comment, in_open_comment, other
+from ivm.lexer import skips
+from benchmarks.common import best_of, generated_source
+
+
+def legacy_tokens(lines: list[str]) -> int:
+    """The original algorithm: a fresh generator and finditer per token, groups scanned."""
+    position = (0, (0, 0))
+
+    def tokenize():
+        nonlocal position
+        ln = position[0]
+        while ln < len(lines):
+            line = lines[ln]
+            for match in p.finditer(line, pos=position[1][1]):
+                group_match, token = next(
+                    (i, a) for i, a in enumerate(match.groups()) if a is not None
+                )
+                if group_match == open_comment:
+                    depth = 1
+                    for match in p_in_comment.finditer(line, match.end()):
+                        group_match, token = next(
+                            (i, a)
+                            for i, a in enumerate(match.groups())
+                            if a is not None
+                        )
+                        position = (ln, match.span())
+                        depth += 1 if group_match == in_open_comment else -1
+                        if depth == 0:
+                            break
+                    break
+                elif group_match in skips:
+                    continue
+                elif group_match == other:
+                    raise lexer.SyntaxError(token)
+                else:
+                    position = (ln, match.span())
+                    yield group_match, token
+            else:
+                position = ((ln := ln + 1), (0, 0))
+
+    count = 0
+    while True:
+        try:
+            next(tokenize())
+        except StopIteration:
+            return count
+        count += 1
+
+
+def streaming_tokens(source: str) -> int:
+    count = 0
+    for _ in Lexer.from_source(source).tokenize():
+        count += 1
+    return count
+
+
+def main() -> None:
+    globals_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    source = generated_source(globals_count)
+    lines = source.splitlines(keepends=True)
+    print(f"source: {len(source) / 1e6:.2f} MB, {len(lines)} lines")
+
+    t_new, n_new = best_of(3, lambda: streaming_tokens(source))
+    t_old, n_old = best_of(3, lambda: legacy_tokens(lines))
+    assert n_new == n_old, (n_new, n_old)
+    print(f"tokens: {n_new}")
+    print(f"legacy:    {t_old:.3f}s  {n_old / t_old / 1e6:.2f} Mtok/s")
+    print(f"streaming: {t_new:.3f}s  {n_new / t_new / 1e6:.2f} Mtok/s")
+    print(f"speedup:   {t_old / t_new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Bytes per live node, and peak RSS while duplicating a tree (commute-heavy).
+
+Each measurement runs in a fresh interpreter so that ru_maxrss is meaningful.
+"""
+
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+from ivm.array_vm import ArrayIVM, COMB, LABEL_BITS, TAG_BITS
+from ivm.extrinsics import ExtVal
+from ivm.globals import Binary, GlobalPort
+from ivm.heap import CombPort, make_wire_pair
+from ivm.labels import intern
+from ivm.vm import IVM
+from benchmarks.common import quiet_host, write_temp
+
+
+def bytes_per_node(count: int = 100_000) -> float:
+    """Allocation cost of Binary.execute: the port, its wire pair and two WirePorts."""
+    ivm = IVM()
+    ivm.registers = [None] * 3
+    instruction = Binary("Comb", intern("x"), 0, 1, 2)
+    live = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        instruction.execute(ivm)
+        live.append(ivm.registers[:])
+        ivm.registers[:] = [None] * 3
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Subtract the bookkeeping lists holding on to the nodes.
+    overhead = sys.getsizeof(live[0]) + 8
+    return (after - before) / count - overhead
+
+
+def bytes_per_node_array(count: int = 100_000) -> float:
+    """The same for ArrayIVM, where a node is two heap slots and nothing else."""
+    ivm = ArrayIVM()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        ivm.alloc_node()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+
+TREE_SOURCE = """
+::tree {
+  fn(dup(n0 n1) t)
+  n0 = ?(::leaf ::node fn(n1 t))
+}
+
+::leaf { fn(_ 1) }
+
+::node {
+  fn(n x(l r))
+  n = @n32_sub(1 dup(a b))
+  ::tree = fn(a l)
+  ::tree = fn(b r)
+}
+
+::dup_tree {
+  fn(n x(a b))
+  ::tree = fn(n t)
+  dup(a b) = t
+}
+"""
+
+
+def child(depth: int, engine: str) -> None:
+    """Applies ::dup_tree to depth and keeps the result alive until measuring."""
+    host = quiet_host(program_cache=False, ivm=ArrayIVM() if engine == "array" else IVM())
+    host.parse_file(write_temp(TREE_SOURCE))
+    g = host.gs["::dup_tree"]
+    ivm = host.ivm
+    if isinstance(ivm, ArrayIVM):
+        node = ivm.alloc_node()
+        ivm.heap[node] = ivm.new_value(depth)
+        fn = (node << LABEL_BITS | intern("fn")) << TAG_BITS | COMB
+        ivm.link(ivm.global_word(g), fn)
+        result: object = node ^ 1  # the slot holding the duplicated tree
+    else:
+        wire = make_wire_pair()[0]
+        wire.target = ExtVal(depth)
+        ivm.link(GlobalPort(global_ref=g), CombPort(target=wire, label=intern("fn")))
+        result = wire.other_half
+    host.execute()
+    assert result is not None
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["--child"]:
+        child(int(sys.argv[2]), sys.argv[3])
+        return
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+    def peak_kb(depth: int, engine: str) -> int:
+        result = subprocess.run(
+            [sys.executable, "-m", __spec__.name, "--child", str(depth), engine],
+            capture_output=True, text=True, check=True,
+        )
+        return int(result.stdout)
+
+    # Linux carries ru_maxrss across exec, so spawn children before growing this process.
+    peaks = {
+        engine: (peak_kb(0, engine), peak_kb(depth, engine))
+        for engine in ("object", "array")
+    }
+    print(f"bytes per live binary node: object {bytes_per_node():.0f}, "
+          f"array {bytes_per_node_array():.0f}")
+    for engine, (base_kb, heavy_kb) in peaks.items():
+        print(f"{engine}: peak RSS building and duplicating a depth-{depth} tree: {heavy_kb / 1024:.1f} MB "
+              f"({(heavy_kb - base_kb) / 1024:.1f} MB above an empty run)")
+
+
+if __name__ == "__main__":
+    main()
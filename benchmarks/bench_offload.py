@@ -0,0 +1,63 @@
+"""Overlapping GIL-releasing extrinsics with reduction on a thread pool.
+
+A scaled fizzbuzz runs alongside a number of digest calls, each hashing a
+block of data with hashlib.sha256, which releases the GIL while it works.
+Inline, every call holds up reduction for as long as it hashes; with
+blocking=True the calls go to the host's ThreadPoolExecutor, and the program
+goes on reducing while they run. Both programs are the "independent" ones of
+bench_parked, with digest in place of fetch.
+"""
+
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ivm.extrinsics import ExtVal
+from benchmarks.bench_parked import program
+from benchmarks.common import quiet_host
+
+
+def run(path: str, data: bytes, blocking: bool, workers: int) -> float:
+    host = quiet_host(program_cache=False)
+    if blocking:
+        host.executor = ThreadPoolExecutor(workers)
+
+    def fetch(a, b):
+        return hashlib.sha256(data).digest()[0] + a + b
+
+    host.add_ext_fun(fetch, blocking=blocking)
+    host.parse_file(path)
+    host.boot("::main", ExtVal(0))
+    start = time.perf_counter()
+    host.execute()
+    elapsed = time.perf_counter() - start
+    if host.executor is not None:
+        host.executor.shutdown()
+    return elapsed
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    megabytes = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    workers = os.cpu_count() or 1
+    data = os.urandom(megabytes << 20)
+    path = program(n, calls, False)
+    compute = min(run(program(n, 0, False), data, False, workers) for _ in range(3))
+    start = time.perf_counter()
+    hashlib.sha256(data).digest()
+    digest = time.perf_counter() - start
+    print(f"fizzbuzz to {n} alone: {compute * 1000:.0f}ms; one {megabytes} MB digest: "
+          f"{digest * 1000:.0f}ms; {calls} digests alongside, {workers} CPU{'s' if workers > 1 else ''}:")
+    inline = min(run(path, data, False, workers) for _ in range(3))
+    print(f"  inline     {inline * 1000:>7.0f}ms")
+    for threads in sorted({1, workers, 4}):
+        offloaded = min(run(path, data, True, threads) for _ in range(3))
+        print(f"  offloaded to {threads} thread{'s' if threads > 1 else ' '}"
+              f"{offloaded * 1000:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
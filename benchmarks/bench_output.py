@@ -0,0 +1,101 @@
+"""Output throughput: io_print_byte through OutputChannel versus one write per byte.
+
+The "unbuffered" baseline is the io_print_byte this replaced, which wrote
+``(b & 0xFF).to_bytes(1)`` to stdout's binary buffer on every call. Output
+goes to /dev/null, so the channel writes its blocks to a real fd.
+"""
+
+import os
+import sys
+import time
+
+from ivm.channels import FLUSH_POLICIES
+from ivm.extrinsics import ExtVal
+from benchmarks.common import quiet_host, write_temp
+
+PRINT_SOURCE = """
+::main {
+  x(io0 io1)
+  ::print = x(x(io0 io1) ::count)
+}
+
+::print {
+  x(x(io0 io2) dup(n0 n1))
+  n0 = ?(::done ::more x(x(io0 io2) n1))
+}
+
+::done { x(x(io io) _) }
+
+::more {
+  x(x(io0 io2) dup(n0 n1))
+  n0 = @n32_rem(64 dup(c0 c1))
+  c0 = ?(::newline ::letter x(c1 b))
+  io0 = @io_print_byte(b io1)
+  n1 = @n32_sub(1 m)
+  ::print = x(x(io1 io2) m)
+}
+
+::newline { x(_ 10) }
+::letter { x(_ 120) }
+"""
+
+
+def unbuffered(host) -> None:
+    def io_print_byte(io, b):
+        host.stdout.buffer.write((b & 0xFF).to_bytes(1))
+        return 0
+
+    host.add_ext_fun(io_print_byte)
+
+
+def print_alone(megabytes: int, policy: str | None) -> float:
+    """Calls io_print_byte directly for every byte; returns the time taken."""
+    with open(os.devnull, "w") as devnull:
+        host = quiet_host(stdout=devnull, flush_policy=policy or "explicit")
+        if policy is None:
+            unbuffered(host)
+        print_byte = host.ivm.extrinsics.ext_fns["io_print_byte"]
+        line = bytes(range(97, 97 + 63)) + b"\n"
+        start = time.perf_counter()
+        for _ in range(megabytes << 14):
+            for b in line:
+                print_byte(0, b)
+        host.flush_output()
+        devnull.flush()
+        return time.perf_counter() - start
+
+
+def print_program(count: int, policy: str | None) -> float:
+    """Reduces PRINT_SOURCE printing count bytes; returns the time taken."""
+    with open(os.devnull, "w") as devnull:
+        host = quiet_host(
+            program_cache=False, stdout=devnull, flush_policy=policy or "explicit"
+        )
+        if policy is None:
+            unbuffered(host)
+        host.parse_file(write_temp(PRINT_SOURCE + f"::count {{ {count} }}\n"))
+        host.boot("::main", ExtVal(0))
+        start = time.perf_counter()
+        host.execute()
+        devnull.flush()
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    policies: list[str | None] = [None, *FLUSH_POLICIES]
+    print(f"io_print_byte alone, {megabytes} MB in 64-byte lines:")
+    for policy in policies:
+        best = min(print_alone(megabytes, policy) for _ in range(3))
+        print(f"  {policy or 'unbuffered':<11}{best * 1000:>8.0f}ms"
+              f"{megabytes / best:>8.1f} MB/s")
+    print(f"a program printing {count:_} bytes:")
+    for policy in (None, "explicit", "line"):
+        best = min(print_program(count, policy) for _ in range(3))
+        print(f"  {policy or 'unbuffered':<11}{best * 1000:>8.0f}ms"
+              f"{count / best / 1024:>8.1f} KB/s")
+
+
+if __name__ == "__main__":
+    main()
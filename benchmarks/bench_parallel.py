@@ -0,0 +1,62 @@
+"""Scaling of ParallelIVM with worker count, against ArrayIVM on one process.
+
+The program sums the leaves of a tree it builds, so every level of recursion
+forks two independent subproblems.
+"""
+
+import os
+import sys
+import time
+
+from ivm.array_vm import ArrayIVM, COMB, LABEL_BITS, TAG_BITS
+from ivm.labels import intern
+from ivm.parallel_vm import ParallelIVM
+from benchmarks.common import quiet_host, write_temp
+
+SUM = """
+::sum {
+  fn(dup(n0 n1) out)
+  n0 = ?(::one ::node fn(n1 out))
+}
+
+::one { fn(_ 1) }
+
+::node {
+  fn(n out)
+  n = @n32_sub(1 dup(a b))
+  ::sum = fn(a l)
+  ::sum = fn(b r)
+  l = @n32_add(r out)
+}
+"""
+
+
+def sum_tree(ivm: ArrayIVM, path: str, depth: int) -> tuple[float, int]:
+    host = quiet_host(program_cache=False, ivm=ivm)
+    host.parse_file(path)
+    node = ivm.alloc_node()
+    ivm.heap[node] = ivm.new_value(depth)
+    fn = (node << LABEL_BITS | intern("fn")) << TAG_BITS | COMB
+    ivm.link(ivm.global_word(host.gs["::sum"]), fn)
+    start = time.perf_counter()
+    host.execute()
+    return time.perf_counter() - start, ivm.take_value(ivm.heap[node ^ 1])
+
+
+def main() -> None:
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+    path = write_temp(SUM)
+    print(f"sum of a depth-{depth} tree, {len(os.sched_getaffinity(0))} CPU(s) available:")
+    baseline, expected = sum_tree(ArrayIVM(), path, depth)
+    print(f"  ArrayIVM             {baseline:.3f}s")
+    for workers in (1, 2, 4, 8, 16):
+        ivm = ParallelIVM(workers=workers, heap_slots=1 << 22)
+        elapsed, result = sum_tree(ivm, path, depth)
+        assert result == expected, (result, expected)
+        print(
+            f"  ParallelIVM x{workers:<6} {elapsed:.3f}s  ({baseline / elapsed:.2f}x ArrayIVM)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Overlapping slow extrinsics with reduction by parking their calls.
+
+A scaled fizzbuzz runs alongside a number of fetch calls that each take a
+fixed delay, standing in for network or disk I/O. In the "chained" program
+every fetch needs the previous one's result; in the "independent" one they
+all can run at once. The blocking variant's fetch sleeps inside the call, as
+a synchronous extrinsic would; the parked variant's awaits asyncio.sleep
+and is run by Host.run_async.
+"""
+
+import asyncio
+import sys
+import time
+
+from ivm.extrinsics import ExtVal
+from benchmarks.common import quiet_host, scaled_fizzbuzz, write_temp
+
+MAIN = """::main {
+  x(io0 io1)
+  ::loop = x(x(io0 io1) 1)
+"""
+
+
+def program(n: int, fetches: int, chained: bool) -> str:
+    with open(scaled_fizzbuzz(n)) as f:
+        source = f.read()
+    if chained:
+        lines = [f"  @fetch(0 f{i + 1}) = f{i}\n" for i in range(fetches)]
+        lines.insert(0, "  f0 = 1\n")
+        lines.append(f"  f{fetches} = _\n")
+    else:
+        lines = [f"  @fetch(0 _) = {i}\n" for i in range(fetches)]
+    main = MAIN + "".join(lines) + "}\n"
+    start = source.index("::main {")
+    end = source.index("}", start) + 1
+    return write_temp(source[:start] + main + source[end:])
+
+
+def run(path: str, delay: float, parked: bool) -> float:
+    host = quiet_host(program_cache=False)
+    if parked:
+        async def fetch(a, b):
+            await asyncio.sleep(delay)
+            return a + b
+    else:
+        def fetch(a, b):
+            time.sleep(delay)
+            return a + b
+    host.add_ext_fun(fetch)
+    host.parse_file(path)
+    host.boot("::main", ExtVal(0))
+    start = time.perf_counter()
+    if parked:
+        asyncio.run(host.run_async(slice_interactions=200))
+    else:
+        host.execute()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    fetches = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    delay = 0.01
+    compute = min(run(program(n, 0, False), 0, False) for _ in range(3))
+    print(f"fizzbuzz to {n} alone: {compute * 1000:.0f}ms; "
+          f"{fetches} fetches of {delay * 1000:.0f}ms each alongside:")
+    for chained in (False, True):
+        path = program(n, fetches, chained)
+        blocking = min(run(path, delay, False) for _ in range(3))
+        parked = min(run(path, delay, True) for _ in range(3))
+        print(f"  {'chained' if chained else 'independent':<12}"
+              f" blocking {blocking * 1000:>6.0f}ms   parked {parked * 1000:>6.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compares the explicit-stack parse_tree against the original recursive one."""
+
+import sys
+
+from ivm.lexer import (
+    Lexer,
+    n32,
+    f32,
+    global_,
+    ident_,
+    open_paren,
+    close_paren,
+    at,
+    dollar,
+    question,
+    hole,
+    hash_,
+    open_bracket,
+    close_bracket,
+)
+from ivm.parser import IvyParser, IvyParserState
+from ivm.tree import (
+    Tree,
+    N32Node,
+    F32Node,
+    GlobalNode,
+    CombNode,
+    VarNode,
+    ExtFnNode,
+    BranchNode,
+    Erase,
+    BlackBox,
+)
+from benchmarks.common import best_of, generated_source
+
+
+class LegacyParser(IvyParser):
+    """parse_tree as it was before the explicit stack: one Python frame per node."""
+
+    def parse_tree(self) -> Tree:
+        if self.state.check(n32):
+            return N32Node(self.parse_u32_like(self.state.eat(n32, require=True)))
+        elif self.state.check(f32):
+            return F32Node(self.parse_f32_like(self.state.eat(f32, require=True)))
+        elif self.state.check(global_):
+            return GlobalNode(self.state.eat(global_, require=True))
+        elif self.state.check(ident_):
+            ident = self.state.eat(ident_, require=True)
+            if self.state.eat(open_paren, require=False):
+                a = self.parse_tree()
+                b = self.parse_tree()
+                self.state.eat(close_paren, require=True)
+                return CombNode(ident, a, b)
+            else:
+                return VarNode(ident)
+        if self.state.eat(at, require=False):
+            ident = self.state.eat(ident_, require=True)
+            swapped = self.state.eat(dollar, require=False) is not None
+            self.state.eat(open_paren, require=True)
+            a = self.parse_tree()
+            b = self.parse_tree()
+            self.state.eat(close_paren, require=True)
+            return ExtFnNode(ident + ("$" if swapped else ""), a, b)
+        if self.state.eat(question, require=False):
+            self.state.eat(open_paren, require=True)
+            a = self.parse_tree()
+            b = self.parse_tree()
+            c = self.parse_tree()
+            self.state.eat(close_paren, require=True)
+            return BranchNode(a, b, c)
+        if self.state.eat(hole, require=False):
+            return Erase()
+        if self.state.eat(hash_, require=False):
+            self.state.eat(open_bracket, require=True)
+            inner = self.parse_tree()
+            self.state.eat(close_bracket, require=True)
+            return BlackBox(inner)
+        raise SyntaxError(self.state.last_token)
+
+
+def nested_source(depth: int) -> str:
+    """A right-nested list literal, the shape that used to hit the recursion limit."""
+    return "::list { " + "cons(_ " * depth + "nil" + ")" * depth + " }\n"
+
+
+def parse(cls: type[IvyParser], source: str):
+    return cls(IvyParserState(Lexer.from_source(source), "<bench>")).parse_nets()
+
+
+def main() -> None:
+    globals_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    source = generated_source(globals_count)
+    t_tokens, _ = best_of(3, lambda: sum(1 for _ in Lexer.from_source(source).tokenize()))
+    t_new, _ = best_of(3, lambda: parse(IvyParser, source))
+    t_old, _ = best_of(3, lambda: parse(LegacyParser, source))
+    print(f"generated program: {len(source) / 1e6:.2f} MB (lexing alone {t_tokens:.3f}s)")
+    print(f"recursive: {t_old:.3f}s")
+    print(f"iterative: {t_new:.3f}s")
+    print(f"speedup:   {t_old / t_new:.2f}x overall, "
+          f"{(t_old - t_tokens) / (t_new - t_tokens):.2f}x excluding lexing")
+
+    depth = 10**6 if len(sys.argv) <= 2 else int(sys.argv[2])
+    t_deep, _ = best_of(1, lambda: parse(IvyParser, nested_source(depth)))
+    print(f"depth {depth}: {t_deep:.3f}s (the recursive parser raises RecursionError)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Interactions saved by pre-reducing globals at load time."""
+
+import os
+import sys
+from io import BytesIO, TextIOWrapper
+
+from ivm.extrinsics import ExtVal
+from ivm.prereduce import pre_reduce
+from ivm.stats import Stats
+from ivm.vm import IVM
+from benchmarks.common import PROGRAMS_DIR, quiet_host, scaled_fizzbuzz, write_temp
+
+# A loop whose body expands a closed constant global every iteration.
+CONSTS = """
+::main {
+  x(io0 io1)
+  ::loop = fn(1000 fn(0 total))
+  io0 = @io_print_byte(total @io_flush(0 io1))
+}
+
+::loop {
+  fn(dup(n0 n1) k)
+  n0 = ?(::done ::step fn(n1 k))
+}
+
+::done { fn(_ fn(acc acc)) }
+
+::step {
+  fn(n fn(acc out))
+  n = @n32_sub(1 m)
+  ::consts = x(a b)
+  acc = @n32_add(a @n32_add(b acc2))
+  ::loop = fn(m fn(acc2 out))
+}
+
+::consts {
+  x(a b)
+  dup(a b) = c
+  1 = ?(_ 21 c)
+}
+"""
+
+
+def measure(path: str, reduce: bool, stdin: bytes) -> tuple[int, int, int, bytes]:
+    host = quiet_host(program_cache=False, ivm=IVM(stats=Stats()))
+    host.stdin = TextIOWrapper(BytesIO(stdin))
+    host.parse_file(path)
+    changed = pre_reduce(host.gs) if reduce else 0
+    size = sum(len(g.instructions.instructions) for g in host.gs.values())
+    host.boot("::main", ExtVal(0))
+    host.execute()
+    host.stdout.flush()
+    return changed, size, host.ivm.stats.total, host.stdout.buffer.getvalue()
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    programs = [
+        ("hihi.iv", os.path.join(PROGRAMS_DIR, "hihi.iv")),
+        ("cat.iv", os.path.join(PROGRAMS_DIR, "cat.iv")),
+        (f"fizzbuzz to {n}", scaled_fizzbuzz(n)),
+        ("constant global", write_temp(CONSTS)),
+    ]
+    print(f"  {'program':<18}{'changed':>8}{'instrs':>14}{'interactions':>22}")
+    for name, path in programs:
+        _, size, before, out = measure(path, False, b"hello, world")
+        changed, reduced_size, after, reduced_out = measure(path, True, b"hello, world")
+        assert out == reduced_out, name
+        print(
+            f"  {name:<18}{changed:>8}{f'{size} -> {reduced_size}':>14}"
+            f"{f'{before} -> {after}':>22}  ({before - after} saved)"
+        )
+
+
+if __name__ == "__main__":
+    main()
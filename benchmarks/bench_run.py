@@ -0,0 +1,45 @@
+"""Reduction time of IVM.run versus draining the normalize generator."""
+
+import sys
+import time
+
+from ivm.array_vm import ArrayIVM
+from ivm.extrinsics import ExtVal
+from ivm.vm import IVM
+from benchmarks.common import quiet_host, scaled_fizzbuzz
+
+
+def reduce(path: str, engine: type, drain: str) -> float:
+    host = quiet_host(program_cache=False, ivm=engine())
+    host.parse_file(path)
+    host.boot("::main", ExtVal(0))
+    start = time.perf_counter()
+    if drain == "run":
+        host.ivm.run()
+    elif drain == "step":
+        while host.ivm.step(10_000):
+            pass
+    else:
+        for _ in host.ivm.normalize():
+            pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    path = scaled_fizzbuzz(n)
+    print(f"fizzbuzz to {n}, reduction only (best of 9, variants interleaved):")
+    for engine in (IVM, ArrayIVM):
+        best = {drain: float("inf") for drain in ("normalize", "run", "step")}
+        for _ in range(9):
+            for drain in best:
+                best[drain] = min(best[drain], reduce(path, engine, drain))
+        for drain, elapsed in best.items():
+            print(
+                f"  {engine.__name__:<9} {drain:<9} {elapsed:.3f}s"
+                f"  ({best['normalize'] / elapsed:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Speedup of ThreadedIVM over the serial engine on a tree sum.
+
+On a GIL build the threads are forced on, which measures the cost of the
+locking protocol rather than any speedup.
+"""
+
+import os
+import sys
+import time
+
+from ivm.extrinsics import ExtVal
+from ivm.globals import GlobalPort
+from ivm.heap import CombPort, make_wire_pair
+from ivm.labels import intern
+from ivm.threaded_vm import ThreadedIVM, gil_enabled
+from ivm.vm import IVM
+from benchmarks.bench_parallel import SUM
+from benchmarks.common import quiet_host, write_temp
+
+
+def sum_tree(ivm: IVM, path: str, depth: int) -> tuple[float, int]:
+    host = quiet_host(program_cache=False, ivm=ivm)
+    host.parse_file(path)
+    wire = make_wire_pair()[0]
+    wire.target = ExtVal(depth)
+    ivm.link(GlobalPort(global_ref=host.gs["::sum"]), CombPort(target=wire, label=intern("fn")))
+    start = time.perf_counter()
+    host.execute()
+    return time.perf_counter() - start, wire.other_half.load_target().value
+
+
+def main() -> None:
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+    path = write_temp(SUM)
+    print(
+        f"sum of a depth-{depth} tree, {len(os.sched_getaffinity(0))} CPU(s), "
+        f"GIL {'enabled' if gil_enabled() else 'disabled'}:"
+    )
+    baseline, expected = sum_tree(IVM(), path, depth)
+    print(f"  IVM                  {baseline:.3f}s")
+    for threads in (1, 2, 4, 8, 16):
+        elapsed, result = sum_tree(
+            ThreadedIVM(threads=threads, force_threads=True), path, depth
+        )
+        assert result == expected, (result, expected)
+        print(f"  ThreadedIVM x{threads:<6} {elapsed:.3f}s  ({baseline / elapsed:.2f}x IVM)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Shared helpers for the benchmark scripts.
+
+Run any benchmark from the repository root, e.g. ``python -m benchmarks.bench_lexer``.
+"""
+
+import os
+import tempfile
+import time
+from typing import TYPE_CHECKING, Callable, TypeVar
+
+if TYPE_CHECKING:
+    from ivm.host import Host
+
+PROGRAMS_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "programs")
+
+_T = TypeVar("_T")
+
+
+def best_of(repeat: int, fn: Callable[[], _T]) -> tuple[float, _T]:
+    """Runs fn repeat times, returning the fastest wall time and the last result."""
+    best = float("inf")
+    result: _T
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def generated_source(globals_count: int) -> str:
+    """A synthetic program in the shape Vine emits: many small globals, comments, numbers."""
+    parts = []
+    for i in range(globals_count):
+        parts.append(
+            f"::gen::g{i} {{\n"
+            f"  fn(ref(io0 io1) x{i}) // line comment\n"
+            f"  x{i} = @n32_add(0x1F dup{i % 7}(a{i} b{i}))\n"
+            f"  /* block /* nested */ comment */\n"
+            f"  a{i} = ?(::gen::g0 _ tup(b{i} @io_print_byte(+1.5 io0)))\n"
+            f"  io1 = #[_]\n"
+            f"}}\n"
+        )
+    return "".join(parts)
+
+
+def write_temp(source: str, suffix: str = ".iv") -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "w") as f:
+        f.write(source)
+    return path
+
+
+def scaled_fizzbuzz(n: int) -> str:
+    """fizzbuzz.iv counting to n instead of 20; returns the path of a temp file."""
+    with open(os.path.join(PROGRAMS_DIR, "fizzbuzz.iv")) as f:
+        source = f.read()
+    return write_temp(source.replace("::end { 20 }", f"::end {{ {n} }}"))
+
+
+def quiet_host(**kwargs) -> "Host":
+    """A Host with the std compat extrinsics whose stdout and stdin are in memory unless given."""
+    from io import BytesIO, TextIOWrapper
+
+    from ivm.compat import add_std_compat
+    from ivm.host import Host
+
+    kwargs.setdefault("stdout", TextIOWrapper(BytesIO()))
+    kwargs.setdefault("stdin", TextIOWrapper(BytesIO()))
+    host = Host(**kwargs)
+    add_std_compat(host)
+    return host
+
+
+def run_file(path: str, **kwargs) -> "Host":
+    from ivm.extrinsics import ExtVal
+
+    host = quiet_host(**kwargs)
+    host.parse_file(path)
+    host.boot("::main", ExtVal(0))
+    host.execute()
+    return host
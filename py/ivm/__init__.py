@@ -1,3 +1,6 @@
+# Keep in sync with pyproject.toml; program caches are keyed on it.
+__version__ = "0.1.0"
+
 from .extrinsics import ExtVal
 from .host import Host
 from .compat import add_std_compat
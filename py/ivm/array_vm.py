@@ -0,0 +1,600 @@
+"""An engine that keeps the net in a flat integer array instead of Python objects.
+
+Every port is a single int ("port word") with the node kind in its low TAG_BITS:
+
+    WIRE     slot << TAG_BITS                      the wire slot a port is waiting in
+    ERASE    0
+    EXT_VAL  index << TAG_BITS                     an entry of ArrayIVM.values
+    GLOBAL   index << TAG_BITS                     an entry of ArrayIVM.globals
+    COMB, EXT_FN, BRANCH
+             ((slot << LABEL_BITS | label) << TAG_BITS)   label as in ivm.labels
+
+A binary node owns the two adjacent heap slots ``slot`` and ``slot ^ 1``, which
+play the part of the object engine's Wire pair: each slot is a rendezvous for
+the two ends of an aux wire. The first end to arrive stores its port in the
+slot; the second takes it, after which the slot is dead. Once both slots of a
+node are dead the pair goes back on the free list. Slots 0 and 1 are reserved
+so that 0 can mean "empty".
+
+The interaction rules, and the order in which active pairs are reduced, mirror
+ivm.vm.IVM exactly, so both engines perform the same interactions.
+"""
+
+import dataclasses
+from array import array
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import field
+from inspect import isawaitable
+from typing import Any, Awaitable, Callable, Generator, Protocol
+
+from .extrinsics import ExtVal, Extrinsics, settle_offloaded
+from .globals import Global, GlobalPort, Instructions, Nilary, Binary, Inert
+from .heap import Port, ErasePort
+from .labels import LABELS
+from .stats import INTERACTIONS, Stats
+from .vm import NoRule
+
+TAG_BITS = 3
+LABEL_BITS = 24
+TAG_MASK = (1 << TAG_BITS) - 1
+LABEL_MASK = (1 << LABEL_BITS) - 1
+NODE_SHIFT = TAG_BITS + LABEL_BITS
+
+WIRE, ERASE, EXT_VAL, GLOBAL, COMB, EXT_FN, BRANCH = range(7)
+EMPTY = 0
+DEAD = -1
+
+_BINARY_TAGS = {"Comb": COMB, "ExtFn": EXT_FN, "Branch": BRANCH}
+
+
+class Words(Protocol):
+    """What the engine needs of a heap: an array("q"), or ParallelIVM's shared memoryview."""
+
+    def __getitem__(self, index: int, /) -> int: ...
+    def __setitem__(self, index: int, word: int, /) -> None: ...
+    def __len__(self) -> int: ...
+
+
+def _pair(ta: int, tb: int) -> int:
+    return ta << TAG_BITS | tb
+
+
+def _no_rule(a: int, b: int) -> None:
+    raise NoRule(f"no rule for words {a:#x} and {b:#x}")
+
+
+@dataclasses.dataclass
+class ArrayIVM:
+    extrinsics: Extrinsics = field(default_factory=lambda: Extrinsics())
+    heap: Words = field(default_factory=lambda: array("q", bytes(8 * 1024)))
+    # Heap slots below top have been handed out at least once.
+    top: int = 2
+    free: list[int] = field(default_factory=list)
+    values: list[Any] = field(default_factory=list)
+    free_values: list[int] = field(default_factory=list)
+    globals: list[Global] = field(default_factory=list)
+    # Flat lists of port words, two per active pair.
+    active_fast: list[int] = field(default_factory=list)
+    active_slow: list[int] = field(default_factory=list)
+    registers: list[int] = field(default_factory=list)
+    stats: Stats | None = None
+    eager_erase: bool = False
+    # Calls whose extrinsic returned an awaitable, with their output slots; see IVM.
+    parked: list[tuple[Awaitable, tuple[int, ...]]] = field(
+        default_factory=list, init=False, repr=False
+    )
+    offloaded: dict[Future, tuple[int, ...]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    finished: deque[Future] = field(default_factory=deque, init=False, repr=False)
+
+    _global_ids: dict[int, int] = field(default_factory=dict, repr=False)
+    _programs: list[list[tuple]] = field(default_factory=list, repr=False)
+    # Globals registered but not yet loaded; see global_word.
+    _unloaded: list[int] = field(default_factory=list, init=False, repr=False)
+    _loading: bool = field(default=False, init=False, repr=False)
+    _link_rules: list[Callable[[int, int], None]] = field(init=False, repr=False)
+    _interact_rules: list[Callable[[int, int], None]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Rules whose method the options replace, as in IVM.__post_init__.
+        names = {"erase": "erase_eagerly"} if self.eager_erase else {}
+        if self.stats is not None:
+            self._instrument(self.stats, names)
+        self._link_rules = [_no_rule] * (1 << 2 * TAG_BITS)
+        self._interact_rules = [_no_rule] * (1 << 2 * TAG_BITS)
+        nilary = (ERASE, EXT_VAL, GLOBAL)
+        binary = (COMB, EXT_FN, BRANCH)
+
+        def register(rules, ta, tb, rule):
+            rules[_pair(ta, tb)] = rule
+            if ta != tb:
+                rules[_pair(tb, ta)] = lambda a, b: rule(b, a)
+
+        for ta in nilary:
+            for tb in nilary:
+                register(self._link_rules, ta, tb, self._drop)
+            for tb in binary:
+                register(self._link_rules, ta, tb, self._push_fast)
+        register(self._link_rules, GLOBAL, EXT_VAL, self._push_slow)
+        for tb in binary:
+            register(self._link_rules, GLOBAL, tb, self._push_slow)
+        for ta in binary:
+            for tb in binary:
+                register(self._link_rules, ta, tb, self._push_slow)
+        register(self._link_rules, COMB, COMB, self._push_binary)
+        register(self._link_rules, EXT_FN, EXT_FN, self._push_binary)
+
+        i = self._interact_rules
+        register(i, GLOBAL, COMB, self.copy_or_expand)
+        for tb in (EXT_FN, BRANCH, EXT_VAL):
+            register(i, GLOBAL, tb, self.expand)
+        # Oriented as in ivm.vm.INTERACT_RULES, so commutes build identical nets.
+        for ta in binary:
+            for tb in binary:
+                if ta <= tb:
+                    register(i, ta, tb, self.annihilate_or_commute)
+        register(i, BRANCH, EXT_VAL, self.branch)
+        register(i, EXT_FN, EXT_VAL, self.call)
+        register(i, EXT_VAL, COMB, self.copy)
+        for tb in binary:
+            register(i, ERASE, tb, getattr(self, names.get("erase", "erase")))
+
+    def _instrument(self, stats: Stats, names: dict[str, str]) -> None:
+        expand = stats.counting_expansions(
+            lambda a: self.globals[a >> TAG_BITS].name, self.expand
+        )
+        setattr(self, "expand", expand)
+        setattr(self, "follow", stats.counting_follows(self._chain_length, self.follow))
+        for kind in INTERACTIONS:
+            name = names.get(kind, kind)
+            setattr(self, name, stats.counting(kind, getattr(self, name)))
+        for push in ("_push_fast", "_push_slow", "_push_binary"):
+            setattr(
+                self,
+                push,
+                stats.watching(
+                    self.active_fast, self.active_slow, getattr(self, push), width=2
+                ),
+            )
+
+    # Heap and value allocation
+
+    def alloc_node(self) -> int:
+        if self.free:
+            return self.free.pop()
+        slot = self.top
+        if slot == len(self.heap):
+            heap = self.heap
+            assert isinstance(heap, array)  # only ParallelIVM's is shared, and fixed
+            heap.frombytes(bytes(8 * len(heap)))
+        self.top = slot + 2
+        return slot
+
+    def free_slot(self, slot: int) -> None:
+        heap = self.heap
+        if heap[slot ^ 1] == DEAD:
+            heap[slot] = heap[slot ^ 1] = EMPTY
+            self.free.append(slot & ~1)
+        else:
+            heap[slot] = DEAD
+
+    def new_value(self, value: Any) -> int:
+        if self.free_values:
+            index = self.free_values.pop()
+            self.values[index] = value
+        else:
+            index = len(self.values)
+            self.values.append(value)
+        return index << TAG_BITS | EXT_VAL
+
+    def take_value(self, word: int) -> Any:
+        index = word >> TAG_BITS
+        value = self.values[index]
+        self.values[index] = None
+        self.free_values.append(index)
+        return value
+
+    def live_nodes(self) -> int:
+        return (self.top - 2) // 2 - len(self.free)
+
+    # Converting between ports and words
+
+    def global_word(self, g: Global) -> int:
+        if (index := self._global_ids.get(id(g))) is None:
+            index = self._global_ids[id(g)] = len(self.globals)
+            self.globals.append(g)
+            self._programs.append([])
+            self._unloaded.append(index)
+            # Loading registers the globals referenced, which the outermost
+            # call loads in turn, so that long chains of references do not
+            # recurse.
+            if not self._loading:
+                self._load_registered()
+        return index << TAG_BITS | GLOBAL
+
+    def _load_registered(self) -> None:
+        unloaded = self._unloaded
+        self._loading = True
+        try:
+            while unloaded:
+                index = unloaded.pop()
+                self._programs[index] = self._load(self.globals[index].instructions)
+        finally:
+            self._loading = False
+            unloaded.clear()
+
+    def port_word(self, port: Port) -> int:
+        if isinstance(port, ErasePort):
+            return ERASE
+        if isinstance(port, ExtVal):
+            return self.new_value(port.value)
+        if isinstance(port, GlobalPort):
+            return self.global_word(port.global_ref)
+        raise NotImplementedError(f"ArrayIVM cannot hold {port!r}")
+
+    def _load(self, instructions: Instructions) -> list[tuple]:
+        """Resolves instructions to (op, ...) tuples over port words."""
+        program: list[tuple] = [(instructions.next_register,)]
+        for instruction in instructions:
+            if isinstance(instruction, Nilary):
+                port = instruction.port
+                if isinstance(port, ExtVal):
+                    program.append((EXT_VAL, instruction.register0, port.value))
+                else:
+                    program.append((ERASE, instruction.register0, self.port_word(port)))
+            elif isinstance(instruction, Binary):
+                if instruction.label > LABEL_MASK:
+                    raise OverflowError(f"more than {LABEL_MASK >> 1} distinct labels")
+                program.append(
+                    (
+                        COMB,
+                        instruction.register0,
+                        instruction.register1,
+                        instruction.register2,
+                        _BINARY_TAGS[instruction.tag]
+                        | instruction.label << TAG_BITS,
+                    )
+                )
+            elif isinstance(instruction, Inert):
+                program.append((WIRE, instruction.register0, instruction.register1))
+            else:
+                raise NotImplementedError(f"unknown instruction {instruction!r}")
+        return program
+
+    def wrap_result(self, result: Any) -> int:
+        if isinstance(result, Port):
+            return self.port_word(result)
+        return self.new_value(result)
+
+    # Reduction
+
+    def boot(self, g: Global, ext_val: ExtVal) -> None:
+        self.link(self.global_word(g), self.new_value(ext_val.value))
+
+    def run(self) -> None:
+        fast, slow, rules = self.active_fast, self.active_slow, self._interact_rules
+        finished = self.finished
+        while True:
+            while fast:
+                b = fast.pop()
+                a = fast.pop()
+                rules[(a & TAG_MASK) << TAG_BITS | b & TAG_MASK](a, b)
+            if finished:
+                self.settle()
+                continue
+            if not slow:
+                if not self.offloaded:
+                    return
+                self.settle(block=True)
+                continue
+            b = slow.pop()
+            a = slow.pop()
+            rules[(a & TAG_MASK) << TAG_BITS | b & TAG_MASK](a, b)
+
+    def step(self, max_interactions: int) -> int:
+        fast, slow, interact = self.active_fast, self.active_slow, self.interact
+        finished = self.finished
+        for _ in range(max_interactions):
+            if fast:
+                b = fast.pop()
+                interact(fast.pop(), b)
+            elif finished:
+                self.settle()
+            elif slow:
+                b = slow.pop()
+                interact(slow.pop(), b)
+            else:
+                break
+        return (len(fast) + len(slow)) // 2
+
+    def normalize(self) -> Generator[None, None, None]:
+        fast, slow, interact = self.active_fast, self.active_slow, self.interact
+        while True:
+            while fast:
+                b = fast.pop()
+                interact(fast.pop(), b)
+                yield
+            if self.finished:
+                self.settle()
+                yield
+            elif slow:
+                b = slow.pop()
+                interact(slow.pop(), b)
+                yield
+            elif self.offloaded:
+                self.settle(block=True)
+                yield
+            else:
+                break
+
+    def follow(self, a: int) -> int:
+        """Follows a WIRE word to what is waiting at the end of it, consuming the slots passed."""
+        heap = self.heap
+        while a & TAG_MASK == WIRE:
+            slot = a >> TAG_BITS
+            target = heap[slot]
+            if target == EMPTY:
+                break
+            self.free_slot(slot)
+            a = target
+        return a
+
+    def _chain_length(self, a: int) -> int:
+        n = 0
+        while a & TAG_MASK == WIRE and (target := self.heap[a >> TAG_BITS]) != EMPTY:
+            n += 1
+            a = target
+        return n
+
+    def link_wire(self, slot: int, b: int) -> None:
+        b = self.follow(b)
+        heap = self.heap
+        c = heap[slot]
+        if c == EMPTY:
+            heap[slot] = b
+        else:
+            self.free_slot(slot)
+            self.link(c, b)
+
+    def link_wire_wire(self, a: int, b: int) -> None:
+        self.link_wire(a, b << TAG_BITS)
+
+    def link(self, a: int, b: int) -> None:
+        if a & TAG_MASK == WIRE:
+            self.link_wire(a >> TAG_BITS, b)
+        elif b & TAG_MASK == WIRE:
+            self.link_wire(b >> TAG_BITS, a)
+        else:
+            self._link_rules[_pair(a & TAG_MASK, b & TAG_MASK)](a, b)
+
+    def interact(self, a: int, b: int) -> None:
+        self._interact_rules[_pair(a & TAG_MASK, b & TAG_MASK)](a, b)
+
+    def _drop(self, a: int, b: int) -> None:
+        if a & TAG_MASK == EXT_VAL:
+            self.take_value(a)
+        if b & TAG_MASK == EXT_VAL:
+            self.take_value(b)
+
+    def _push_fast(self, a: int, b: int) -> None:
+        self.active_fast.append(a)
+        self.active_fast.append(b)
+
+    def _push_slow(self, a: int, b: int) -> None:
+        self.active_slow.append(a)
+        self.active_slow.append(b)
+
+    def _push_binary(self, a: int, b: int) -> None:
+        queue = self.active_fast if _label(a) == _label(b) else self.active_slow
+        queue.append(a)
+        queue.append(b)
+
+    def fork(self, a: int) -> int:
+        if a & TAG_MASK == EXT_VAL:
+            return self.new_value(self.values[a >> TAG_BITS])
+        return a
+
+    def copy_or_expand(self, a: int, b: int) -> None:
+        g = self.globals[a >> TAG_BITS]
+        if g.contains_label(_label(b)):
+            self.expand(a, b)
+        else:
+            self.copy(a, b)
+
+    def annihilate_or_commute(self, a: int, b: int) -> None:
+        if _label(a) == _label(b):
+            self.annihilate(a, b)
+        else:
+            self.commute(a, b)
+
+    def annihilate(self, a: int, b: int) -> None:
+        a1 = _slot(a)
+        b1 = _slot(b)
+        self.link_wire_wire(a1, b1)
+        self.link_wire_wire(a1 ^ 1, b1 ^ 1)
+
+    def copy(self, a: int, b: int) -> None:
+        x = _slot(b)
+        self.link_wire(x, self.fork(a))
+        self.link_wire(x ^ 1, a)
+
+    def erase(self, a: int, b: int) -> None:
+        x = _slot(b)
+        self.link_wire(x, a)
+        self.link_wire(x ^ 1, a)
+
+    def erase_eagerly(self, a: int, b: int) -> None:
+        """Like IVM.erase_eagerly: frees b and every node reachable from it at once."""
+        heap, stats = self.heap, self.stats
+        nodes = [b]
+        while nodes:
+            x = _slot(nodes.pop())
+            for slot in (x, x ^ 1):
+                c = heap[slot]
+                if c == EMPTY:
+                    heap[slot] = a
+                    continue
+                self.free_slot(slot)
+                c = self.follow(c)
+                tag = c & TAG_MASK
+                if tag >= COMB:
+                    if stats is not None:
+                        stats.interactions["erase"] += 1
+                    nodes.append(c)
+                elif tag == WIRE:
+                    self.link_wire(c >> TAG_BITS, a)
+                elif tag == EXT_VAL:
+                    self.take_value(c)
+
+    def commute(self, a: int, b: int) -> None:
+        a_kind, b_kind = a & ~(-1 << NODE_SHIFT), b & ~(-1 << NODE_SHIFT)
+        a1 = self.alloc_node()
+        a2 = self.alloc_node()
+        b1 = self.alloc_node()
+        b2 = self.alloc_node()
+        self.link_wire_wire(a1, b1)
+        self.link_wire_wire(a1 ^ 1, b2)
+        self.link_wire_wire(a2, b1 ^ 1)
+        self.link_wire_wire(a2 ^ 1, b2 ^ 1)
+        a0 = _slot(a)
+        b0 = _slot(b)
+        self.link_wire(a0, b1 << NODE_SHIFT | b_kind)
+        self.link_wire(a0 ^ 1, b2 << NODE_SHIFT | b_kind)
+        self.link_wire(b0, a1 << NODE_SHIFT | a_kind)
+        self.link_wire(b0 ^ 1, a2 << NODE_SHIFT | a_kind)
+
+    def branch(self, a: int, b: int) -> None:
+        b1 = _slot(a)
+        z = self.alloc_node()
+        self.link_wire(b1, z << NODE_SHIFT | a & ~(-1 << NODE_SHIFT))
+        if not self.take_value(b):
+            y, n = z, z ^ 1
+        else:
+            y, n = z ^ 1, z
+        self.link_wire(n, ERASE)
+        self.link_wire_wire(b1 ^ 1, y)
+
+    def call(self, a: int, b: int) -> None:
+        label = _label(a)
+        if (op := self.extrinsics.intrinsics.get(label >> 1)) is not None:
+            rhs = _slot(a)
+            rhs_port = self.heap[rhs]
+            if rhs_port & TAG_MASK == EXT_VAL:
+                self.free_slot(rhs)
+                if self.stats is not None:
+                    self.stats.ext_calls[LABELS.names[label >> 1]] += 1
+                if label & 1:
+                    result = op(self.take_value(rhs_port), self.take_value(b))
+                else:
+                    result = op(self.take_value(b), self.take_value(rhs_port))
+                self.link_wire(rhs ^ 1, self.new_value(result))
+                return
+
+        swapped = label & 1
+        name = LABELS.names[label >> 1]
+        rhs = _slot(a)
+        out = rhs ^ 1
+
+        if (split := self.extrinsics.split_ext_fns.get(name)) is not None:
+            if self.stats is not None:
+                self.stats.ext_calls[name] += 1
+            result = split(self.take_value(b))
+            if isinstance(result, Future) or isawaitable(result):
+                self.park(result, (rhs, out))
+                return
+            result1, result2 = result
+            self.link_wire(rhs, self.wrap_result(result1))
+            self.link_wire(out, self.wrap_result(result2))
+            return
+
+        rhs_port = self.heap[rhs]
+        if rhs_port & TAG_MASK == EXT_VAL:
+            self.free_slot(rhs)
+            if self.stats is not None:
+                self.stats.ext_calls[name] += 1
+            if swapped:
+                result = self.extrinsics.ext_fns[name](
+                    self.take_value(rhs_port), self.take_value(b)
+                )
+            else:
+                result = self.extrinsics.ext_fns[name](
+                    self.take_value(b), self.take_value(rhs_port)
+                )
+            if isinstance(result, Future) or isawaitable(result):
+                self.park(result, (out,))
+                return
+            self.link_wire(out, self.wrap_result(result))
+            return
+
+        node = self.alloc_node()
+        self.link_wire(
+            rhs,
+            (node << LABEL_BITS | _label(a) ^ 1) << TAG_BITS | EXT_FN,
+        )
+        self.link_wire(node, b)
+        self.link_wire_wire(node ^ 1, out)
+
+    def park(self, result: Awaitable | Future, outs: tuple[int, ...]) -> None:
+        if isinstance(result, Future):
+            self.offloaded[result] = outs
+            result.add_done_callback(self.finished.append)
+        else:
+            self.parked.append((result, outs))
+
+    def resume(self, outs: tuple[int, ...], results: tuple) -> None:
+        """Links the results of a parked call, once its awaitable is done."""
+        for out, result in zip(outs, results):
+            self.link_wire(out, self.wrap_result(result))
+
+    def settle(self, block: bool = False) -> int:
+        """Resumes the offloaded calls that are done; see IVM.settle."""
+        return settle_offloaded(self.offloaded, self.finished, self.resume, block)
+
+    def expand(self, a: int, b: int) -> None:
+        self.execute(self._programs[a >> TAG_BITS], b)
+
+    def execute(self, program: list[tuple], port: int) -> None:
+        (needed_registers,) = program[0]
+        registers = self.registers
+        if needed_registers > len(registers):
+            registers += [EMPTY] * (needed_registers - len(registers))
+
+        def link_register(register: int, word: int) -> None:
+            if (other := registers[register]) != EMPTY:
+                registers[register] = EMPTY
+                self.link(word, other)
+            else:
+                registers[register] = word
+
+        link_register(0, port)
+        for op, r0, *args in program[1:]:
+            if op == COMB:
+                r1, r2, kind = args
+                node = self.alloc_node()
+                link_register(r0, node << NODE_SHIFT | kind)
+                link_register(r1, node << TAG_BITS)
+                link_register(r2, (node ^ 1) << TAG_BITS)
+            elif op == EXT_VAL:
+                link_register(r0, self.new_value(args[0]))
+            elif op == ERASE:
+                link_register(r0, args[0])
+            else:
+                w1 = self.alloc_node()
+                w2 = self.alloc_node()
+                link_register(r0, w1 << TAG_BITS)
+                link_register(args[0], w2 << TAG_BITS)
+
+        for register in registers:
+            assert (
+                register == EMPTY
+            ), f"Found unempty register {register}, instructions did not complete cleanly"
+
+
+def _slot(word: int) -> int:
+    return word >> NODE_SHIFT
+
+
+def _label(word: int) -> int:
+    return word >> TAG_BITS & LABEL_MASK
@@ -0,0 +1,148 @@
+"""On-disk cache of serialized programs, in the spirit of ``__pycache__``.
+
+A cache entry lives in ``__ivmcache__/`` next to the source file and holds the
+output of ``insert_nets``: every ``Global`` with its ``Instructions``, flattened
+to plain tuples and pickled. Labels are written as strings, since interned ids
+(see ivm.labels) differ between processes, and label sets are recomputed on
+load. An entry is used only if all of the following hold, and is silently
+rebuilt otherwise:
+
+* the header magic and ``FORMAT`` match this module,
+* it was written by the same py-ivm ``__version__`` (part of the file name too),
+* the sha256 of the source bytes matches the one recorded in the header,
+* the payload unpickles and decodes cleanly.
+
+Loading an entry unpickles it, so the cache is opt-in (Host.program_cache);
+only the py-ivm runner enables it by default.
+
+Writes go through a temporary file and ``os.replace`` so readers never observe
+a partial entry; failing to write (e.g. a read-only directory) is not an error.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any
+
+from . import __version__
+from .extrinsics import ExtVal
+from .globals import Global, Instruction, Nilary, Binary, Inert, GlobalPort
+from .heap import ErasePort
+from .labels import intern, label_name
+from .serialize import close_labels
+
+CACHE_DIR = "__ivmcache__"
+MAGIC = b"IVMC"
+# Bump whenever the encoding below, or the meaning of what it encodes, changes.
+FORMAT = 3
+
+_NILARY_ERASE, _NILARY_EXT_VAL, _NILARY_GLOBAL, _BINARY, _INERT = range(5)
+
+
+class Uncacheable(Exception):
+    pass
+
+
+def cache_path(filename: str) -> str:
+    directory, base = os.path.split(os.path.abspath(filename))
+    return os.path.join(directory, CACHE_DIR, f"{base}.py-ivm-{__version__}.ivc")
+
+
+def _header(source: bytes) -> bytes:
+    return (
+        MAGIC
+        + FORMAT.to_bytes(2, "little")
+        + hashlib.sha256(__version__.encode() + b"\0" + source).digest()
+    )
+
+
+def load(filename: str, source: bytes) -> dict[str, Global] | None:
+    """Returns the cached globals for source, or None on a miss."""
+    header = _header(source)
+    try:
+        with open(cache_path(filename), "rb") as f:
+            if f.read(len(header)) != header:
+                return None
+            return decode(pickle.load(f))
+    except Exception:
+        return None
+
+
+def store(filename: str, source: bytes, gs: dict[str, Global]) -> None:
+    try:
+        payload = encode(gs)
+    except Uncacheable:
+        return
+    path = cache_path(filename)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_header(source))
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        pass
+
+
+def _encode_instruction(instruction: Instruction) -> tuple:
+    if isinstance(instruction, Nilary):
+        port = instruction.port
+        if type(port) is ErasePort:
+            return _NILARY_ERASE, instruction.register0
+        if type(port) is ExtVal:
+            return _NILARY_EXT_VAL, instruction.register0, port.value
+        if type(port) is GlobalPort:
+            return _NILARY_GLOBAL, instruction.register0, port.global_ref.name
+    elif isinstance(instruction, Binary):
+        return (
+            _BINARY,
+            instruction.tag,
+            label_name(instruction.label),
+            instruction.register0,
+            instruction.register1,
+            instruction.register2,
+        )
+    elif isinstance(instruction, Inert):
+        return _INERT, instruction.register0, instruction.register1
+    raise Uncacheable(f"cannot cache instruction {instruction!r}")
+
+
+def encode(gs: dict[str, Global]) -> list[tuple]:
+    return [
+        (
+            g.name,
+            g.instructions.next_register,
+            [_encode_instruction(i) for i in g.instructions],
+        )
+        for g in gs.values()
+    ]
+
+
+def decode(payload: list[tuple]) -> dict[str, Global]:
+    gs = {entry[0]: Global(entry[0]) for entry in payload}
+    for name, next_register, instructions in payload:
+        g = gs[name]
+        g.instructions.next_register = next_register
+        append = g.instructions.append
+        for op, *args in instructions:
+            if op == _NILARY_ERASE:
+                append(Nilary(args[0], ErasePort()))
+            elif op == _NILARY_EXT_VAL:
+                append(Nilary(args[0], ExtVal(args[1])))
+            elif op == _NILARY_GLOBAL:
+                append(Nilary(args[0], GlobalPort(global_ref=gs[args[1]])))
+            elif op == _BINARY:
+                tag, label, *registers = args
+                append(Binary(tag, intern(label), *registers))
+            elif op == _INERT:
+                append(Inert(*args))
+            else:
+                raise ValueError(f"unknown cached instruction {op}")
+    close_labels(gs)
+    return gs
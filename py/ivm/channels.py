@@ -0,0 +1,227 @@
+"""Buffered byte channels between a running program and the host's streams.
+
+io_print_byte hands over one byte per call. OutputChannel collects them in a
+preallocated bytearray and writes them out a block at a time: straight to the
+file descriptor under the stream when there is one, else to the stream's
+binary buffer. When a block is written out is the flush policy:
+
+  "explicit"  on io_flush, or when the buffer is full
+  "line"      also after every newline
+  "size"      only when the buffer is full (io_flush is ignored)
+  "timer"     also on the first byte written interval seconds after the last flush
+
+Whatever the policy, the host flushes the channel when a run ends.
+
+io_read_byte likewise takes one byte per call. InputChannel reads the stream
+in chunks of whatever is available, up to a chunk size, and serves bytes out
+of the current one; with prefetch it does the reading on a background thread,
+started on the first read, that keeps a few chunks ready ahead of the
+program. Once the stream reports end of file, every further read returns EOF
+without touching the stream.
+"""
+
+import io
+import os
+import queue
+import threading
+import time
+import weakref
+from typing import BinaryIO, TextIO
+
+FLUSH_POLICIES = ("explicit", "line", "size", "timer")
+
+
+class OutputChannel:
+    __slots__ = (
+        "stream",
+        "policy",
+        "size",
+        "interval",
+        "write_byte",
+        "_buffer",
+        "_used",
+        "_fd",
+        "_last_flush",
+    )
+
+    def __init__(
+        self,
+        stream: TextIO,
+        policy: str = "explicit",
+        size: int = 1 << 16,
+        interval: float = 0.1,
+    ) -> None:
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(
+                f"unknown flush policy {policy!r}; expected one of {FLUSH_POLICIES}"
+            )
+        self.stream = stream
+        self.policy = policy
+        self.size = size
+        self.interval = interval
+        self._buffer = bytearray(size)
+        self._used = 0
+        try:
+            self._fd: int | None = stream.fileno()
+        except (OSError, AttributeError):  # io.UnsupportedOperation is an OSError
+            self._fd = None
+        self._last_flush = time.monotonic()
+        # Chosen once here so that writing a byte does not test the policy.
+        self.write_byte = {
+            "explicit": self._write,
+            "line": self._write_line,
+            "size": self._write,
+            "timer": self._write_timed,
+        }[policy]
+
+    def _write(self, b: int) -> None:
+        used = self._used
+        self._buffer[used] = b & 0xFF
+        self._used = used = used + 1
+        if used == self.size:
+            self.flush()
+
+    def _write_line(self, b: int) -> None:
+        used = self._used
+        self._buffer[used] = b = b & 0xFF
+        self._used = used = used + 1
+        if used == self.size or b == 10:
+            self.flush()
+
+    def _write_timed(self, b: int) -> None:
+        used = self._used
+        self._buffer[used] = b & 0xFF
+        self._used = used = used + 1
+        if used == self.size or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def request_flush(self) -> None:
+        """What io_flush does: flushes, unless the policy is "size"."""
+        if self.policy != "size":
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes out the buffered bytes, after whatever the stream itself holds."""
+        self._last_flush = time.monotonic()
+        used = self._used
+        if not used:
+            self.stream.flush()
+            return
+        self._used = 0
+        block = memoryview(self._buffer)[:used]
+        # Anything written through the stream itself goes out first.
+        self.stream.flush()
+        if self._fd is not None:
+            written = 0
+            while written < used:
+                written += os.write(self._fd, block[written:])
+        else:
+            self.stream.buffer.write(block)
+            self.stream.buffer.flush()
+
+
+EOF = 0xFFFFFFFF
+
+
+class InputChannel:
+    __slots__ = (
+        "stream",
+        "chunk_size",
+        "prefetch",
+        "ahead",
+        "_chunk",
+        "_pos",
+        "_end",
+        "_eof",
+        "_ready",
+        "_stop",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        stream: TextIO,
+        chunk_size: int = 1 << 16,
+        prefetch: bool = False,
+        ahead: int = 4,
+    ) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.prefetch = prefetch
+        self.ahead = ahead
+        self._chunk = b""
+        self._pos = self._end = 0
+        self._eof = False
+        # With prefetch, the reader thread's chunks, ending with b"" at EOF.
+        # The thread is only started by the first read, so a channel that is
+        # never read from leaves its stream alone.
+        self._ready: queue.Queue[bytes] | None = None
+        self._stop = threading.Event()
+
+    def read_byte(self) -> int:
+        """The next byte of the stream, or EOF (0xFFFFFFFF) once it has ended."""
+        pos = self._pos
+        if pos < self._end:
+            self._pos = pos + 1
+            return self._chunk[pos]
+        return self._next_chunk()
+
+    def close(self) -> None:
+        """Stops the reader thread, once its current read returns; the stream stays open."""
+        self._stop.set()
+
+    def _next_chunk(self) -> int:
+        if self._eof:
+            return EOF
+        if self.prefetch and self._ready is None:
+            self._ready = queue.Queue(self.ahead)
+            # The thread does not refer to the channel, so an abandoned
+            # channel can be collected, which stops the thread too.
+            threading.Thread(
+                target=_read_ahead,
+                args=(self.stream.buffer, self.chunk_size, self._ready, self._stop),
+                name="ivm-read-ahead",
+                daemon=True,
+            ).start()
+            weakref.finalize(self, self._stop.set)
+        if self._ready is None:
+            chunk = _read(self.stream.buffer, self.chunk_size)
+        else:
+            chunk = self._ready.get()
+        if not chunk:
+            self._eof = True
+            return EOF
+        self._chunk, self._pos, self._end = chunk, 1, len(chunk)
+        return chunk[0]
+
+
+def _read(buffer: BinaryIO, size: int) -> bytes:
+    # read1 returns what one read of the underlying file gives, so a program
+    # reading from a terminal or pipe is not kept waiting for a whole chunk.
+    if isinstance(buffer, io.BufferedIOBase):
+        return buffer.read1(size)
+    return buffer.read(size)
+
+
+# Seconds the reader thread waits on a full queue before checking for a stop.
+_STOP_POLL = 0.1
+
+
+def _read_ahead(
+    buffer: BinaryIO, size: int, ready: "queue.Queue[bytes]", stop: threading.Event
+) -> None:
+    try:
+        while not stop.is_set() and (chunk := _read(buffer, size)):
+            _put(ready, chunk, stop)
+    finally:
+        if not stop.is_set():
+            _put(ready, b"", stop)
+
+
+def _put(ready: "queue.Queue[bytes]", chunk: bytes, stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            ready.put(chunk, timeout=_STOP_POLL)
+            return
+        except queue.Full:
+            pass
@@ -0,0 +1,116 @@
+"""Compiles a Global's Instructions into a specialized Python function.
+
+IVM.execute interprets instructions one by one, routing every port through
+link_register. Since each register is written exactly twice, whether a given
+write stores or links is known statically. The generated function therefore
+keeps registers in local variables, builds nodes inline, and only calls back
+into the VM to link ports:
+
+    def expand(ivm, r0):
+        link = ivm.link
+        link_wire = ivm.link_wire
+        w0 = Wire(); w0_ = Wire(); w0.other_half = w0_; w0_.other_half = w0
+        link(CombPort(target=w0, label=2), r0)
+        r2 = WirePort(wire=w0_)
+        ...
+"""
+
+from itertools import count
+from typing import Any, Callable
+
+from .extrinsics import ExtVal, ExtFnPort
+from .globals import Global, Instructions, Nilary, Binary, Inert
+from .heap import Port, NilaryNodePort, Wire, WirePort, CombPort, BranchPort
+
+CompiledGlobal = Callable[[Any, Port], None]
+
+_BINARY_PORTS = {"Comb": "CombPort", "Branch": "BranchPort", "ExtFn": "ExtFnPort"}
+_SELF_FORKING = (NilaryNodePort.fork, ExtVal.fork)
+
+
+class UncleanInstructions(Exception):
+    pass
+
+
+def generate_source(instructions: Instructions, function_name: str) -> tuple[str, dict]:
+    """Returns the source of the expansion function and the constants it closes over."""
+    constants: dict[str, Any] = {}
+    lines = [
+        f"def {function_name}(ivm, r0):",
+        "    link = ivm.link",
+        "    link_wire = ivm.link_wire",
+    ]
+    full = {0}
+    wire_names = count()
+
+    def to_register(register: int, port: str, wire: str | None = None) -> None:
+        """link_register(register, port); wire names the wire if port is WirePort(wire)."""
+        if register in full:
+            full.remove(register)
+            if wire is not None:
+                lines.append(f"    link_wire({wire}, r{register})")
+            else:
+                lines.append(f"    link({port}, r{register})")
+        else:
+            full.add(register)
+            lines.append(f"    r{register} = {port}")
+
+    def new_wire_pair() -> tuple[str, str]:
+        n = next(wire_names)
+        a, b = f"w{n}", f"w{n}_"
+        lines.append(
+            f"    {a} = Wire(); {b} = Wire(); {a}.other_half = {b}; {b}.other_half = {a}"
+        )
+        return a, b
+
+    for n, instruction in enumerate(instructions):
+        if isinstance(instruction, Nilary):
+            constant = f"k{n}"
+            constants[constant] = instruction.port
+            if type(instruction.port).fork in _SELF_FORKING:
+                to_register(instruction.register0, constant)
+            else:
+                to_register(instruction.register0, f"{constant}.fork()")
+        elif isinstance(instruction, Binary):
+            a, b = new_wire_pair()
+            port = _BINARY_PORTS[instruction.tag]
+            to_register(
+                instruction.register0,
+                f"{port}(target={a}, label={instruction.label!r})",
+            )
+            to_register(instruction.register1, f"WirePort(wire={a})", a)
+            to_register(instruction.register2, f"WirePort(wire={b})", b)
+        elif isinstance(instruction, Inert):
+            a, _ = new_wire_pair()
+            c, _ = new_wire_pair()
+            to_register(instruction.register0, f"WirePort(wire={a})", a)
+            to_register(instruction.register1, f"WirePort(wire={c})", c)
+        else:
+            raise NotImplementedError(f"cannot compile instruction {instruction!r}")
+
+    if full:
+        raise UncleanInstructions(
+            f"registers {sorted(full)} are left unlinked, instructions do not complete cleanly"
+        )
+    return "\n".join(lines) + "\n", constants
+
+
+def compile_global(g: Global) -> CompiledGlobal:
+    function_name = "expand_global"
+    source, constants = generate_source(g.instructions, function_name)
+    namespace: dict[str, Any] = {
+        "Wire": Wire,
+        "WirePort": WirePort,
+        "CombPort": CombPort,
+        "BranchPort": BranchPort,
+        "ExtFnPort": ExtFnPort,
+        **constants,
+    }
+    exec(compile(source, f"<ivm global {g.name}>", "exec"), namespace)
+    return namespace[function_name]
+
+
+def compile_globals(gs: dict[str, Global]) -> None:
+    """Attaches a compiled expansion to every Global; IVM.expand prefers it."""
+    for g in gs.values():
+        g.compiled = compile_global(g)
@@ -1,95 +1,72 @@
-from typing import Any, Callable
+import operator
+from typing import Any, Callable, Iterable, Sequence
 
 from ivm.extrinsics import ExtVal
 from ivm.host import Host
+from ivm.intrinsics import INTRINSICS, N32_MASK, f32, install_intrinsics
 
 
-def add_std_compat(host: Host) -> None:
-    def merge_ext_fn(c: Callable):
-        host.add_ext_fun(c)
-
-    @merge_ext_fn
-    def io_print_byte(io, b):
-        host.stdout.buffer.write((b & 0xFF).to_bytes(1))
-        return 0
-
-    @merge_ext_fn
-    def io_flush(io, _):
-        host.stdout.flush()
-        return 0
-
-    @merge_ext_fn
-    def n32_sub(a, b):
-        return a - b
-
-    @merge_ext_fn
-    def n32_add(a, b):
-        return a + b
-
-    @merge_ext_fn
-    def n32_eq(a, b):
-        return int(a == b)
-
-    @merge_ext_fn
-    def n32_ne(a, b):
-        return int(a != b)
+Batched = Callable[[Sequence, Sequence], Iterable]
 
-    @merge_ext_fn
-    def n32_mul(a, b):
-        return a * b
-
-    @merge_ext_fn
-    def n32_rem(a, b):
-        return a % b
-
-    @merge_ext_fn
-    def n32_div(a, b):
-        return a // b
 
-    @merge_ext_fn
-    def n32_lt(a, b):
-        return int(a < b)
+def _elementwise(
+    op: Callable[[Any, Any], Any], result: Callable[[Any], Any] | None = None
+) -> Batched:
+    if result is None:
+        return lambda lhs, rhs: map(op, lhs, rhs)
+    return lambda lhs, rhs: map(result, map(op, lhs, rhs))
 
-    @merge_ext_fn
-    def f32_sub(a, b):
-        return a - b
 
-    @merge_ext_fn
-    def f32_add(a, b):
-        return a + b
+_wrap = N32_MASK.__and__
 
-    @merge_ext_fn
-    def f32_eq(a, b):
-        return float(a == b)
+# The intrinsics in batched form (see IVM.batch_calls), with the same
+# semantics: each maps over the whole batch instead of making one call per pair.
+BATCHED_NUMERIC: dict[str, Batched] = {
+    "n32_add": _elementwise(operator.add, _wrap),
+    "n32_sub": _elementwise(operator.sub, _wrap),
+    "n32_mul": _elementwise(operator.mul, _wrap),
+    "n32_div": _elementwise(operator.floordiv),
+    "n32_rem": _elementwise(operator.mod),
+    "n32_eq": _elementwise(operator.eq, int),
+    "n32_ne": _elementwise(operator.ne, int),
+    "n32_lt": _elementwise(operator.lt, int),
+    "f32_add": _elementwise(operator.add, f32),
+    "f32_sub": _elementwise(operator.sub, f32),
+    "f32_mul": _elementwise(operator.mul, f32),
+    "f32_div": _elementwise(INTRINSICS["f32_div"]),
+    "f32_rem": _elementwise(INTRINSICS["f32_rem"]),
+    "f32_eq": _elementwise(operator.eq, float),
+    "f32_ne": _elementwise(operator.ne, float),
+    "f32_lt": _elementwise(operator.lt, float),
+}
 
-    @merge_ext_fn
-    def f32_ne(a, b):
-        return float(a != b)
 
-    @merge_ext_fn
-    def f32_mul(a, b):
-        return a * b
+def add_std_compat(host: Host) -> None:
+    def merge_ext_fn(c: Callable):
+        host.add_ext_fun(c)
 
     @merge_ext_fn
-    def f32_rem(a, b):
-        return a % b
+    def io_print_byte(io, b):
+        host.output.write_byte(b)
+        return 0
 
     @merge_ext_fn
-    def f32_div(a, b):
-        return a / b
+    def io_flush(io, _):
+        host.output.request_flush()
+        return 0
 
-    @merge_ext_fn
-    def f32_lt(a, b):
-        return float(a < b)
+    install_intrinsics(host.ivm.extrinsics)
 
     # io_read_byte is a split ext fn: takes IO token, returns (byte, io_continuation)
     def io_read_byte(io):
-        result = host.stdin.buffer.read(1)[:1]
-        if not result:
-            return 0xFFFFFFFF, 0
-        return int.from_bytes(result), 0
+        channel = host.input
+        if channel is None:  # reducing without execute or run_async
+            host.bind_channels()
+            channel = host.input
+        return channel.read_byte(), 0
 
     host.ivm.extrinsics.split_ext_fns["io_read_byte"] = io_read_byte
+    host.ivm.extrinsics.batched_ext_fns.update(BATCHED_NUMERIC)
 
     # Aliases for upstream compatibility
     host.ivm.extrinsics.ext_fns["io_print_char"] = io_print_byte
@@ -1,13 +1,19 @@
 import dataclasses
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from dataclasses import field
-from typing import Any, Callable
+from typing import Any, Callable, Iterable, Sequence
 
 from .heap import NilaryNodePort, BinaryNodePort, Wire
+from .labels import LABELS
 
 
 @dataclasses.dataclass
 class ExtVal(NilaryNodePort):
     """Lightweight wrapper for external values in the interaction net."""
+
+    __slots__ = ("value",)
+
     value: Any
 
     def fork(self) -> "NilaryNodePort":
@@ -24,27 +30,59 @@ PrimitiveExtValPort = ExtVal
 
 @dataclasses.dataclass
 class ExtFnPort(BinaryNodePort):
-    label: str
+    __slots__ = ()
+
+    label: int
     target: Wire
 
     @property
     def swapped(self) -> bool:
-        return self.label.endswith("$")
+        return bool(self.label & 1)
 
     def unwrap_label(self) -> str:
-        if self.swapped:
-            return self.label[:-1]
-        else:
-            return self.label
+        return LABELS.names[self.label >> 1]
 
     def swap(self) -> "ExtFnPort":
-        if self.swapped:
-            return dataclasses.replace(self, label=self.label[:-1])
-        else:
-            return dataclasses.replace(self, label=self.label + "$")
+        return ExtFnPort(self.target, self.label ^ 1)
 
 
 @dataclasses.dataclass
 class Extrinsics:
     ext_fns: dict[str, Callable] = field(default_factory=dict)
     split_ext_fns: dict[str, Callable] = field(default_factory=dict)
+    # Native operations by label id (label >> 1), applied without the generic
+    # call machinery; see ivm.intrinsics.
+    intrinsics: dict[int, Callable[[Any, Any], Any]] = field(default_factory=dict)
+    # Optional forms of ext_fns taking every lhs and every rhs of a batch of
+    # calls and returning their results in order; see IVM.batch_calls.
+    batched_ext_fns: dict[str, Callable[[Sequence, Sequence], Iterable]] = field(
+        default_factory=dict
+    )
+
+
+def settle_offloaded(
+    offloaded: dict[Future, tuple],
+    finished: "deque[Future]",
+    resume: Callable[[tuple, tuple], None],
+    block: bool,
+) -> int:
+    """Resumes the offloaded calls whose futures are done; returns how many.
+
+    offloaded maps each outstanding future to its call's outputs, and the
+    futures' done callbacks append them to finished. With block, and none
+    finished yet, this first waits for one of them.
+    """
+    if block and offloaded and not finished:
+        wait(offloaded, return_when=FIRST_COMPLETED)
+        # Done callbacks run after waiters are woken, so do not count on them.
+        finished.extend(future for future in offloaded if future.done())
+    resumed = 0
+    while finished:
+        future = finished.popleft()
+        outs = offloaded.pop(future, None)
+        if outs is None:
+            continue  # resumed already, before its callback ran
+        result = future.result()
+        resume(outs, result if len(outs) == 2 else (result,))
+        resumed += 1
+    return resumed
@@ -1,5 +1,5 @@
 import dataclasses
-from typing import Protocol, Iterator
+from typing import Any, Callable, Protocol, Iterator
 
 from .extrinsics import ExtFnPort
 from .heap import (
@@ -33,7 +33,7 @@ class Nilary(Instruction):
 @dataclasses.dataclass
 class Binary(Instruction):
     tag: str  # "Comb", "Branch", or "ExtFn"
-    label: str
+    label: int  # interned; see ivm.labels
     register0: int
     register1: int
     register2: int
@@ -85,22 +85,24 @@ class Instructions:
 @dataclasses.dataclass
 class Global:
     name: str
-    labels: tuple[set[str], dict[str, set[str]]] = dataclasses.field(
-        default_factory=lambda: (set(), {})
-    )
+    # Bitset of the comb labels of this global and of every global it can
+    # expand into; set for a whole program by ivm.serialize.close_labels.
+    labels: int = 0
     instructions: Instructions = dataclasses.field(default_factory=Instructions)
+    # Set by ivm.codegen.compile_globals; called as compiled(ivm, port) in place of execute.
+    compiled: Callable[[Any, Port], None] | None = dataclasses.field(
+        default=None, compare=False, repr=False
+    )
 
-    def contains_label(self, label: str) -> bool:
-        s, o = self.labels
-        return label in s or any(label in s_ for s_ in o.items())
-
-    def add_label(self, label: str) -> None:
-        self.labels[0].add(label)
+    def contains_label(self, label: int) -> bool:
+        return bool(self.labels >> label & 1)
 
-    def extend_labels(self, other: "Global"):
-        self.labels[1][other.name] = other.labels[0]
+    def add_label(self, label: int) -> None:
+        self.labels |= 1 << label
 
 
 @dataclasses.dataclass
 class GlobalPort(NilaryNodePort):
+    __slots__ = ("global_ref",)
+
     global_ref: Global
@@ -1,5 +1,5 @@
 import dataclasses
-from typing import Optional
+from typing import Optional, TypeVar
 
 
 class Wire:
@@ -26,6 +26,11 @@ class Wire:
         self.target = port
         return old
 
+    def finish(self) -> None:
+        """Empties a wire once both of its ends have met, so it no longer keeps
+        what passed through it alive."""
+        self.target = None
+
 
 def make_wire_pair() -> tuple[Wire, Wire]:
     left = Wire()
@@ -37,13 +42,21 @@ def make_wire_pair() -> tuple[Wire, Wire]:
 
 AuxPairWireReference = tuple[Wire, Wire]
 
+_BP = TypeVar("_BP", bound="BinaryNodePort")
+
 
 class Port:
+    # Ports are allocated for every node and wire end, so none of them carries a
+    # __dict__; subclasses must declare __slots__ too.
+    __slots__ = ()
+
     ERASE: "NilaryNodePort"
 
 
 @dataclasses.dataclass
 class NilaryNodePort(Port):
+    __slots__ = ()
+
     def fork(self) -> "NilaryNodePort":
         return self
 
@@ -53,7 +66,7 @@ class NilaryNodePort(Port):
 
 @dataclasses.dataclass
 class ErasePort(NilaryNodePort):
-    pass
+    __slots__ = ()
 
 
 Port.ERASE = ErasePort()
@@ -61,24 +74,37 @@ Port.ERASE = ErasePort()
 
 @dataclasses.dataclass
 class WirePort(NilaryNodePort):
+    __slots__ = ("wire",)
+
     wire: Wire
 
 
 @dataclasses.dataclass
 class BinaryNodePort(Port):
+    __slots__ = ("target", "label")
+
     target: Wire
-    label: str
+    # Interned; see ivm.labels.
+    label: int
 
     def aux(self) -> AuxPairWireReference:
         return self.target, self.target.other_half
 
+    def with_target(self: "_BP", target: Wire) -> "_BP":
+        """The same kind of node with the same label, over a different wire pair."""
+        return type(self)(target, self.label)
+
 
 @dataclasses.dataclass
 class CombPort(BinaryNodePort):
-    label: str
+    __slots__ = ()
+
+    label: int
     target: Wire
 
 
 @dataclasses.dataclass
 class BranchPort(BinaryNodePort):
+    __slots__ = ()
+
     target: Wire
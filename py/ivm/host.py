@@ -1,18 +1,47 @@
+import asyncio
 import dataclasses
+import functools
+import gc
+import multiprocessing
 import sys
-from typing import Any, Callable, TextIO
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from io import BytesIO, TextIOWrapper
+from typing import Any, Callable, Iterable, Iterator, TextIO
 
+from ivm import cache as program_cache
+from ivm.array_vm import ArrayIVM
+from ivm.channels import InputChannel, OutputChannel
+from ivm.codegen import compile_globals
 from ivm.extrinsics import ExtVal
 from ivm.globals import Global
+from ivm.labels import intern
+from ivm.parallel_vm import ParallelIVM
 from ivm.parser import IvyParser
+from ivm.prereduce import pre_reduce
 from ivm.readback import ExtrinsicsCache
-from ivm.serialize import insert_nets
+from ivm.serialize import inline_globals, insert_nets
 from ivm.vm import IVM
 
 
+class ParkedCalls(Exception):
+    """Extrinsics returned awaitables during Host.execute; run with Host.run_async."""
+
+
+# The Host and entry point that forked Host.map workers run their inputs on.
+_map_target: "tuple[Host, str] | None" = None
+
+
+def _map_one(value: Any) -> str:
+    assert _map_target is not None
+    host, global_name = _map_target
+    return host.run_captured(value, global_name)
+
+
 @dataclasses.dataclass
 class Host:
-    ivm: IVM = dataclasses.field(default_factory=lambda: IVM())
+    # Either engine; ArrayIVM trades Python objects for a flat integer heap.
+    ivm: IVM | ArrayIVM = dataclasses.field(default_factory=lambda: IVM())
     gs: dict[str, Global] = dataclasses.field(default_factory=dict)
     cache: ExtrinsicsCache = dataclasses.field(
         default_factory=lambda: ExtrinsicsCache()
@@ -20,28 +49,234 @@ class Host:
     stdout: TextIO = sys.stdout
     stderr: TextIO = sys.stderr
     stdin: TextIO = sys.stdin
+    # Read and write __ivmcache__ entries next to parsed files (see ivm.cache).
+    # Off by default: an entry is unpickled, so it must be as trusted as the
+    # code running it; the py-ivm runner turns it on.
+    program_cache: bool = False
+    compile_globals: bool = False
+    pre_reduce: bool = False
+    # Globals of at most this many instructions are spliced into their callers.
+    inline_threshold: int = 0
+    # When io_print_byte's buffered output is written out; see ivm.channels.
+    flush_policy: str = "explicit"
+    # Read stdin ahead on a background thread for io_read_byte.
+    prefetch_stdin: bool = False
+    # Runs the extrinsics added with blocking=True; a ThreadPoolExecutor,
+    # made on first use, if not given.
+    executor: Executor | None = None
 
-    def __post_init__(self):
+    def __post_init__(self) -> None:
         self.cache.install_into(self.ivm.extrinsics)
+        # What io_print_byte writes to and io_read_byte reads from; execute
+        # points them at the current streams and settings (see bind_channels)
+        # and flushes output at the end. The input channel is left until then,
+        # as stdin is often replaced after the Host is made.
+        self.output = OutputChannel(self.stdout, self.flush_policy)
+        self.input: InputChannel | None = None
+        # Parked calls that run_async has started, with their output wires.
+        self._awaiting: dict[asyncio.Future, tuple] = {}
+
+    def bind_channels(self) -> None:
+        """Points output and input at stdout and stdin, with the current settings."""
+        output = self.output
+        if output.stream is not self.stdout or output.policy != self.flush_policy:
+            output.flush()
+            self.output = OutputChannel(self.stdout, self.flush_policy)
+        # Whatever the old input channel had read ahead is left with it.
+        channel = self.input
+        if (
+            channel is None
+            or channel.stream is not self.stdin
+            or channel.prefetch != self.prefetch_stdin
+        ):
+            self.input = InputChannel(self.stdin, prefetch=self.prefetch_stdin)
+
+    def flush_output(self) -> None:
+        self.output.flush()
 
     def add_constant(self, val: Any) -> ExtVal:
         return self.cache.add_new_val(val)
 
-    def add_ext_fun(self, c: Callable) -> None:
-        self.ivm.extrinsics.ext_fns[c.__name__] = c
+    def add_ext_fun(self, c: Callable, blocking: bool = False) -> None:
+        """Adds c as the extrinsic of its name.
+
+        With blocking, c is called on executor, for functions that wait on I/O
+        or spend their time in code that releases the GIL (zlib, hashlib and
+        the like): reduction goes on meanwhile and the engine links c's result
+        in when it is done (see IVM.offloaded). Not for ParallelIVM, whose
+        calls are made in its worker processes.
+        """
+        self.ivm.extrinsics.ext_fns[c.__name__] = self._offload(c) if blocking else c
+        # A function registered by name replaces the intrinsic and the batched
+        # form of that name.
+        self.ivm.extrinsics.intrinsics.pop(intern(c.__name__) >> 1, None)
+        self.ivm.extrinsics.batched_ext_fns.pop(c.__name__, None)
+
+    def add_split_ext_fn(self, c: Callable, blocking: bool = False) -> None:
+        self.ivm.extrinsics.split_ext_fns[c.__name__] = (
+            self._offload(c) if blocking else c
+        )
+        self.ivm.extrinsics.batched_ext_fns.pop(c.__name__, None)
 
-    def add_split_ext_fn(self, c: Callable) -> None:
-        self.ivm.extrinsics.split_ext_fns[c.__name__] = c
+    def _offload(self, c: Callable) -> Callable[..., Future]:
+        @functools.wraps(c)
+        def submit(*args: Any) -> Future:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(thread_name_prefix="ivm-blocking")
+            return self.executor.submit(c, *args)
+
+        return submit
+
+    def add_batched_ext_fn(self, c: Callable) -> None:
+        self.ivm.extrinsics.batched_ext_fns[c.__name__] = c
 
     def parse_file(self, filename: str):
-        self.gs = insert_nets(self.ivm, IvyParser.from_file(filename).parse_nets())
+        """Loads filename, reusing its on-disk cache entry (see ivm.cache) when valid."""
+        with open(filename, "rb") as f:
+            source = f.read()
+        gs = program_cache.load(filename, source) if self.program_cache else None
+        if gs is None:
+            gs = insert_nets(
+                self.ivm, IvyParser.from_source(source.decode(), filename).parse_nets()
+            )
+            if self.program_cache:
+                program_cache.store(filename, source, gs)
+        if self.inline_threshold:
+            inline_globals(gs, self.inline_threshold)
+        if self.pre_reduce:
+            pre_reduce(gs)
+        if self.compile_globals:
+            compile_globals(gs)
+        self.gs = gs
 
     def boot(self, global_name: str, value: ExtVal) -> None:
         self.ivm.boot(self.gs[global_name], value)
 
     def execute(self) -> None:
-        for _ in self.ivm.normalize():
-            pass
+        self.bind_channels()
+        start = time.perf_counter()
+        try:
+            self.ivm.run()
+        finally:
+            self.flush_output()
+        if self.ivm.stats is not None:
+            self.ivm.stats.time += time.perf_counter() - start
+        if self.ivm.parked or self._awaiting:
+            raise ParkedCalls(
+                f"{len(self.ivm.parked) + len(self._awaiting)} extrinsic calls are "
+                "waiting on awaitables; use run_async"
+            )
+
+    async def run_async(
+        self, slice_interactions: int = 10_000, slice_seconds: float | None = None
+    ) -> None:
+        """Like execute, but yields to the event loop between slices of work.
+
+        A slice is slice_interactions interactions, or, with slice_seconds, as
+        many as fit in about that long (starting from slice_interactions and
+        adjusting after each slice). Slices end between interactions, so if the
+        task is cancelled the net is left intact and a later execute or
+        run_async picks up where this one stopped.
+
+        Calls to extrinsics that returned awaitables (see IVM.parked) are
+        started as tasks after each slice; reduction goes on around them, and
+        their results are linked in as they finish. When nothing else is left
+        to reduce, this waits for the first of them, or of the calls offloaded
+        to the executor. A cancelled run leaves them running, for the next
+        run_async to collect.
+
+        Not for ParallelIVM, which only reduces to normal form in one go.
+        """
+        if isinstance(self.ivm, ParallelIVM):
+            raise NotImplementedError("ParallelIVM cannot run in slices; use execute")
+        self.bind_channels()
+        budget = slice_interactions
+        stats = self.ivm.stats
+        parked, awaiting = self.ivm.parked, self._awaiting
+        offloaded = self.ivm.offloaded
+        try:
+            while True:
+                start = time.perf_counter()
+                left = self.ivm.step(budget)
+                elapsed = time.perf_counter() - start
+                if stats is not None:
+                    stats.time += elapsed
+                while parked:
+                    awaitable, wires = parked.pop()
+                    awaiting[asyncio.ensure_future(awaitable)] = wires
+                if left:
+                    if slice_seconds is not None:
+                        scale = slice_seconds / elapsed if elapsed else 2.0
+                        budget = max(1, int(budget * min(scale, 2.0)))
+                    await asyncio.sleep(0)
+                    done: Iterable[asyncio.Future] = [
+                        future for future in awaiting if future.done()
+                    ]
+                elif awaiting or offloaded:
+                    # The engine links offloaded results in itself, on the
+                    # next step; waiting on them here keeps the loop free.
+                    done, _ = await asyncio.wait(
+                        [*awaiting, *map(asyncio.wrap_future, offloaded)],
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                else:
+                    return
+                for future in done:
+                    if (outs := awaiting.pop(future, None)) is None:
+                        continue
+                    result = future.result()
+                    self.ivm.resume(outs, result if len(outs) == 2 else (result,))
+        finally:
+            self.flush_output()
+
+    def run_captured(self, value: Any, global_name: str = "::main") -> str:
+        """Boots global_name with value and executes it, returning what it wrote to stdout."""
+        stdout, stdin = self.stdout, self.stdin
+        # Restored afterwards, with any input they have read ahead.
+        channels = self.output, self.input
+        self.stdout, self.stdin = TextIOWrapper(BytesIO()), TextIOWrapper(BytesIO())
+        try:
+            self.boot(global_name, ExtVal(value))
+            self.execute()
+            self.stdout.flush()
+            return self.stdout.buffer.getvalue().decode()
+        finally:
+            self.stdout, self.stdin = stdout, stdin
+            self.output, self.input = channels
+
+    def map(
+        self,
+        inputs: Iterable[Any],
+        processes: int | None = None,
+        global_name: str = "::main",
+        chunksize: int = 16,
+    ) -> Iterator[str]:
+        """Runs the loaded program once per input, yielding each run's stdout in input order.
+
+        Only stdout comes back: a booted global is linked to its input alone
+        (see boot), so a run has no result to read back, and the workers' stats
+        stay in the workers. Call after parse_file. Workers are forked from this process, so they
+        inherit the loaded globals instead of parsing again; the GC is frozen
+        across the fork so that collections in the workers do not touch (and
+        so copy) the inherited pages. processes defaults to the CPU count;
+        processes=1 runs the inputs here, one after another.
+        """
+        global _map_target
+        if processes == 1:
+            for value in inputs:
+                yield self.run_captured(value, global_name)
+            return
+        _map_target = (self, global_name)
+        try:
+            gc.freeze()
+            try:
+                pool = multiprocessing.get_context("fork").Pool(processes)
+            finally:
+                gc.unfreeze()
+            with pool:
+                yield from pool.imap(_map_one, inputs, chunksize)
+        finally:
+            _map_target = None
 
     def run(self, filename: str, value: Any = 0, global_name: str = "::main") -> None:
         """Parse, boot, and execute an .iv file in one call."""
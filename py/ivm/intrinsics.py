@@ -0,0 +1,83 @@
+"""The standard numeric extrinsics as native operations with fixed-width semantics.
+
+n32 values are unsigned 32-bit: results wrap modulo 2**32 and comparisons give
+0 or 1. f32 values are Python floats rounded to the nearest single-precision
+value after every operation, with IEEE results for division by zero; their
+comparisons give 0.0 or 1.0. Dividing an n32 by zero raises ZeroDivisionError.
+
+install_intrinsics puts these in Extrinsics.intrinsics under their interned
+label ids, so engines resolve a call by the label they already hold rather
+than by name, and apply the operation directly (see IVM.call). They are also
+registered as plain ext_fns, for code that looks extrinsics up by name.
+"""
+
+import math
+import operator
+import struct
+from typing import Any, Callable
+
+from .extrinsics import Extrinsics
+from .labels import intern
+
+Intrinsic = Callable[[Any, Any], Any]
+
+N32_MASK = 0xFFFFFFFF
+
+_F32 = struct.Struct("f")
+
+
+def f32(x: float) -> float:
+    """x rounded to single precision; out-of-range values become infinities."""
+    return _F32.unpack(_F32.pack(x))[0]
+
+
+def _n32(op: Callable[[int, int], int]) -> Intrinsic:
+    return lambda a, b: op(a, b) & N32_MASK
+
+
+def _f32(op: Callable[[float, float], float]) -> Intrinsic:
+    return lambda a, b: f32(op(a, b))
+
+
+def _f32_div(a: float, b: float) -> float:
+    try:
+        return f32(a / b)
+    except ZeroDivisionError:
+        if a == 0 or math.isnan(a):
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+def _f32_rem(a: float, b: float) -> float:
+    # Like C's fmod, the sign follows the dividend.
+    try:
+        return f32(math.fmod(a, b))
+    except ValueError:
+        return math.nan
+
+
+INTRINSICS: dict[str, Intrinsic] = {
+    "n32_add": _n32(operator.add),
+    "n32_sub": _n32(operator.sub),
+    "n32_mul": _n32(operator.mul),
+    "n32_div": operator.floordiv,
+    "n32_rem": operator.mod,
+    "n32_eq": lambda a, b: int(a == b),
+    "n32_ne": lambda a, b: int(a != b),
+    "n32_lt": lambda a, b: int(a < b),
+    "f32_add": _f32(operator.add),
+    "f32_sub": _f32(operator.sub),
+    "f32_mul": _f32(operator.mul),
+    "f32_div": _f32_div,
+    "f32_rem": _f32_rem,
+    "f32_eq": lambda a, b: float(a == b),
+    "f32_ne": lambda a, b: float(a != b),
+    "f32_lt": lambda a, b: float(a < b),
+}
+
+
+def install_intrinsics(extrinsics: Extrinsics) -> None:
+    """Registers every intrinsic on an Extrinsics, by label id and by name."""
+    for name, op in INTRINSICS.items():
+        extrinsics.intrinsics[intern(name) >> 1] = op
+        extrinsics.ext_fns[name] = op
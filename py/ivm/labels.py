@@ -0,0 +1,48 @@
+"""Combinator and extrinsic labels, interned to small ints for the whole process.
+
+A label is stored as ``id << 1 | swapped``: id indexes LabelTable.names, and
+swapped marks the ``$`` form of an extrinsic function, the one taking its
+arguments in the other order. Equal strings give equal ints, so engines
+compare labels with ==, swap an extrinsic with ``label ^ 1`` and look up its
+function by ``names[label >> 1]``. The serializer interns labels as it builds
+instructions; Reader and the program cache map them back to strings.
+
+Ids are only meaningful within one process (and the processes it forks), so
+nothing that outlives it may store them.
+"""
+
+
+class LabelTable:
+    __slots__ = ("names", "_ids")
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def intern(self, label: str) -> int:
+        swapped = label.endswith("$")
+        name = label[:-1] if swapped else label
+        if (i := self._ids.get(name)) is None:
+            i = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return i << 1 | swapped
+
+    def name(self, label: int) -> str:
+        name = self.names[label >> 1]
+        return name + "$" if label & 1 else name
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+LABELS = LabelTable()
+# Branch nodes carry the empty label; ArrayIVM relies on it being 0.
+BRANCH_LABEL = LABELS.intern("")
+
+
+def intern(label: str) -> int:
+    return LABELS.intern(label)
+
+
+def label_name(label: int) -> str:
+    return LABELS.name(label)
@@ -1,4 +1,5 @@
 import regex as re
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from typing import Iterator
 
@@ -46,9 +47,12 @@ open_comment = top_level.add_token(r"/\*")
     ident_,
     other,
 ) = top_level.add_tokens(
-    "\(|\)|\{|}|\[|]|@|\$|\=|_|\?|#|\d[\d\w]*|[+-][\d\w.\+\-]+|(?:::\p{ID_Continue}+)+|\p{ID_Start}\p{ID_Continue}*|."
+    r"\(|\)|\{|}|\[|]|@|\$|\=|_|\?|#|\d[\d\w]*|[+-][\d\w.\+\-]+|(?:::\p{ID_Continue}+)+|\p{ID_Start}\p{ID_Continue}*|."
 )
 p = top_level.compile()
+# The same alternation, but swallowing any leading whitespace and line comments so
+# that most tokens take a single match. Group numbering is unchanged.
+p_skipping = re.compile(r"(?:[ \t\r\n\f]+|//.*)*(?:" + p.pattern + ")")
 
 in_comment = TokenFactory()
 in_open_comment, in_close_comment = in_comment.add_tokens(r"/\*|\*/")
@@ -59,69 +63,106 @@ class SyntaxError(Exception):
     pass
 
 
+_skips = frozenset(skips)
+
+
 @dataclass
 class Lexer:
-    lines: list[str]
-    position: tuple[int, tuple[int, int]] = (0, (0, 0))
+    lines: list[str] = field(default_factory=list)
+    source: str = ""
+    span: tuple[int, int] = (0, 0)
+    _last: "re.Match[str] | None" = field(default=None, repr=False)
+    _line_starts: list[int] | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.lines and not self.source:
+            self.source = "\n".join(line.rstrip("\r\n") for line in self.lines)
+
+    @classmethod
+    def from_source(cls, source: str) -> "Lexer":
+        return cls(source=source)
+
+    @property
+    def position(self) -> tuple[int, tuple[int, int]]:
+        """(line index, (start column, end column)) of the last token, computed on demand."""
+        if self._line_starts is None:
+            self._line_starts = [0]
+            self._line_starts.extend(
+                m.end() for m in re.finditer("\n", self.source)
+            )
+        start, end = self.last_span()
+        ln = bisect_right(self._line_starts, start) - 1
+        line_start = self._line_starts[ln]
+        return ln, (start - line_start, end - line_start)
+
+    def last_span(self) -> tuple[int, int]:
+        if self._last is not None:
+            group = self._last.lastindex
+            assert group is not None  # every alternative is a group
+            self.span = self._last.span(group)
+            self._last = None
+        return self.span
 
     def take_source(
         self,
         start_pos: tuple[int, tuple[int, int]],
         end_pos: tuple[int, tuple[int, int]],
     ) -> list[str]:
+        lines = self.source.splitlines()
         return [
-            self.lines[line_idx][
+            lines[line_idx][
                 (0 if line_idx != start_pos[0] else start_pos[1][0]) : (
-                    -1 if line_idx != end_pos[0] else end_pos[1][1]
+                    None if line_idx != end_pos[0] else end_pos[1][1]
                 )
             ]
             for line_idx in range(start_pos[0], end_pos[0])
         ]
 
+    def skip_comment(self, start: int) -> int:
+        """Returns the offset just past the comment opened at start, honoring nesting."""
+        depth = 1
+        for match in p_in_comment.finditer(self.source, start + 2):
+            group = match.lastindex
+            assert group is not None
+            if group - 1 == in_open_comment:
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        self._last = None
+        self.span = (start, start + 2)
+        raise SyntaxError(
+            f"Could not find terminating close comment, starting from line {self.position[0] + 1}"
+        )
+
     def tokenize(self) -> Iterator[tuple[int, str]]:
-        ln = self.position[0]
-        while ln < len(self.lines):
-            line = self.lines[ln]
-            i = p.finditer(line, pos=self.position[1][1])
-            for match in i:
-                group_match, token = next(
-                    (i, a) for i, a in enumerate(match.groups()) if a is not None
-                )
-                if group_match == open_comment:
-                    depth = 1
-                    start_ln = ln
-                    while depth > 0 and ln < len(self.lines):
-                        for match in p_in_comment.finditer(line, match.end()):
-                            group_match, token = next(
-                                (i, a)
-                                for i, a in enumerate(match.groups())
-                                if a is not None
-                            )
-                            self.position = (ln, match.span())
-                            if group_match == in_open_comment:
-                                depth += 1
-                            elif group_match == in_close_comment:
-                                depth -= 1
-                            if depth == 0:
-                                break
-                        if depth > 0:
-                            ln += 1
-                    if depth > 0:
-                        raise SyntaxError(
-                            f"Could not find terminating close comment, starting from line {start_ln + 1}"
-                        )
-                    break
-                elif group_match in skips:
+        """Scans the source once, resuming from the end of the last token yielded.
+
+        Callers should hold on to a single iterator; each match is classified by
+        its lastindex rather than by searching the groups.
+        """
+        source = self.source
+        pos = self.last_span()[1]
+        while True:
+            for match in p_skipping.finditer(source, pos):
+                group = match.lastindex
+                assert group is not None
+                kind = group - 1
+                if kind in _skips:
                     continue
-                elif group_match == other:
+                if kind == open_comment:
+                    pos = self.skip_comment(match.start(group))
+                    break
+                self._last = match
+                if kind == other:
+                    ln, span = self.position
                     raise SyntaxError(
-                        f"Unexpected token {token} on line {ln + 1} position {match.span()} {len(top_level.tokens)} {len(match.groups())}"
+                        f"Unexpected token {match[group]} on line {ln + 1} position {span}"
                     )
-                else:
-                    self.position = (ln, match.span())
-                    yield group_match, token
+                yield kind, match[group]
             else:
-                self.position = ((ln := ln + 1), (0, 0))
+                return
 
 
 def test_tokenize():
@@ -0,0 +1,292 @@
+"""An engine that reduces one net with several processes over shared memory.
+
+ParallelIVM keeps ArrayIVM's port words and interaction rules, but its heap
+lives in multiprocessing.shared_memory and run() forks worker processes that
+reduce it together:
+
+* ExtVal numbers are stored in the port word itself, since Python objects
+  cannot be shared: ints of up to VALUE_BITS bits, and floats rounded to f32.
+  Any other value raises TypeError.
+* Each wire slot is claimed under one of ``stripes`` locks, picked by the node
+  the slot belongs to. link_wire and follow therefore keep Wire.swap_target's
+  contract: of the two ends that meet in a slot, exactly one stores and the
+  other takes.
+* A worker reduces from its own queues. Every SHARE_EVERY interactions, if its
+  share buffer is empty, it moves the oldest half of its queue there. An idle
+  worker steals half of some other worker's buffer (or all of its own).
+* A worker's active flag is set before it steals and cleared only once its
+  queues are empty. The net is normal when two scans in a row see no active
+  worker, no shared pairs and no new steals.
+
+Limits. Python has no atomic compare-and-swap, so every slot access takes a
+lock, and a worker is much slower than ArrayIVM on one core. Extrinsics run in
+whichever worker reduces the call: effects on the host process (an in-memory
+stdout, say) are lost, and buffered output from different workers may
+interleave. Globals must be loaded before the fork; run() loads everything
+reachable from the queued pairs. Slots freed during a run are
+reused only by the worker that freed them, within that run. stats, step and
+normalize are not supported.
+"""
+
+import dataclasses
+import gc
+import multiprocessing
+import os
+import struct
+import time
+import weakref
+from array import array
+from multiprocessing import shared_memory
+from typing import Any, Generator
+
+from .array_vm import ArrayIVM, EXT_VAL, EMPTY, TAG_BITS, TAG_MASK, WIRE
+
+_FLOAT = 1 << TAG_BITS
+_VALUE_SHIFT = TAG_BITS + 1
+VALUE_BITS = 64 - _VALUE_SHIFT
+_VALUE_LIMIT = 1 << (VALUE_BITS - 1)
+
+# Interactions between a worker's checks of its share buffer.
+SHARE_EVERY = 64
+# Pairs a share buffer holds.
+SHARE_CAPACITY = 1024
+# Seconds an idle worker waits before looking for work again.
+IDLE_WAIT = 0.0002
+
+
+class WorkerFailed(Exception):
+    pass
+
+
+def _release(
+    owner: int, views: list[memoryview], shms: list[shared_memory.SharedMemory]
+) -> None:
+    # A forked worker's GC may collect an engine it inherited; only the
+    # process that created the segments releases them.
+    if os.getpid() != owner:
+        return
+    for view in views:
+        view.release()
+    for shm in shms:
+        shm.close()
+        shm.unlink()
+
+
+@dataclasses.dataclass
+class ParallelIVM(ArrayIVM):
+    workers: int = 2
+    heap_slots: int = 1 << 20
+    stripes: int = 256
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        if self.stats is not None:
+            raise NotImplementedError("ParallelIVM does not collect stats")
+        if self.eager_erase:
+            raise NotImplementedError("ParallelIVM does not erase eagerly")
+        w = self.workers
+        # Control block: per-worker active flags, share counts, steal counts
+        # and region tops, an abort flag, then the share buffers.
+        self._active = 0
+        self._count = w
+        self._steals = 2 * w
+        self._tops = 3 * w
+        self._abort = 4 * w
+        self._buffers = 4 * w + 1
+        heap = shared_memory.SharedMemory(create=True, size=8 * self.heap_slots)
+        control = shared_memory.SharedMemory(
+            create=True, size=8 * (self._buffers + w * SHARE_CAPACITY * 2)
+        )
+        assert heap.buf is not None and control.buf is not None
+        views = [heap.buf.cast("q"), control.buf.cast("q")]
+        self.heap, self._control = views
+        weakref.finalize(self, _release, os.getpid(), views, [heap, control])
+
+        # Worker i allocates from region i; this process uses the last one.
+        region = (self.heap_slots - 2) // (w + 1) & ~1
+        self._regions = [(2 + i * region, 2 + (i + 1) * region) for i in range(w + 1)]
+        for i, (start, _) in enumerate(self._regions[:w]):
+            self._control[self._tops + i] = start
+        self.top, self._end = self._regions[w]
+
+        context = multiprocessing.get_context("fork")
+        self._locks = [context.Lock() for _ in range(self.stripes)]
+        self._share_locks = [context.Lock() for _ in range(w)]
+
+    # Allocation and values
+
+    def alloc_node(self) -> int:
+        if self.free:
+            return self.free.pop()
+        slot = self.top
+        if slot == self._end:
+            raise MemoryError("ParallelIVM heap region is full; raise heap_slots")
+        self.top = slot + 2
+        return slot
+
+    def free_slot(self, slot: int) -> None:
+        with self._locks[(slot >> 1) % self.stripes]:
+            ArrayIVM.free_slot(self, slot)
+
+    def new_value(self, value: Any) -> int:
+        if isinstance(value, float):
+            (bits,) = struct.unpack("<I", struct.pack("<f", value))
+            return bits << _VALUE_SHIFT | _FLOAT | EXT_VAL
+        if isinstance(value, int) and -_VALUE_LIMIT <= value < _VALUE_LIMIT:
+            return value << _VALUE_SHIFT | EXT_VAL
+        raise TypeError(
+            f"ParallelIVM holds only floats and ints of up to {VALUE_BITS} bits, not {value!r}"
+        )
+
+    def take_value(self, word: int) -> Any:
+        if word & _FLOAT:
+            return struct.unpack("<f", struct.pack("<I", word >> _VALUE_SHIFT))[0]
+        return word >> _VALUE_SHIFT
+
+    def fork(self, a: int) -> int:
+        return a
+
+    def live_nodes(self) -> int:
+        raise NotImplementedError("ParallelIVM does not track live nodes")
+
+    # Wires
+
+    def follow(self, a: int) -> int:
+        heap, locks, stripes = self.heap, self._locks, self.stripes
+        while a & TAG_MASK == WIRE:
+            slot = a >> TAG_BITS
+            with locks[(slot >> 1) % stripes]:
+                target = heap[slot]
+                if target == EMPTY:
+                    break
+                ArrayIVM.free_slot(self, slot)
+            a = target
+        return a
+
+    def link_wire(self, slot: int, b: int) -> None:
+        b = self.follow(b)
+        heap = self.heap
+        with self._locks[(slot >> 1) % self.stripes]:
+            c = heap[slot]
+            if c == EMPTY:
+                heap[slot] = b
+                return
+            ArrayIVM.free_slot(self, slot)
+        self.link(c, b)
+
+    # Reduction
+
+    def step(self, max_interactions: int) -> int:
+        raise NotImplementedError("ParallelIVM only reduces to normal form with run()")
+
+    def normalize(self) -> Generator[None, None, None]:
+        raise NotImplementedError("ParallelIVM only reduces to normal form with run()")
+
+    def run(self) -> None:
+        """Reduces the queued pairs to normal form across the worker processes."""
+        pairs = self.active_fast + self.active_slow
+        self.active_fast.clear()
+        self.active_slow.clear()
+        if not pairs:
+            return
+        control = self._control
+        for i in range(self.workers):
+            control[self._active + i] = control[self._count + i] = 0
+        control[self._abort] = 0
+
+        # Seed the workers round-robin, by pairs.
+        seeds: list[list[int]] = [[] for _ in range(self.workers)]
+        for n in range(0, len(pairs), 2):
+            seeds[n // 2 % self.workers] += pairs[n : n + 2]
+        for i, seed in enumerate(seeds):
+            control[self._active + i] = int(bool(seed))
+
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=self._work, args=(i, seeds[i]), daemon=True)
+            for i in range(self.workers)
+        ]
+        gc.freeze()
+        try:
+            for process in processes:
+                process.start()
+        finally:
+            gc.unfreeze()
+        for process in processes:
+            process.join()
+        failed = [i for i, p in enumerate(processes) if p.exitcode != 0]
+        if failed or control[self._abort]:
+            raise WorkerFailed(f"ParallelIVM workers {failed} failed")
+
+    def _work(self, me: int, seed: list[int]) -> None:
+        control = self._control
+        try:
+            self.top = control[self._tops + me]
+            self._end = self._regions[me][1]
+            self.free = []
+            fast: list[int] = []
+            slow = list(seed)
+            self.active_fast, self.active_slow = fast, slow
+            rules = self._interact_rules
+            while True:
+                n = 0
+                while fast or slow:
+                    queue = fast if fast else slow
+                    b = queue.pop()
+                    a = queue.pop()
+                    rules[(a & TAG_MASK) << TAG_BITS | b & TAG_MASK](a, b)
+                    n += 1
+                    if n % SHARE_EVERY == 0 and not control[self._count + me]:
+                        self._share(me)
+                control[self._active + me] = 0
+                if self._steal(me):
+                    continue
+                if control[self._abort] or self._finished():
+                    break
+                time.sleep(IDLE_WAIT)
+            control[self._tops + me] = self.top
+        except BaseException:
+            control[self._abort] = 1
+            raise
+
+    def _share(self, me: int) -> None:
+        """Moves the oldest half of this worker's queue, up to SHARE_CAPACITY pairs, to its buffer."""
+        queue = self.active_slow if len(self.active_slow) >= 4 else self.active_fast
+        pairs = min(len(queue) // 4, SHARE_CAPACITY)
+        if not pairs:
+            return
+        words = queue[: 2 * pairs]
+        del queue[: 2 * pairs]
+        base = self._buffers + me * SHARE_CAPACITY * 2
+        with self._share_locks[me]:
+            self._control[base : base + 2 * pairs] = array("q", words)
+            self._control[self._count + me] = pairs
+
+    def _steal(self, me: int) -> bool:
+        """Takes pairs from the first non-empty buffer, starting with this worker's own."""
+        control = self._control
+        control[self._active + me] = 1
+        for k in range(self.workers):
+            victim = (me + k) % self.workers
+            if not control[self._count + victim]:
+                continue
+            with self._share_locks[victim]:
+                n = control[self._count + victim]
+                take = n if victim == me else (n + 1) // 2
+                if not take:
+                    continue
+                base = self._buffers + victim * SHARE_CAPACITY * 2
+                words = control[base + 2 * (n - take) : base + 2 * n].tolist()
+                control[self._count + victim] = n - take
+                control[self._steals + me] += 1
+            self.active_slow.extend(words)
+            return True
+        control[self._active + me] = 0
+        return False
+
+    def _finished(self) -> bool:
+        control, start, end = self._control, self._active, self._tops
+        first = control[start:end].tolist()
+        if any(first[: self._steals - start]):
+            return False
+        return control[start:end].tolist() == first
@@ -1,6 +1,7 @@
 from collections import OrderedDict
-from dataclasses import dataclass
-from typing import overload, Literal
+from dataclasses import dataclass, field
+from functools import partial
+from typing import overload, Callable, Iterator, Literal
 
 from .tree import (
     Net,
@@ -50,21 +51,15 @@ class IvyParserState:
     lexer: Lexer
     source_file: str
     last_token: tuple[int, str] | None = None
+    tokens: Iterator[tuple[int, str]] = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
+        self.tokens = self.lexer.tokenize()
         self.bump()
 
     def bump(self) -> bool:
-        try:
-            (
-                k,
-                t,
-            ) = next(self.lexer.tokenize())
-            self.last_token = (k, t)
-        except StopIteration:
-            self.last_token = None
-            return False
-        return True
+        self.last_token = next(self.tokens, None)
+        return self.last_token is not None
 
     def expect(self, token_type: int) -> str:
         if not self.last_token:
@@ -102,12 +97,16 @@ class IvyParser:
     @classmethod
     def from_file(cls, filename: str) -> "IvyParser":
         with open(filename, "r") as f:
-            return IvyParser(
-                IvyParserState(
-                    lexer=Lexer(f.readlines()),
-                    source_file=filename,
-                ),
-            )
+            return cls.from_source(f.read(), filename)
+
+    @classmethod
+    def from_source(cls, source: str, source_file: str) -> "IvyParser":
+        return IvyParser(
+            IvyParserState(
+                lexer=Lexer.from_source(source),
+                source_file=source_file,
+            ),
+        )
 
     def parse_u32_like(self, token: str) -> int:
         if token.startswith("0b"):
@@ -167,48 +166,70 @@ class IvyParser:
         return a, b
 
     def parse_tree(self) -> Tree:
-        if self.state.check(n32):
-            return N32Node(self.parse_u32_like(self.state.eat(n32, require=True)))
-        elif self.state.check(f32):
-            return F32Node(self.parse_f32_like(self.state.eat(f32, require=True)))
-        elif self.state.check(global_):
-            return GlobalNode(self.state.eat(global_, require=True))
-        elif self.state.check(ident_):
-            ident = self.state.eat(ident_, require=True)
-            if self.state.eat(open_paren, require=False):
-                a = self.parse_tree()
-                b = self.parse_tree()
-                self.state.eat(close_paren, require=True)
-                return CombNode(ident, a, b)
+        """Parses one tree without recursing, so nesting depth is bounded only by memory.
+
+        Each open node is a frame on an explicit stack holding its constructor, its
+        arity, the token that closes it, and the children parsed so far.
+        """
+        state = self.state
+        bump = state.bump
+        stack: list[tuple[Callable[..., Tree], int, int, list[Tree]]] = []
+        while True:
+            token = state.last_token
+            if token is None:
+                raise SyntaxError("Unexpected end of input", state.lexer.position)
+            kind, text = token
+            tree: Tree
+            if kind == ident_:
+                bump()
+                if state.check(open_paren):
+                    bump()
+                    stack.append((partial(CombNode, text), 2, close_paren, []))
+                    continue
+                tree = VarNode(text)
+            elif kind == global_:
+                bump()
+                tree = GlobalNode(text)
+            elif kind == n32:
+                bump()
+                tree = N32Node(self.parse_u32_like(text))
+            elif kind == f32:
+                bump()
+                tree = F32Node(self.parse_f32_like(text))
+            elif kind == hole:
+                bump()
+                tree = Erase()
+            elif kind == at:
+                bump()
+                ident = state.eat(ident_, require=True)
+                swapped = state.eat(dollar, require=False) is not None
+                state.eat(open_paren, require=True)
+                label = ident + ("$" if swapped else "")
+                stack.append((partial(ExtFnNode, label), 2, close_paren, []))
+                continue
+            elif kind == question:
+                bump()
+                state.eat(open_paren, require=True)
+                stack.append((BranchNode, 3, close_paren, []))
+                continue
+            elif kind == hash_:
+                bump()
+                state.eat(open_bracket, require=True)
+                stack.append((BlackBox, 1, close_bracket, []))
+                continue
             else:
-                return VarNode(ident)
-
-        if self.state.eat(at, require=False):
-            ident = self.state.eat(ident_, require=True)
-            swapped = self.state.eat(dollar, require=False) is not None
-            self.state.eat(open_paren, require=True)
-            a = self.parse_tree()
-            b = self.parse_tree()
-            self.state.eat(close_paren, require=True)
-            return ExtFnNode(ident + ("$" if swapped else ""), a, b)
-
-        if self.state.eat(question, require=False):
-            self.state.eat(open_paren, require=True)
-            a = self.parse_tree()
-            b = self.parse_tree()
-            c = self.parse_tree()
-            self.state.eat(close_paren, require=True)
-            return BranchNode(a, b, c)
-
-        if self.state.eat(hole, require=False):
-            return Erase()
-
-        if self.state.eat(hash_, require=False):
-            self.state.eat(open_bracket, require=True)
-            inner = self.parse_tree()
-            self.state.eat(close_bracket, require=True)
-            return BlackBox(inner)
-
-        raise SyntaxError(
-            f"Unexpected token {self.state.last_token}", self.state.lexer.position
-        )
+                raise SyntaxError(f"Unexpected token {token}", state.lexer.position)
+
+            # tree is complete; attach it to the open frames, closing any that fill up.
+            while stack:
+                build, arity, closer, children = stack[-1]
+                children.append(tree)
+                if len(children) < arity:
+                    break
+                if not state.check(closer):
+                    state.expect(closer)
+                bump()
+                stack.pop()
+                tree = build(*children)
+            else:
+                return tree
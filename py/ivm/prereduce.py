@@ -0,0 +1,99 @@
+"""Load-time reduction of each global's net, like ivy's pre-reduce step.
+
+Every expansion of a global replays its instructions, including any active
+pairs inside its body, which the VM then reduces again. pre_reduce normalizes
+each global's net once, in isolation, and stores the result back as the
+global's instructions. References to globals (including copies of them) and
+extrinsic calls stay opaque: those pairs are held back and kept in the reduced
+net as pairs for the VM to reduce at runtime.
+
+A global is left as it was if it contains Inert instructions, if nothing in it
+reduces, if reduction does not finish within the interaction budget, or if
+the reduced net needs more instructions than the original.
+"""
+
+from .globals import Binary, Global, GlobalPort, Inert, Instructions
+from .heap import BranchPort, CombPort, Port, WirePort, make_wire_pair
+from .extrinsics import ExtFnPort, ExtValPort
+from .labels import intern
+from .readback import Reader
+from .serialize import close_labels, net_instructions
+from .stats import Stats
+from .tree import Net
+from .vm import INTERACT_RULES, IVM
+
+DEFAULT_BUDGET = 10_000
+# Reader writes a branch whose first aux no longer holds a branch as a "?^"
+# comb, which is not something the VM can run.
+_UNREADABLE_BRANCH = intern("?^")
+
+
+class _PreReducer(IVM):
+    """Reduces everything except expansions and extrinsic calls, which it holds back."""
+
+    interact_rules = INTERACT_RULES.copy()
+    interact_rules.register(GlobalPort, ExtFnPort, "hold")
+    interact_rules.register(GlobalPort, BranchPort, "hold")
+    interact_rules.register(GlobalPort, ExtValPort, "hold")
+    interact_rules.register(ExtFnPort, ExtValPort, "hold")
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self.held: list[tuple[Port, Port]] = []
+
+    def hold(self, a: Port, b: Port) -> None:
+        self.held.append((a, b))
+
+    def copy_or_expand(self, a: GlobalPort, b: CombPort) -> None:
+        if a.global_ref.contains_label(b.label):
+            self.hold(a, b)
+        else:
+            self.copy(a, b)
+
+
+def reduced_instructions(
+    g: Global, gs: dict[str, Global], budget: int = DEFAULT_BUDGET
+) -> Instructions | None:
+    """g's net reduced as far as it goes in isolation, or None to keep g as it is."""
+    if any(isinstance(instruction, Inert) for instruction in g.instructions):
+        return None
+    stats = Stats()
+    ivm = _PreReducer(stats=stats)
+    root = make_wire_pair()[0]
+    ivm.execute(g.instructions, WirePort(wire=root))
+    # Holding back is not counted, so stats only sees real reductions.
+    if ivm.step(budget) or not stats.total:
+        return None
+    reader = Reader(ivm)
+    net = Net(
+        reader.read_port(WirePort(wire=root), shallow=False),
+        tuple(
+            (reader.read_port(a, shallow=False), reader.read_port(b, shallow=False))
+            # serialize emits pairs last to first; keep them in the order they
+            # were held.
+            for a, b in reversed(ivm.held)
+        ),
+    )
+    instructions = net_instructions(net, gs)
+    if len(instructions.instructions) > len(g.instructions.instructions):
+        return None
+    if any(
+        isinstance(instruction, Binary) and instruction.label == _UNREADABLE_BRANCH
+        for instruction in instructions
+    ):
+        return None
+    return instructions
+
+
+def pre_reduce(gs: dict[str, Global], budget: int = DEFAULT_BUDGET) -> int:
+    """Pre-reduces every global in gs in place; returns how many changed."""
+    reduced = {
+        name: instructions
+        for name, g in gs.items()
+        if (instructions := reduced_instructions(g, gs, budget)) is not None
+    }
+    for name, instructions in reduced.items():
+        gs[name].instructions = instructions
+        gs[name].compiled = None
+    close_labels(gs)
+    return len(reduced)
@@ -4,6 +4,7 @@ from typing import Any
 
 from .extrinsics import ExtVal, ExtFnPort, Extrinsics
 from .globals import GlobalPort
+from .labels import label_name
 from .heap import Port, WirePort, ErasePort, BranchPort, Wire, CombPort
 from .tree import (
     Tree,
@@ -84,10 +85,10 @@ class Reader:
             return N32Node(p.value)
         elif isinstance(p, CombPort):
             p1, p2 = p.aux()
-            return CombNode(p.label, self.read_wire(p1, shallow), self.read_wire(p2, shallow))
+            return CombNode(label_name(p.label), self.read_wire(p1, shallow), self.read_wire(p2, shallow))
         elif isinstance(p, ExtFnPort):
             p1, p2 = p.aux()
-            return ExtFnNode(p.label, self.read_wire(p1, shallow), self.read_wire(p2, shallow))
+            return ExtFnNode(label_name(p.label), self.read_wire(p1, shallow), self.read_wire(p2, shallow))
         elif isinstance(p, BranchPort):
             p1, p2 = p.aux()
             bp = self.ivm.follow(WirePort(wire=p1), destructive=False)
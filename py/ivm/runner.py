@@ -3,9 +3,29 @@ import sys
 import os.path
 import argparse
 
+from ivm.array_vm import ArrayIVM
+from ivm.channels import FLUSH_POLICIES
 from ivm.compat import add_std_compat
 from ivm.extrinsics import PrimitiveExtValPort
 from ivm.host import Host
+from ivm.stats import Stats
+from ivm.threaded_vm import ThreadedIVM
+from ivm.vm import IVM
+
+
+def _read_inputs(path: str) -> list[int | float]:
+    if path == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(path) as f:
+            lines = f.readlines()
+    inputs: list[int | float] = []
+    for line in filter(str.strip, lines):
+        try:
+            inputs.append(int(line))
+        except ValueError:
+            inputs.append(float(line))
+    return inputs
 
 
 def main():
@@ -16,9 +36,113 @@ def main():
         dest="extensions",
         help="python.module.path:function_name to run on the Host object before execution",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="neither read nor write the __ivmcache__ entry for the iv file",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="compile each global's instructions to a Python function before running",
+    )
+    parser.add_argument(
+        "--pre-reduce",
+        action="store_true",
+        help="reduce each global's net in isolation at load time",
+    )
+    parser.add_argument(
+        "--inline",
+        type=int,
+        default=0,
+        metavar="N",
+        help="splice non-recursive globals of at most N instructions into their callers",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["object", "array", "threaded"],
+        default="object",
+        help="object: a graph of Python objects (default); array: a flat integer heap; "
+        "threaded: the object engine on several threads (free-threaded builds only)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="worker threads for --engine threaded (default: CPU count)",
+    )
+    parser.add_argument(
+        "--eager-erase",
+        action="store_true",
+        help="erase a dropped subnet in one sweep instead of one queued interaction per node "
+        "(object and array engines)",
+    )
+    parser.add_argument(
+        "--batch-calls",
+        type=int,
+        default=0,
+        metavar="N",
+        help="hold back ready numeric extrinsic calls and run up to N of each at once "
+        "(object engine)",
+    )
+    parser.add_argument(
+        "--flush",
+        choices=FLUSH_POLICIES,
+        default="explicit",
+        help="when printed bytes are written out: on io_flush (explicit), also at "
+        "each newline (line), only when the buffer fills (size), or also every "
+        "0.1s (timer)",
+    )
+    parser.add_argument(
+        "--prefetch-stdin",
+        action="store_true",
+        help="read stdin ahead in chunks on a background thread",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print interaction counts and timing to stderr after the run",
+    )
+    parser.add_argument(
+        "--batch",
+        type=str,
+        help="run ::main once per number in this file (one per line, - for stdin), "
+        "printing each run's output in order",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="worker processes for --batch (default: CPU count)",
+    )
     args = parser.parse_args()
+    if args.batch and args.stats:
+        parser.error("--stats is not supported with --batch")
+    if args.engine == "threaded" and (args.eager_erase or args.batch_calls):
+        parser.error("--eager-erase and --batch-calls are not supported by --engine threaded")
+    if args.engine == "array" and args.batch_calls:
+        parser.error("--batch-calls is not supported by --engine array")
 
-    host = Host()
+    stats = Stats() if args.stats else None
+    if args.engine == "array":
+        ivm: IVM | ArrayIVM = ArrayIVM(stats=stats, eager_erase=args.eager_erase)
+    elif args.engine == "threaded":
+        ivm = ThreadedIVM(stats=stats)
+        if args.threads is not None:
+            ivm.threads = args.threads
+    else:
+        ivm = IVM(
+            stats=stats, eager_erase=args.eager_erase, batch_calls=args.batch_calls
+        )
+    host = Host(
+        ivm=ivm,
+        program_cache=not args.no_cache,
+        compile_globals=args.compile,
+        pre_reduce=args.pre_reduce,
+        inline_threshold=args.inline,
+        flush_policy=args.flush,
+        prefetch_stdin=args.prefetch_stdin,
+    )
     add_std_compat(host)
 
     if args.extensions:
@@ -32,8 +156,15 @@ def main():
     else:
         print(f"File not found: {args.file}", file=sys.stderr)
 
+    if args.batch:
+        for output in host.map(_read_inputs(args.batch), processes=args.processes):
+            sys.stdout.write(output)
+        return
+
     host.boot("::main", PrimitiveExtValPort(0))
     host.execute()
+    if stats is not None:
+        print(stats, file=host.stderr)
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,5 @@
+from typing import Any
+
 from .tree import (
     Nets,
     Net,
@@ -13,19 +15,18 @@ from .tree import (
     BlackBox,
 )
 from .extrinsics import ExtVal
-from .globals import Global, Nilary, Binary, GlobalPort, Inert
+from .globals import Global, Nilary, Binary, GlobalPort, Inert, Instructions
 from .heap import Port, ErasePort
+from .labels import intern
+from .array_vm import ArrayIVM
 from .vm import IVM
 
 
-def insert_nets(ivm: IVM, nets: Nets) -> dict[str, Global]:
+def insert_nets(ivm: IVM | ArrayIVM, nets: Nets) -> dict[str, Global]:
     gs: dict[str, Global] = {name: Global(name) for name in nets.keys()}
     for name, net in nets.items():
         serialize_net(ivm, net, name, gs)
-
-    for g in gs.values():
-        connect_comb_labels(g)
-
+    close_labels(gs)
     return gs
 
 
@@ -33,30 +34,18 @@ class UnknownGlobal(Exception):
     pass
 
 
-def connect_comb_labels(g: Global):
-    q: list[Global] = [g]
-    seen: set[str] = set()
-    while q:
-        next_g = q.pop(0)
-        if next_g.name in seen:
-            continue
-        seen.add(next_g.name)
+# Kinds of net_instructions' work items.
+_TREE, _OPERAND, _BINARY, _INERT = range(4)
 
-        for instruction in next_g.instructions:
-            if isinstance(instruction, Nilary) and isinstance(
-                instruction.port, GlobalPort
-            ):
-                next_g.extend_labels(instruction.port.global_ref)
-                if instruction.port.global_ref.name not in seen:
-                    q.append(instruction.port.global_ref)
-            if isinstance(instruction, Binary):
-                if instruction.tag == "Comb":
-                    next_g.add_label(instruction.label)
 
-
-def serialize_net(ivm: IVM, net: Net, name: str, gs: dict[str, Global]):
+def serialize_net(ivm: IVM | ArrayIVM, net: Net, name: str, gs: dict[str, Global]):
     g = gs[name]
-    instructions = g.instructions
+    g.instructions = net_instructions(net, gs)
+
+
+def net_instructions(net: Net, gs: dict[str, Global]) -> Instructions:
+    """The instructions that build net, resolving global references through gs."""
+    instructions = Instructions()
     equivalents: dict[str, str] = {}
     registers: dict[str, int] = {}
 
@@ -85,42 +74,72 @@ def serialize_net(ivm: IVM, net: Net, name: str, gs: dict[str, Global]):
         return register
 
     def serialize_tree_to(fr: Tree, to: int):
-        tree = unbox(fr)
-        if isinstance(tree, Erase):
-            instructions.append(Nilary(to, ErasePort()))
-        elif isinstance(tree, (N32Node, F32Node)):
-            instructions.append(
-                Nilary(to, ExtVal(value=tree.value))
-            )
-        elif isinstance(tree, CombNode):
-            a = serialize_tree(tree.left)
-            b = serialize_tree(tree.right)
-            instructions.append(Binary("Comb", tree.label, to, a, b))
-        elif isinstance(tree, ExtFnNode):
-            a = serialize_tree(tree.left)
-            b = serialize_tree(tree.right)
-            instructions.append(Binary("ExtFn", tree.label, to, a, b))
-        elif isinstance(tree, GlobalNode):
-            try:
-                port = GlobalPort(global_ref=gs[tree.name])
-            except KeyError:
-                raise UnknownGlobal(f"unknown global {repr(tree.name)}")
-            instructions.append(Nilary(to, port))
-        elif isinstance(tree, BranchNode):
-            r = instructions.new_register()
-            t1 = serialize_tree(tree.n0)
-            t2 = serialize_tree(tree.n1)
-            instructions.append(Binary("Branch", "", r, t1, t2))
-            t3 = serialize_tree(tree.n2)
-            instructions.append(Binary("Branch", "", to, r, t3))
-        elif isinstance(tree, VarNode):
-            assert tree.name not in registers
-            registers[tree.name] = to
-        elif isinstance(tree, BlackBox):
-            from_ = serialize_tree(tree.inner)
-            instructions.append(Inert(to, from_))
-        else:
-            raise NotImplementedError(f"unknown tree {repr(tree)}")
+        # Walks the tree with an explicit stack, in the order a recursive walk
+        # would take, so that deep trees do not reach the recursion limit.
+        # Each work item is a tree to build into a register, an operand to
+        # resolve to a register (pushed onto operands), or an instruction to
+        # append once its operands are resolved.
+        work: list[tuple[int, Any, int]] = [(_TREE, fr, to)]
+        operands: list[int] = []
+        while work:
+            kind, item, to = work.pop()
+            if kind == _BINARY:
+                b = operands.pop()
+                a = operands.pop()
+                tag, label = item
+                instructions.append(Binary(tag, intern(label), to, a, b))
+                continue
+            if kind == _INERT:
+                instructions.append(Inert(to, operands.pop()))
+                continue
+            tree = unbox(item)
+            if kind == _OPERAND:
+                if isinstance(tree, VarNode):
+                    if (register := registers.get(tree.name)) is None:
+                        register = instructions.new_register()
+                        registers[tree.name] = register
+                    operands.append(register)
+                    continue
+                to = instructions.new_register()
+                operands.append(to)
+            if isinstance(tree, Erase):
+                instructions.append(Nilary(to, ErasePort()))
+            elif isinstance(tree, (N32Node, F32Node)):
+                instructions.append(
+                    Nilary(to, ExtVal(value=tree.value))
+                )
+            elif isinstance(tree, CombNode):
+                work.append((_BINARY, ("Comb", tree.label), to))
+                work.append((_OPERAND, tree.right, 0))
+                work.append((_OPERAND, tree.left, 0))
+            elif isinstance(tree, ExtFnNode):
+                work.append((_BINARY, ("ExtFn", tree.label), to))
+                work.append((_OPERAND, tree.right, 0))
+                work.append((_OPERAND, tree.left, 0))
+            elif isinstance(tree, GlobalNode):
+                try:
+                    port = GlobalPort(global_ref=gs[tree.name])
+                except KeyError:
+                    raise UnknownGlobal(f"unknown global {repr(tree.name)}")
+                instructions.append(Nilary(to, port))
+            elif isinstance(tree, BranchNode):
+                r = instructions.new_register()
+                # The outer Branch's first operand, under the inner's two. Both
+                # have the empty label, BRANCH_LABEL.
+                operands.append(r)
+                work.append((_BINARY, ("Branch", ""), to))
+                work.append((_OPERAND, tree.n2, 0))
+                work.append((_BINARY, ("Branch", ""), r))
+                work.append((_OPERAND, tree.n1, 0))
+                work.append((_OPERAND, tree.n0, 0))
+            elif isinstance(tree, VarNode):
+                assert tree.name not in registers
+                registers[tree.name] = to
+            elif isinstance(tree, BlackBox):
+                work.append((_INERT, None, to))
+                work.append((_OPERAND, tree.inner, 0))
+            else:
+                raise NotImplementedError(f"unknown tree {repr(tree)}")
 
     for pa, pb in net.pairs:
         pa, pb = unbox(pa), unbox(pb)
@@ -146,10 +165,161 @@ def serialize_net(ivm: IVM, net: Net, name: str, gs: dict[str, Global]):
     if not isinstance(root, VarNode):
         serialize_tree_to(net.root, 0)
 
-    connect_comb_labels(g)
+    return instructions
 
 
 def unbox(a: Tree) -> Tree:
     while isinstance(a, BlackBox):
         a = a.inner
     return a
+
+
+def close_labels(gs: dict[str, Global]) -> None:
+    """Sets each global's labels to the comb labels of everything it can expand into.
+
+    Globals on a reference cycle share one label set. Components are visited callees
+    first, so each global's instructions are scanned once.
+    """
+    for component in _sccs(gs):
+        members = {id(g) for g in component}
+        labels = 0
+        for g in component:
+            for instruction in g.instructions:
+                if isinstance(instruction, Binary) and instruction.tag == "Comb":
+                    labels |= 1 << instruction.label
+                elif (
+                    isinstance(instruction, Nilary)
+                    and isinstance(instruction.port, GlobalPort)
+                    and id(instruction.port.global_ref) not in members
+                ):
+                    labels |= instruction.port.global_ref.labels
+        for g in component:
+            g.labels = labels
+
+
+def _callees(g: Global) -> list[Global]:
+    return [
+        instruction.port.global_ref
+        for instruction in g.instructions
+        if isinstance(instruction, Nilary) and isinstance(instruction.port, GlobalPort)
+    ]
+
+
+def _sccs(gs: dict[str, Global]) -> list[list[Global]]:
+    """Strongly connected components of the reference graph, callees first (Tarjan)."""
+    index: dict[int, int] = {}
+    low: dict[int, int] = {}
+    stack: list[Global] = []
+    on_stack: set[int] = set()
+    components: list[list[Global]] = []
+    for root in gs.values():
+        if id(root) in index:
+            continue
+        work = [(root, iter(_callees(root)))]
+        index[id(root)] = low[id(root)] = len(index)
+        stack.append(root)
+        on_stack.add(id(root))
+        while work:
+            g, callees = work[-1]
+            for callee in callees:
+                if id(callee) not in index:
+                    index[id(callee)] = low[id(callee)] = len(index)
+                    stack.append(callee)
+                    on_stack.add(id(callee))
+                    work.append((callee, iter(_callees(callee))))
+                    break
+                if id(callee) in on_stack:
+                    low[id(g)] = min(low[id(g)], index[id(callee)])
+            else:
+                work.pop()
+                if work:
+                    caller = work[-1][0]
+                    low[id(caller)] = min(low[id(caller)], low[id(g)])
+                if low[id(g)] == index[id(g)]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(id(member))
+                        component.append(member)
+                        if member is g:
+                            break
+                    components.append(component)
+    return components
+
+
+def inline_globals(gs: dict[str, Global], max_size: int) -> int:
+    """Splices globals of at most max_size instructions into the globals referencing them.
+
+    A global on a reference cycle (including one referencing itself) or holding
+    an Inert instruction is never inlined, and neither is a reference in a
+    branch arm. Callees are done before callers, so a
+    global's size is measured with its own small callees already spliced in.
+    Returns how many references were replaced.
+    """
+    inlinable: set[int] = set()
+    replaced = 0
+    for component in _sccs(gs):
+        for g in component:
+            # Branch arms are only expanded once chosen; inlining them would
+            # build both and erase one.
+            lazy = {
+                register
+                for i in g.instructions
+                if isinstance(i, Binary) and i.tag == "Branch"
+                for register in (i.register1, i.register2)
+            }
+            instructions = Instructions(next_register=g.instructions.next_register)
+            for instruction in g.instructions:
+                if (
+                    isinstance(instruction, Nilary)
+                    and isinstance(instruction.port, GlobalPort)
+                    and id(instruction.port.global_ref) in inlinable
+                    and instruction.register0 not in lazy
+                ):
+                    _splice(
+                        instruction.port.global_ref.instructions,
+                        instruction.register0,
+                        instructions,
+                    )
+                    replaced += 1
+                else:
+                    instructions.append(instruction)
+            g.instructions = instructions
+            g.compiled = None
+        if len(component) > 1:
+            continue
+        (g,) = component
+        if (
+            len(g.instructions.instructions) <= max_size
+            and g not in _callees(g)
+            and not any(isinstance(i, Inert) for i in g.instructions)
+        ):
+            inlinable.add(id(g))
+    if replaced:
+        close_labels(gs)
+    return replaced
+
+
+def _splice(callee: Instructions, at: int, into: Instructions) -> None:
+    """Appends callee's instructions to into, with its register 0 renamed to at."""
+    registers = {0: at}
+
+    def register(r: int) -> int:
+        if (mapped := registers.get(r)) is None:
+            mapped = registers[r] = into.new_register()
+        return mapped
+
+    for instruction in callee:
+        if isinstance(instruction, Nilary):
+            into.append(Nilary(register(instruction.register0), instruction.port))
+        else:
+            assert isinstance(instruction, Binary)
+            into.append(
+                Binary(
+                    instruction.tag,
+                    instruction.label,
+                    register(instruction.register0),
+                    register(instruction.register1),
+                    register(instruction.register2),
+                )
+            )
@@ -0,0 +1,122 @@
+"""Counters for how much work a reduction did.
+
+An engine constructed with ``stats=Stats()`` wraps its rule methods in the
+counting closures below before binding its rule tables, so an engine without
+stats runs exactly the code it would if this module did not exist.
+"""
+
+import dataclasses
+from collections import Counter
+from dataclasses import field
+from typing import Any, Callable, Sized
+
+INTERACTIONS = ("annihilate", "commute", "copy", "erase", "expand", "call", "branch")
+
+Rule = Callable[[Any, Any], None]
+
+
+@dataclasses.dataclass
+class Stats:
+    interactions: Counter[str] = field(default_factory=Counter)
+    expansions: Counter[str] = field(default_factory=Counter)
+    ext_calls: Counter[str] = field(default_factory=Counter)
+    peak_fast: int = 0
+    peak_slow: int = 0
+    # Calls to the engine's follow, and the filled wires they passed in all.
+    follows: int = 0
+    wires_followed: int = 0
+    time: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.interactions.values())
+
+    @property
+    def mean_chain(self) -> float:
+        return self.wires_followed / self.follows if self.follows else 0.0
+
+    def counting(self, kind: str, rule: Rule) -> Rule:
+        interactions = self.interactions
+
+        def counted(a, b) -> None:
+            interactions[kind] += 1
+            rule(a, b)
+
+        return counted
+
+    def counting_expansions(self, name_of: Callable[[Any], str], rule: Rule) -> Rule:
+        expansions = self.expansions
+
+        def counted(a, b) -> None:
+            expansions[name_of(a)] += 1
+            rule(a, b)
+
+        return counted
+
+    def counting_follows(
+        self, chain_length: Callable[[Any], int], follow: Callable[..., Any]
+    ) -> Callable[..., Any]:
+        """Wraps an engine's follow; chain_length(a) counts the filled wires from a."""
+
+        def counted(a, *args, **kwargs):
+            self.follows += 1
+            self.wires_followed += chain_length(a)
+            return follow(a, *args, **kwargs)
+
+        return counted
+
+    def watching(self, fast: Sized, slow: Sized, rule: Rule, width: int = 1) -> Rule:
+        """Wraps a push rule to track the queue peaks; width is entries per pair."""
+
+        def watched(a, b) -> None:
+            rule(a, b)
+            if len(fast) > self.peak_fast * width:
+                self.peak_fast = len(fast) // width
+            if len(slow) > self.peak_slow * width:
+                self.peak_slow = len(slow) // width
+
+        return watched
+
+    def __str__(self) -> str:
+        def section(title: str, rows: list[tuple[str, Any]]) -> list[str]:
+            return [title] + [f"  {name:<16}{value:>16}" for name, value in rows]
+
+        lines = section(
+            "Interactions",
+            [("Total", f"{self.total:_}")]
+            + [
+                (kind.capitalize(), f"{self.interactions[kind]:_}")
+                for kind in INTERACTIONS
+            ],
+        )
+        if self.expansions:
+            lines += [""] + section(
+                "Expansions",
+                [(name, f"{n:_}") for name, n in self.expansions.most_common(10)],
+            )
+        if self.ext_calls:
+            lines += [""] + section(
+                "Extrinsics",
+                [(name, f"{n:_}") for name, n in self.ext_calls.most_common(10)],
+            )
+        lines += [""] + section(
+            "Queues",
+            [
+                ("Peak fast", f"{self.peak_fast:_}"),
+                ("Peak slow", f"{self.peak_slow:_}"),
+            ],
+        )
+        if self.follows:
+            lines += [""] + section(
+                "Wires",
+                [
+                    ("Follows", f"{self.follows:_}"),
+                    ("Mean chain", f"{self.mean_chain:.2f}"),
+                ],
+            )
+        speed = f"{self.total / self.time:_.0f} IPS" if self.time else "-"
+        lines += [""] + section(
+            "Performance",
+            [("Time", f"{self.time * 1000:_.0f} ms"), ("Speed", speed)],
+        )
+        return "\n".join(lines)
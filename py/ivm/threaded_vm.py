@@ -0,0 +1,189 @@
+"""IVM reduced by several threads, for free-threaded CPython builds.
+
+ThreadedIVM.run hands the queued pairs to ``threads`` workers. Each worker is
+an IVM of its own with the engine's extrinsics, its own registers, and deques
+for queues: it pops its newest pairs, and an idle worker steals the oldest
+half of another's. Wires are shared, so workers link them under striped
+locks, which gives Wire.swap_target the atomicity it is named for: of the two
+ends meeting in a wire, exactly one stores and the other takes. Following a
+wire needs no lock, not even to empty it: only the taking end reaches a wire
+once it is filled.
+
+A worker's active flag is set before it steals and cleared only once its
+queues are empty, so the net is normal when two scans in a row see no active
+worker, no queued pair and no new steal.
+
+With the GIL, threads only add overhead, so run() reduces serially unless
+force_threads is set (which the tests use to exercise the protocol).
+eager_erase and batch_calls only apply to a serial run; a run on several
+threads refuses them. With
+stats on a free-threaded build, counts from concurrent workers may be lost.
+"""
+
+import dataclasses
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import field
+
+from .heap import Port, Wire
+from .vm import IVM
+
+# Seconds an idle worker waits before looking for work again.
+IDLE_WAIT = 0.0002
+
+
+def gil_enabled() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or is_gil_enabled()
+
+
+@dataclasses.dataclass
+class _Worker(IVM):
+    """One thread's engine; its link_wire takes the owner's wire locks."""
+
+    # Deques, so that an idle worker can steal the oldest pairs.
+    active_fast: deque[tuple[Port, Port]] = field(default_factory=deque)
+    active_slow: deque[tuple[Port, Port]] = field(default_factory=deque)
+    owner: "ThreadedIVM | None" = None
+    index: int = 0
+
+    def link_wire(self, a: Wire, b: Port):
+        b = self.follow(b, True)
+        owner = self.owner
+        assert owner is not None
+        with owner._locks[(id(a) >> 4) % owner.stripes]:
+            c = a.swap_target(b)
+            if c:
+                a.finish()
+        if c:
+            self.link(c, b)
+
+    def run(self) -> None:
+        owner, me = self.owner, self.index
+        assert owner is not None
+        fast, slow, rules = self.active_fast, self.active_slow, self._interact
+        while True:
+            while fast or slow:
+                try:
+                    a, b = fast.pop() if fast else slow.pop()
+                except IndexError:
+                    continue  # a thief took it
+                rule, swapped = rules[type(a), type(b)]
+                if swapped:
+                    rule(b, a)
+                else:
+                    rule(a, b)
+            owner._active[me] = False
+            if owner._steal(me):
+                continue
+            if owner._failed or owner._finished():
+                return
+            time.sleep(IDLE_WAIT)
+
+
+@dataclasses.dataclass
+class ThreadedIVM(IVM):
+    threads: int = field(default_factory=lambda: os.cpu_count() or 1)
+    stripes: int = 256
+    force_threads: bool = False
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self._locks = [threading.Lock() for _ in range(self.stripes)]
+        self._workers: list[_Worker] = []
+        self._active: list[bool] = []
+        self._steals: list[int] = []
+        self._failed = False
+
+    def run(self) -> None:
+        if self.threads <= 1 or (gil_enabled() and not self.force_threads):
+            return super().run()
+        if self.eager_erase:
+            raise NotImplementedError("ThreadedIVM does not erase eagerly on several threads")
+        if self.batch_calls:
+            raise NotImplementedError("ThreadedIVM does not batch calls on several threads")
+        self._run_workers()
+        # The workers leave offloaded calls to the owner, which links their
+        # results in between rounds.
+        while self.offloaded:
+            self.settle(block=True)
+            self._run_workers()
+
+    def _run_workers(self) -> None:
+        workers = self._workers = [
+            _Worker(
+                extrinsics=self.extrinsics,
+                stats=self.stats,
+                owner=self,
+                index=i,
+            )
+            for i in range(self.threads)
+        ]
+        for worker in workers:
+            worker.parked = self.parked
+            worker.offloaded = self.offloaded
+            worker.finished = self.finished
+        for n, pair in enumerate(self.active_fast):
+            workers[n % self.threads].active_fast.append(pair)
+        for n, pair in enumerate(self.active_slow):
+            workers[n % self.threads].active_slow.append(pair)
+        self.active_fast.clear()
+        self.active_slow.clear()
+        self._active = [bool(w.active_fast or w.active_slow) for w in workers]
+        self._steals = [0] * self.threads
+        self._failed = False
+
+        errors: list[BaseException] = []
+
+        def work(worker: _Worker) -> None:
+            try:
+                worker.run()
+            except BaseException as e:
+                self._failed = True
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(w,)) for w in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._workers = []
+        if errors:
+            raise errors[0]
+
+    def _steal(self, me: int) -> bool:
+        """Moves the oldest half of some other worker's queue to worker me."""
+        self._active[me] = True
+        thief = self._workers[me]
+        for k in range(1, self.threads):
+            victim = self._workers[(me + k) % self.threads]
+            for queue, mine in (
+                (victim.active_slow, thief.active_slow),
+                (victim.active_fast, thief.active_fast),
+            ):
+                for _ in range((len(queue) + 1) // 2):
+                    try:
+                        mine.append(queue.popleft())
+                    except IndexError:
+                        break
+                if mine:
+                    self._steals[me] += 1
+                    return True
+        self._active[me] = False
+        return False
+
+    def _finished(self) -> bool:
+        def scan() -> tuple:
+            return (
+                list(self._active),
+                [len(w.active_fast) + len(w.active_slow) for w in self._workers],
+                list(self._steals),
+            )
+
+        first = scan()
+        if any(first[0]) or any(first[1]):
+            return False
+        return scan() == first
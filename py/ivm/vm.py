@@ -1,6 +1,18 @@
 import dataclasses
+from collections import deque
+from concurrent.futures import Future
 from dataclasses import field
-from typing import TypeVar, Iterable, Iterator, Generator
+from inspect import isawaitable
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ClassVar,
+    TypeVar,
+    Iterator,
+    Generator,
+    MutableSequence,
+)
 
 from .heap import (
     Port,
@@ -14,19 +26,196 @@ from .heap import (
     make_wire_pair,
 )
 from .globals import Global, GlobalPort, Instructions, ExecutionContext
-from .extrinsics import ExtVal, ExtValPort, ExtFnPort, Extrinsics
+from .extrinsics import ExtVal, ExtValPort, ExtFnPort, Extrinsics, settle_offloaded
+from .stats import INTERACTIONS, Stats
 
-_P = TypeVar("_P", bound=Port)
-_Q = TypeVar("_Q", bound=Port)
 _BP = TypeVar("_BP", bound=BinaryNodePort)
 
 
+class NoRule(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class RuleTable:
+    """Maps an ordered pair of port types to the engine method that handles it.
+
+    Registering (A, B) also registers (B, A), with the arguments swapped back
+    when the handler is called, so handlers always see their ports oriented.
+    Lookups go by exact type first; subclasses resolve to the registration
+    closest to them in both MROs, and the result is memoized once bound.
+    """
+
+    rules: dict[tuple[type, type], tuple[str, bool]] = field(default_factory=dict)
+
+    def register(self, a: type, b: type, method: str) -> None:
+        self.rules[a, b] = (method, False)
+        if a is not b:
+            self.rules[b, a] = (method, True)
+
+    def copy(self) -> "RuleTable":
+        return RuleTable(dict(self.rules))
+
+    def resolve(self, a: type, b: type) -> tuple[str, bool]:
+        if (rule := self.rules.get((a, b))) is not None:
+            return rule
+        mro_a, mro_b = a.__mro__, b.__mro__
+        best: tuple[int, tuple[str, bool]] | None = None
+        for (ra, rb), rule in self.rules.items():
+            if ra in mro_a and rb in mro_b:
+                distance = mro_a.index(ra) + mro_b.index(rb)
+                if best is None or distance < best[0]:
+                    best = (distance, rule)
+        if best is None:
+            raise NoRule(f"no rule for {a.__name__} and {b.__name__}")
+        return best[1]
+
+    def bind(self, engine: object, names: dict[str, str] | None = None) -> "BoundRules":
+        return BoundRules(self, engine, names or {})
+
+
+class BoundRules(dict[tuple[type, type], tuple[Callable[[Any, Any], None], bool]]):
+    """A RuleTable resolved against one engine: (type(a), type(b)) -> (method, swapped).
+
+    names maps a rule's method name to the one the engine's options put in
+    its place.
+    """
+
+    def __init__(self, table: RuleTable, engine: object, names: dict[str, str]) -> None:
+        super().__init__()
+        self.table = table
+        self.engine = engine
+        self.names = names
+
+    def __missing__(self, key: tuple[type, type]):
+        method, swapped = self.table.resolve(*key)
+        method = self.names.get(method, method)
+        self[key] = bound = (getattr(self.engine, method), swapped)
+        return bound
+
+
+LINK_RULES = RuleTable()
+LINK_RULES.register(WirePort, Port, "link_wire_port")
+for _a, _b in [
+    (ErasePort, ErasePort),
+    (ErasePort, GlobalPort),
+    (GlobalPort, GlobalPort),
+    (ErasePort, ExtValPort),
+    (ExtValPort, ExtValPort),
+]:
+    LINK_RULES.register(_a, _b, "drop")
+LINK_RULES.register(GlobalPort, ExtValPort, "push_slow")
+LINK_RULES.register(GlobalPort, BinaryNodePort, "push_slow")
+LINK_RULES.register(CombPort, CombPort, "push_binary")
+LINK_RULES.register(ExtFnPort, ExtFnPort, "push_binary")
+for _a, _b in [
+    (BranchPort, BranchPort),
+    (CombPort, ExtFnPort),
+    (CombPort, BranchPort),
+    (ExtFnPort, BranchPort),
+]:
+    LINK_RULES.register(_a, _b, "push_slow")
+LINK_RULES.register(ErasePort, BinaryNodePort, "push_fast")
+LINK_RULES.register(ExtValPort, BinaryNodePort, "push_fast")
+
+INTERACT_RULES = RuleTable()
+INTERACT_RULES.register(GlobalPort, CombPort, "copy_or_expand")
+INTERACT_RULES.register(GlobalPort, ExtFnPort, "expand")
+INTERACT_RULES.register(GlobalPort, BranchPort, "expand")
+INTERACT_RULES.register(GlobalPort, ExtValPort, "expand")
+for _a, _b in [
+    (CombPort, CombPort),
+    (ExtFnPort, ExtFnPort),
+    (CombPort, ExtFnPort),
+    (CombPort, BranchPort),
+    (ExtFnPort, BranchPort),
+]:
+    INTERACT_RULES.register(_a, _b, "annihilate_or_commute")
+INTERACT_RULES.register(BranchPort, BranchPort, "annihilate")
+INTERACT_RULES.register(BranchPort, ExtValPort, "branch")
+INTERACT_RULES.register(ExtFnPort, ExtValPort, "call")
+INTERACT_RULES.register(ExtValPort, CombPort, "copy")
+INTERACT_RULES.register(ErasePort, BinaryNodePort, "erase")
+
+
 @dataclasses.dataclass
 class IVM(ExecutionContext):
-    active_fast: list[tuple[Port, Port]] = field(default_factory=list)
-    active_slow: list[tuple[Port, Port]] = field(default_factory=list)
+    """The reference engine.
+
+    How a pair is linked and how an active pair interacts are looked up in
+    link_rules and interact_rules by the pair's types. A subclass adding a port
+    type registers its handlers on copies of these tables:
+
+        class MyIVM(IVM):
+            interact_rules = INTERACT_RULES.copy()
+            interact_rules.register(MyPort, ExtVal, "my_rule")
+
+    With stats set, the rule methods are wrapped in counters when the engine
+    is created; see ivm.stats. With eager_erase set, an erase meeting a node
+    sweeps the whole subnet behind it at once (see erase_eagerly). With
+    batch_calls set, ready calls to extrinsics that have a batched form are
+    held back and run together (see call_batched).
+
+    An extrinsic may return an awaitable instead of its result. The call is
+    then parked in parked, with the wires its results go to, and reduction
+    goes on without it; Host.run_async awaits it and hands the results to
+    resume. One returning a concurrent.futures.Future (see Host.add_ext_fun's
+    blocking) is offloaded instead: the engine itself links its results in
+    once it is done, checking whenever the fast queue runs dry and waiting
+    for it when nothing else is left (see settle).
+    """
+
+    link_rules: ClassVar[RuleTable] = LINK_RULES
+    interact_rules: ClassVar[RuleTable] = INTERACT_RULES
+
+    # Lists here; ThreadedIVM's workers use deques.
+    active_fast: MutableSequence[tuple[Port, Port]] = field(default_factory=list)
+    active_slow: MutableSequence[tuple[Port, Port]] = field(default_factory=list)
     registers: list[Port | None] = field(default_factory=list)
     extrinsics: Extrinsics = field(default_factory=lambda: Extrinsics())
+    stats: Stats | None = None
+    eager_erase: bool = False
+    batch_calls: int = 0
+    _pending_calls: dict[str, tuple[list, list, list[Wire]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    parked: list[tuple[Awaitable, tuple[Wire, ...]]] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    offloaded: dict[Future, tuple[Wire, ...]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    finished: deque[Future] = field(
+        default_factory=deque, init=False, repr=False, compare=False
+    )
+    _link: BoundRules = field(init=False, repr=False, compare=False)
+    _interact: BoundRules = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Rules whose method the options replace; bound by these names.
+        names: dict[str, str] = {}
+        if self.eager_erase:
+            names["erase"] = "erase_eagerly"
+        if self.batch_calls:
+            names["call"] = "call_batched"
+        if self.stats is not None:
+            self._instrument(self.stats, names)
+        self._link = self.link_rules.bind(self, names)
+        self._interact = self.interact_rules.bind(self, names)
+
+    def _instrument(self, stats: Stats, names: dict[str, str]) -> None:
+        expand = stats.counting_expansions(lambda a: a.global_ref.name, self.expand)
+        setattr(self, "expand", expand)
+        setattr(self, "follow", stats.counting_follows(self._chain_length, self.follow))
+        for kind in INTERACTIONS:
+            name = names.get(kind, kind)
+            setattr(self, name, stats.counting(kind, getattr(self, name)))
+        for push in ("push_fast", "push_slow", "push_binary"):
+            setattr(
+                self,
+                push,
+                stats.watching(self.active_fast, self.active_slow, getattr(self, push)),
+            )
 
     def boot(self, g: Global, ext_val: ExtValPort):
         self.link(GlobalPort(global_ref=g), ext_val.fork())
@@ -45,13 +234,70 @@ class IVM(ExecutionContext):
             self.interact(a, b)
             yield
 
+    def run(self) -> None:
+        """Reduces until no active pairs are left."""
+        fast, slow, rules = self.active_fast, self.active_slow, self._interact
+        pending, finished = self._pending_calls, self.finished
+        while True:
+            while fast:
+                a, b = fast.pop()
+                rule, swapped = rules[type(a), type(b)]
+                if swapped:
+                    rule(b, a)
+                else:
+                    rule(a, b)
+            if finished:
+                self.settle()
+                continue
+            if not slow:
+                if pending:
+                    self.flush_calls()
+                elif self.offloaded:
+                    self.settle(block=True)
+                else:
+                    return
+                continue
+            a, b = slow.pop()
+            rule, swapped = rules[type(a), type(b)]
+            if swapped:
+                rule(b, a)
+            else:
+                rule(a, b)
+
+    def step(self, max_interactions: int) -> int:
+        """Performs at most max_interactions, in run's order; returns the active pairs left."""
+        fast, slow, interact = self.active_fast, self.active_slow, self.interact
+        pending, finished = self._pending_calls, self.finished
+        for _ in range(max_interactions):
+            if fast:
+                interact(*fast.pop())
+            elif finished:
+                self.settle()
+            elif slow:
+                interact(*slow.pop())
+            elif pending:
+                self.flush_calls()
+            else:
+                break
+        return len(fast) + len(slow) + sum(len(outs) for _, _, outs in pending.values())
+
     def normalize(self) -> Generator[None, None, None]:
+        """Like run, but yields after each interaction; meant for debugging."""
         while True:
             yield from self.do_fast()
-            if self.active_slow:
+            if self.finished:
+                self.settle()
+                yield
+            elif self.active_slow:
                 a, b = self.active_slow.pop()
                 self.interact(a, b)
                 yield
+            elif self._pending_calls:
+                self.flush_calls()
+                yield
+            elif self.offloaded:
+                self.settle(block=True)
+                yield
             else:
                 break
 
@@ -59,11 +305,29 @@ class IVM(ExecutionContext):
         return self.link_wire(a, WirePort(wire=b))
 
     def follow(self, a: Port, destructive: bool) -> Port:
-        for wire, b in self.follow_each_wire(a):
-            if b:
-                a = b
+        """The port at the end of a's chain of wires.
+
+        A destructive follow is the taking end of every wire it passes, so it
+        empties them (see Wire.finish) and the chain is released behind it.
+        """
+        while isinstance(a, WirePort):
+            wire = a.wire
+            b = wire.target
+            if b is None:
+                break
+            if destructive:
+                wire.target = None
+            a = b
         return a
 
+    @staticmethod
+    def _chain_length(a: Port) -> int:
+        n = 0
+        while isinstance(a, WirePort) and (b := a.wire.target) is not None:
+            n += 1
+            a = b
+        return n
+
     def follow_each_wire(self, a: Port) -> Iterator[tuple[Wire, Port | None]]:
         while isinstance(a, WirePort):
             wire = a.wire
@@ -78,71 +342,60 @@ class IVM(ExecutionContext):
         b = self.follow(b, True)
         c = a.swap_target(b)
         if c:
+            a.finish()
             self.link(c, b)
 
     def link(self, a: Port, b: Port) -> None:
-        if ports := _find_either_is(a, b, WirePort):
-            a, b = ports
-            self.link_wire(a.wire, b)
-            return
-        if _find_both_one_of(a, b, (GlobalPort, ErasePort)) or _find_both_one_of(
-            a, b, (ExtValPort, ErasePort)
-        ):
-            if isinstance(a, ExtValPort):
-                a.drop()
-            if isinstance(b, ExtValPort):
-                b.drop()
-            return
-        if (comb_ports := _find_both_are(a, b, BinaryNodePort)) and (
-            type(a) is type(b) and isinstance(a, (CombPort, ExtFnPort))
-        ):
-            if comb_ports[0].label == comb_ports[1].label:
-                self.active_fast.append(comb_ports)
-                return
-        if _find_either_is(a, b, GlobalPort) or _find_both_one_of(
-            a, b, (CombPort, ExtFnPort, BranchPort)
-        ):
-            self.active_slow.append((a, b))
-            return
-        if (
-            _find_either_is(a, b, ErasePort) is not None
-            or _find_either_is(a, b, ExtValPort) is not None
-        ):
-            self.active_fast.append((a, b))
-            return
-        assert False, "unreachable"
+        rule, swapped = self._link[type(a), type(b)]
+        if swapped:
+            rule(b, a)
+        else:
+            rule(a, b)
 
     def interact(self, a: Port, b: Port) -> None:
-        if _find_either_is(a, b, WirePort) or _find_both_one_of(
-            a, b, (ErasePort, ExtValPort)
-        ):
-            assert False, "unreachable"
-        if ports1 := _find_and_orient_both(a, b, GlobalPort, CombPort):
-            if not ports1[0].global_ref.contains_label(ports1[1].label):
-                self.copy(ports1[0], ports1[1])
-                return
-        if ports2 := _find_either_is(a, b, GlobalPort):
-            self.expand(ports2[0], ports2[1])
-            return
-        if ports3 := _find_both_are(a, b, BinaryNodePort):
-            if ports3[0].label == ports3[1].label:
-                self.annihilate(ports3[0], ports3[1])
-                return
-            self.commute(ports3[0], ports3[1])
-            return
-        if ports4 := _find_and_orient_both(a, b, BranchPort, ExtValPort):
-            self.branch(ports4[0], ports4[1])
-            return
-        if ports5 := _find_and_orient_both(a, b, ExtFnPort, ExtValPort):
-            self.call(ports5[0], ports5[1])
-            return
-        if ports6 := _find_and_orient_both(a, b, NilaryNodePort, BinaryNodePort):
-            self.copy(ports6[0], ports6[1])
-            return
-        assert False, "unreachable"
+        rule, swapped = self._interact[type(a), type(b)]
+        if swapped:
+            rule(b, a)
+        else:
+            rule(a, b)
+
+    def link_wire_port(self, a: WirePort, b: Port) -> None:
+        self.link_wire(a.wire, b)
+
+    def drop(self, a: NilaryNodePort, b: NilaryNodePort) -> None:
+        a.drop()
+        b.drop()
+
+    def push_fast(self, a: Port, b: Port) -> None:
+        self.active_fast.append((a, b))
+
+    def push_slow(self, a: Port, b: Port) -> None:
+        self.active_slow.append((a, b))
+
+    def push_binary(self, a: BinaryNodePort, b: BinaryNodePort) -> None:
+        if a.label == b.label:
+            self.active_fast.append((a, b))
+        else:
+            self.active_slow.append((a, b))
+
+    def copy_or_expand(self, a: GlobalPort, b: CombPort) -> None:
+        if a.global_ref.contains_label(b.label):
+            self.expand(a, b)
+        else:
+            self.copy(a, b)
+
+    def annihilate_or_commute(self, a: BinaryNodePort, b: BinaryNodePort) -> None:
+        if a.label == b.label:
+            self.annihilate(a, b)
+        else:
+            self.commute(a, b)
 
     def expand(self, a: GlobalPort, b: Port):
-        self.execute(a.global_ref.instructions, b)
+        g = a.global_ref
+        if g.compiled is not None:
+            g.compiled(self, b)
+        else:
+            self.execute(g.instructions, b)
 
     def annihilate(self, a: BinaryNodePort, b: BinaryNodePort):
         a1, a2 = a.aux()
@@ -155,10 +408,40 @@ class IVM(ExecutionContext):
         self.link_wire(x, a.fork())
         self.link_wire(y, a)
 
+    def erase(self, a: ErasePort, b: BinaryNodePort):
+        x, y = b.aux()
+        self.link_wire(x, a)
+        self.link_wire(y, a)
+
+    def erase_eagerly(self, a: ErasePort, b: BinaryNodePort):
+        """Erases b and every node reachable from it through finished wires.
+
+        Performs the same erase interactions as erase, without queueing them.
+        A wire whose other end has not arrived yet gets a, as in erase; values
+        reached are dropped.
+        """
+        stats = self.stats
+        nodes = [b]
+        while nodes:
+            for wire in nodes.pop().aux():
+                c = wire.target
+                if c is None:
+                    wire.target = a
+                    continue
+                wire.finish()
+                c = self.follow(c, True)
+                if isinstance(c, BinaryNodePort):
+                    if stats is not None:
+                        stats.interactions["erase"] += 1
+                    nodes.append(c)
+                elif isinstance(c, WirePort):
+                    self.link_wire(c.wire, a)
+                else:
+                    self.link(c, a)
+
     def _copy_with_new_aux(self, b: _BP) -> tuple[_BP, Wire, Wire]:
         wire, wire_other = make_wire_pair()
-        updated = dataclasses.replace(b, target=wire)
-        return updated, wire, wire_other
+        return b.with_target(wire), wire, wire_other
 
     def commute(self, a: BinaryNodePort, b: BinaryNodePort):
         a1 = self._copy_with_new_aux(a)
@@ -187,12 +470,33 @@ class IVM(ExecutionContext):
         return ExtVal(result)
 
     def call(self, a: ExtFnPort, b: ExtValPort):
+        op = self.extrinsics.intrinsics.get(a.label >> 1)
+        if op is not None:
+            rhs = a.target
+            rhs_port = rhs.load_target()
+            if isinstance(rhs_port, ExtValPort):
+                rhs.finish()
+                if self.stats is not None:
+                    self.stats.ext_calls[a.unwrap_label()] += 1
+                if a.label & 1:
+                    result = op(rhs_port.value, b.value)
+                else:
+                    result = op(b.value, rhs_port.value)
+                self.link_wire(rhs.other_half, ExtVal(result))
+                return
+
         label = a.unwrap_label()
 
         # Split ext fn: one input -> two outputs
         if label in self.extrinsics.split_ext_fns:
             rhs, out = a.aux()
-            result1, result2 = self.extrinsics.split_ext_fns[label](b.value)
+            if self.stats is not None:
+                self.stats.ext_calls[label] += 1
+            result = self.extrinsics.split_ext_fns[label](b.value)
+            if isinstance(result, Future) or isawaitable(result):
+                self.park(result, (rhs, out))
+                return
+            result1, result2 = result
             self.link_wire(rhs, self._wrap_result(result1))
             self.link_wire(out, self._wrap_result(result2))
             return
@@ -202,7 +506,9 @@ class IVM(ExecutionContext):
         rhs_port = rhs.load_target()
         if rhs_port:
             if isinstance(rhs_port, ExtValPort):
-                rhs.target = None  # disconnect
+                rhs.finish()
+                if self.stats is not None:
+                    self.stats.ext_calls[label] += 1
                 if a.swapped:
                     result = self.extrinsics.ext_fns[label](
                         rhs_port.value, b.value
@@ -211,6 +517,9 @@ class IVM(ExecutionContext):
                     result = self.extrinsics.ext_fns[label](
                         b.value, rhs_port.value
                     )
+                if isinstance(result, Future) or isawaitable(result):
+                    self.park(result, (out,))
+                    return
                 self.link_wire(out, self._wrap_result(result))
                 return
 
@@ -219,6 +528,65 @@ class IVM(ExecutionContext):
         self.link_wire(new_fn[1], b)
         self.link_wire_wire(new_fn[2], out)
 
+    def park(self, result: Awaitable | Future, outs: tuple[Wire, ...]) -> None:
+        if isinstance(result, Future):
+            self.offloaded[result] = outs
+            result.add_done_callback(self.finished.append)
+        else:
+            self.parked.append((result, outs))
+
+    def resume(self, outs: tuple[Wire, ...], results: tuple) -> None:
+        """Links the results of a parked call, once its awaitable is done."""
+        for out, result in zip(outs, results):
+            self.link_wire(out, self._wrap_result(result))
+
+    def settle(self, block: bool = False) -> int:
+        """Resumes the offloaded calls that are done; see settle_offloaded."""
+        return settle_offloaded(self.offloaded, self.finished, self.resume, block)
+
+    def call_batched(self, a: ExtFnPort, b: ExtValPort):
+        """Like call, but holds back a ready call whose function has a batched form.
+
+        Held calls are queued by label and run by flush_calls once no active
+        pairs are left, or as soon as batch_calls of one label are waiting, so
+        the batched function sees as many of them at once as the net allows.
+        Only what is waiting on their results is delayed, which is why this is
+        limited to pure functions.
+        """
+        label = a.unwrap_label()
+        rhs, out = a.aux()
+        rhs_port = rhs.load_target()
+        if (
+            not isinstance(rhs_port, ExtValPort)
+            or label not in self.extrinsics.batched_ext_fns
+        ):
+            return IVM.call(self, a, b)
+        rhs.finish()
+        if (batch := self._pending_calls.get(label)) is None:
+            batch = self._pending_calls[label] = ([], [], [])
+        lhs_values, rhs_values, outs = batch
+        if a.swapped:
+            lhs_values.append(rhs_port.value)
+            rhs_values.append(b.value)
+        else:
+            lhs_values.append(b.value)
+            rhs_values.append(rhs_port.value)
+        outs.append(out)
+        if len(outs) >= self.batch_calls:
+            self.flush_calls()
+
+    def flush_calls(self) -> None:
+        """Runs the calls held back by call_batched, one batched call per label."""
+        fns = self.extrinsics.batched_ext_fns
+        # Linking the results only queues pairs, so nothing is added meanwhile.
+        for label, (lhs_values, rhs_values, outs) in self._pending_calls.items():
+            if self.stats is not None:
+                self.stats.ext_calls[label] += len(outs)
+            results = fns[label](lhs_values, rhs_values)
+            for out, result in zip(outs, results):
+                self.link_wire(out, self._wrap_result(result))
+        self._pending_calls.clear()
+
     def branch(self, a: BranchPort, b: ExtValPort):
         b1, b2 = a.aux()
         branch, z, p = self._copy_with_new_aux(a)
@@ -247,40 +615,3 @@ class IVM(ExecutionContext):
                 register is None
             ), f"Found unempty register {register}, instructions did not complete cleanly"
 
-
-def _find_either_is(a: Port, b: Port, goal: type[_P]) -> tuple[_P, Port] | None:
-    if isinstance(a, goal):
-        return a, b
-    if isinstance(b, goal):
-        return b, a
-    return None
-
-
-def _find_both_are(a: Port, b: Port, goal: type[_P]) -> tuple[_P, _P] | None:
-    if isinstance(a, goal) and isinstance(b, goal):
-        return a, b
-    return None
-
-
-def _find_both_one_of(
-    a: Port, b: Port, at: Iterable[type[Port]]
-) -> tuple[Port, Port] | None:
-    for t in at:
-        if isinstance(a, t):
-            break
-    else:
-        return None
-    for t in at:
-        if isinstance(b, t):
-            return a, b
-    return None
-
-
-def _find_and_orient_both(
-    a: Port, b: Port, goal_a: type[_P], goal_b: type[_Q]
-) -> tuple[_P, _Q] | None:
-    if isinstance(a, goal_a) and isinstance(b, goal_b):
-        return a, b
-    if isinstance(b, goal_a) and isinstance(a, goal_b):
-        return b, a
-    return None
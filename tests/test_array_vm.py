@@ -0,0 +1,109 @@
+import os
+from io import BytesIO, TextIOWrapper
+
+import pytest
+
+from ivm.array_vm import ArrayIVM
+from ivm.compat import add_std_compat
+from ivm.extrinsics import ExtVal
+from ivm.host import Host
+from ivm.vm import IVM
+from tests.conftest import PROGRAMS_DIR
+
+
+def run_counting(ivm, path: str, stdin_data: str = "") -> tuple[str, int, Host]:
+    host = Host(
+        ivm=ivm,
+        stdout=TextIOWrapper(BytesIO()),
+        stdin=TextIOWrapper(BytesIO(stdin_data.encode())),
+        program_cache=False,
+    )
+    add_std_compat(host)
+    host.parse_file(path)
+    host.boot("::main", ExtVal(0))
+    interactions = sum(1 for _ in host.ivm.normalize())
+    host.stdout.flush()
+    return host.stdout.buffer.getvalue().decode(), interactions, host
+
+
+def commute_heavy(tmp_path, depth: int) -> str:
+    def tree(d: int) -> str:
+        return "1" if d == 0 else f"x({tree(d - 1)} {tree(d - 1)})"
+
+    path = tmp_path / "dup.iv"
+    path.write_text(f"::main {{\n  x(a b)\n  dup(a b) = {tree(depth)}\n}}\n")
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "program, stdin_data",
+    [("hihi.iv", ""), ("fizzbuzz.iv", ""), ("cat.iv", "hello, world")],
+)
+def test_matches_object_engine(program, stdin_data):
+    path = os.path.join(PROGRAMS_DIR, program)
+    expected = run_counting(IVM(), path, stdin_data)
+    output, interactions, host = run_counting(ArrayIVM(), path, stdin_data)
+    assert (output, interactions) == expected[:2]
+    assert host.ivm.live_nodes() == 0
+    assert not any(host.ivm.values)
+
+
+def test_commute_heavy_matches_object_engine(tmp_path):
+    path = commute_heavy(tmp_path, 6)
+    expected = run_counting(IVM(), path)
+    _, interactions, host = run_counting(ArrayIVM(), path)
+    assert interactions == expected[1]
+    assert host.ivm.live_nodes() == 0
+
+
+def test_free_list_reuses_slots(tmp_path):
+    path = os.path.join(PROGRAMS_DIR, "fizzbuzz.iv")
+    _, interactions, host = run_counting(ArrayIVM(), path)
+    assert host.ivm.top < interactions
+
+
+def test_stats_match(tmp_path):
+    """Both engines report the same counts for the same program."""
+    from ivm.stats import Stats
+
+    path = os.path.join(PROGRAMS_DIR, "fizzbuzz.iv")
+    object_stats, array_stats = Stats(), Stats()
+    _, interactions, _ = run_counting(IVM(stats=object_stats), path)
+    run_counting(ArrayIVM(stats=array_stats), path)
+    assert object_stats.total == interactions
+    assert object_stats.interactions == array_stats.interactions
+    assert object_stats.expansions == array_stats.expansions
+    assert object_stats.ext_calls == array_stats.ext_calls
+    assert object_stats.expansions["::main"] == 1
+    assert object_stats.ext_calls["n32_rem"] > 0
+
+
+@pytest.mark.parametrize("engine", [IVM, ArrayIVM])
+def test_run_and_step_match_normalize(engine):
+    """run and step(n) reduce to the same output in the same number of interactions."""
+    path = os.path.join(PROGRAMS_DIR, "fizzbuzz.iv")
+    expected, interactions, host = run_counting(engine(), path)
+
+    host.boot("::main", ExtVal(0))
+    steps = 1
+    while host.ivm.step(1):
+        steps += 1
+    assert steps == interactions
+    host.boot("::main", ExtVal(0))
+    host.ivm.run()
+    host.stdout.flush()
+    assert host.stdout.buffer.getvalue().decode() == expected * 3
+
+
+def test_long_chain_of_globals(tmp_path):
+    """Loading follows references with a worklist, not one call level per global."""
+    depth = 5000
+    chain = "".join(f"::g{i} {{ ::g{i + 1} }}\n" for i in range(depth))
+    path = tmp_path / "chain.iv"
+    path.write_text(
+        f"::main {{ ::g0 }}\n{chain}"
+        f"::g{depth} {{\n  x(io0 io1)\n  io0 = @io_print_byte(65 io1)\n}}\n"
+    )
+    host = run_counting(ArrayIVM(), str(path))[2]
+    host.flush_output()
+    assert host.stdout.buffer.getvalue() == b"A"
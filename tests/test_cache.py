@@ -0,0 +1,62 @@
+import os
+import shutil
+
+from ivm import cache
+from ivm.compat import add_std_compat
+from ivm.extrinsics import ExtVal
+from ivm.host import Host
+from ivm.parser import IvyParser
+from tests.conftest import PROGRAMS_DIR, run_program
+
+
+def copy_program(tmp_path, name: str) -> str:
+    path = str(tmp_path / name)
+    shutil.copy(os.path.join(PROGRAMS_DIR, name), path)
+    return path
+
+
+def test_cache_round_trip(tmp_path, host):
+    host.program_cache = True
+    path = copy_program(tmp_path, "fizzbuzz.iv")
+    host.parse_file(path)
+    assert os.path.isfile(cache.cache_path(path))
+
+    with open(path, "rb") as f:
+        source = f.read()
+    gs = cache.load(path, source)
+    assert gs is not None
+    assert cache.encode(gs) == cache.encode(host.gs)
+
+
+def test_warm_start_skips_parsing(tmp_path, host, monkeypatch):
+    path = copy_program(tmp_path, "hihi.iv")
+    Host(program_cache=True).parse_file(path)
+    host.program_cache = True
+
+    def fail(*args):
+        raise AssertionError("parsed despite a valid cache entry")
+
+    monkeypatch.setattr(IvyParser, "from_source", fail)
+    assert run_program(host, path) == "hi\nhi\n"
+
+
+def test_cache_invalidation(tmp_path, host):
+    host.program_cache = True
+    path = copy_program(tmp_path, "hihi.iv")
+    host.parse_file(path)
+    with open(path) as f:
+        source = f.read()
+    with open(path, "w") as f:
+        f.write(source.replace("104", "72"))
+    assert run_program(host, path) == "Hi\nHi\n"
+
+    with open(cache.cache_path(path), "wb") as f:
+        f.write(b"garbage")
+    with open(path, "rb") as f:
+        assert cache.load(path, f.read()) is None
+
+
+def test_no_cache_by_default(tmp_path, host):
+    path = copy_program(tmp_path, "hihi.iv")
+    assert run_program(host, path) == "hi\nhi\n"
+    assert not os.path.exists(cache.cache_path(path))
@@ -0,0 +1,118 @@
+import gc
+import threading
+from io import BytesIO, TextIOWrapper
+
+import pytest
+
+from ivm.channels import EOF, InputChannel, OutputChannel
+from tests.conftest import run_program
+
+
+def written(channel: OutputChannel) -> bytes:
+    return channel.stream.buffer.getvalue()
+
+
+def write_all(channel: OutputChannel, data: bytes) -> None:
+    for b in data:
+        channel.write_byte(b)
+
+
+def test_explicit_waits_for_io_flush():
+    channel = OutputChannel(TextIOWrapper(BytesIO()))
+    write_all(channel, b"hi\nthere")
+    assert written(channel) == b""
+    channel.request_flush()
+    assert written(channel) == b"hi\nthere"
+
+
+def test_line_flushes_at_newlines():
+    channel = OutputChannel(TextIOWrapper(BytesIO()), "line")
+    write_all(channel, b"hi\nthere")
+    assert written(channel) == b"hi\n"
+
+
+def test_size_flushes_only_when_full():
+    channel = OutputChannel(TextIOWrapper(BytesIO()), "size", size=4)
+    write_all(channel, b"hi\nth")
+    assert written(channel) == b"hi\nt"
+    channel.request_flush()
+    assert written(channel) == b"hi\nt"
+    channel.flush()
+    assert written(channel) == b"hi\nth"
+
+
+def test_timer_flushes_once_due():
+    channel = OutputChannel(TextIOWrapper(BytesIO()), "timer", interval=0.0)
+    write_all(channel, b"a")
+    assert written(channel) == b"a"
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        OutputChannel(TextIOWrapper(BytesIO()), "never")
+
+
+def test_blocks_go_to_the_fd(tmp_path):
+    path = tmp_path / "out"
+    with open(path, "w") as stream:
+        stream.write("text first, ")
+        channel = OutputChannel(stream)
+        write_all(channel, b"then bytes")
+        channel.flush()
+        assert path.read_bytes() == b"text first, then bytes"
+
+
+def test_host_flushes_at_the_end_of_a_run(host):
+    host.flush_policy = "size"
+    assert run_program(host, "hihi.iv") == "hi\nhi\n"
+
+
+class CountingBytesIO(BytesIO):
+    reads = 0
+
+    def read1(self, size=-1):
+        self.reads += 1
+        return super().read1(size)
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_input_reads_chunks_then_eof(prefetch):
+    raw = CountingBytesIO(b"hello")
+    channel = InputChannel(TextIOWrapper(raw), chunk_size=2, prefetch=prefetch)
+    assert [channel.read_byte() for _ in range(7)] == [*b"hello", EOF, EOF]
+    # Three chunks and the empty read that found the end, then no more.
+    assert raw.reads == 4
+
+
+def test_host_prefetches_stdin(host):
+    host.prefetch_stdin = True
+    assert run_program(host, "cat.iv", stdin_data="hello") == "hello"
+
+
+def test_prefetch_waits_for_the_first_read():
+    raw = CountingBytesIO(b"hello")
+    channel = InputChannel(TextIOWrapper(raw), prefetch=True)
+    assert raw.reads == 0
+    assert channel.read_byte() == ord("h")
+
+
+def test_host_leaves_a_replaced_stdin_unread(host):
+    replaced = TextIOWrapper(CountingBytesIO(b"not this"))
+    host.stdin = replaced
+    host.prefetch_stdin = True
+    host.bind_channels()
+    assert run_program(host, "cat.iv", stdin_data="hello") == "hello"
+    assert replaced.buffer.reads == 0
+
+
+def test_abandoned_channel_stops_its_reader():
+    channel = InputChannel(
+        TextIOWrapper(BytesIO(bytes(1 << 16))), chunk_size=16, prefetch=True, ahead=1
+    )
+    before = set(threading.enumerate())
+    channel.read_byte()
+    (reader,) = set(threading.enumerate()) - before
+    del channel
+    gc.collect()
+    reader.join(1)
+    assert not reader.is_alive()
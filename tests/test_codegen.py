@@ -0,0 +1,30 @@
+import pytest
+
+from ivm.codegen import UncleanInstructions, compile_global
+from ivm.globals import Global, Nilary
+from ivm.heap import ErasePort
+from tests.conftest import run_program
+from tests.test_programs import fizzbuzz_expected
+
+
+def test_compiled_hihi(host):
+    host.compile_globals = True
+    assert run_program(host, "hihi.iv") == "hi\nhi\n"
+    assert all(g.compiled is not None for g in host.gs.values())
+
+
+def test_compiled_fizzbuzz(host):
+    host.compile_globals = True
+    assert run_program(host, "fizzbuzz.iv") == fizzbuzz_expected()
+
+
+def test_compiled_cat(host):
+    host.compile_globals = True
+    assert run_program(host, "cat.iv", stdin_data="hello") == "hello"
+
+
+def test_unclean_instructions():
+    g = Global(name="::unclean")
+    g.instructions.append(Nilary(g.instructions.new_register(), ErasePort()))
+    with pytest.raises(UncleanInstructions):
+        compile_global(g)
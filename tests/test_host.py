@@ -0,0 +1,207 @@
+import asyncio
+import functools
+import os
+import threading
+
+import pytest
+
+from ivm.array_vm import ArrayIVM
+from ivm.extrinsics import ExtVal
+from ivm.globals import Binary
+from ivm.host import ParkedCalls
+from ivm.threaded_vm import ThreadedIVM
+from ivm.vm import IVM
+from tests.conftest import PROGRAMS_DIR
+from tests.test_programs import fizzbuzz_expected
+
+
+def boot_fizzbuzz(host):
+    host.parse_file(os.path.join(PROGRAMS_DIR, "fizzbuzz.iv"))
+    host.boot("::main", ExtVal(0))
+
+
+def output(host) -> str:
+    host.stdout.flush()
+    return host.stdout.buffer.getvalue().decode()
+
+
+def test_run_async(host):
+    boot_fizzbuzz(host)
+    asyncio.run(host.run_async(slice_interactions=10))
+    assert output(host) == fizzbuzz_expected()
+
+
+def test_run_async_time_slices(host):
+    boot_fizzbuzz(host)
+    asyncio.run(host.run_async(slice_interactions=1, slice_seconds=0.0001))
+    assert output(host) == fizzbuzz_expected()
+
+
+def test_run_async_yields_between_slices(host):
+    """Other tasks run while a net is being reduced."""
+    boot_fizzbuzz(host)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        await host.run_async(slice_interactions=10)
+        task.cancel()
+
+    asyncio.run(main())
+    assert ticks > 10
+
+
+def test_run_async_cancel_and_resume(host):
+    """A cancelled run leaves the net resumable."""
+    boot_fizzbuzz(host)
+
+    async def cancel_midway():
+        task = asyncio.create_task(host.run_async(slice_interactions=10))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancel_midway())
+    assert host.ivm.active_fast or host.ivm.active_slow
+    host.execute()
+    assert output(host) == fizzbuzz_expected()
+
+
+ECHO = """
+::main {
+  x(a b)
+  a = @io_print_byte(b _)
+}
+"""
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_map(host, tmp_path, processes):
+    """Each input gets its own run and its own output, in input order."""
+    path = tmp_path / "echo.iv"
+    path.write_text(ECHO)
+    host.parse_file(str(path))
+    inputs = [ord(c) for c in "hello"]
+    assert list(host.map(inputs, processes=processes)) == list("hello")
+    assert output(host) == ""
+
+
+FETCH_TWO = """
+::main {
+  x(io0 io3)
+  io0 = @io_read_byte(c io1)
+  io1 = @io_print_byte(a io2)
+  io2 = @io_print_byte(b io3)
+  @fetch(c a) = 64
+  @fetch_other(1 b) = 64
+}
+"""
+
+
+@pytest.mark.parametrize("engine", [IVM, ArrayIVM])
+def test_awaitable_extrinsics_overlap(host, tmp_path, engine):
+    """Calls returning awaitables are parked and awaited together, not one by one."""
+    host.ivm = engine(extrinsics=host.ivm.extrinsics)
+    other_started = asyncio.Event()
+
+    async def fetch(a, b):
+        # Only finishes if fetch_other is in flight at the same time.
+        await asyncio.wait_for(other_started.wait(), 1)
+        return a + b
+
+    async def fetch_other(a, b):
+        other_started.set()
+        await asyncio.sleep(0)
+        return a + b
+
+    async def io_read_byte(io):
+        return 1, io
+
+    host.add_ext_fun(fetch)
+    host.add_ext_fun(fetch_other)
+    host.add_split_ext_fn(io_read_byte)
+    path = tmp_path / "fetch.iv"
+    path.write_text(FETCH_TWO)
+    host.parse_file(str(path))
+    host.boot("::main", ExtVal(0))
+    asyncio.run(host.run_async())
+    assert output(host) == "AA"
+
+
+def test_execute_refuses_to_leave_calls_parked(host, tmp_path):
+    async def fetch(a, b):
+        return a + b
+
+    async def fetch_other(a, b):
+        return a + b
+
+    host.add_ext_fun(fetch)
+    host.add_ext_fun(fetch_other)
+    path = tmp_path / "fetch.iv"
+    path.write_text(FETCH_TWO)
+    host.parse_file(str(path))
+    host.boot("::main", ExtVal(0))
+    with pytest.raises(ParkedCalls):
+        host.execute()
+    for awaitable, _ in host.ivm.parked:
+        awaitable.close()
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [IVM, ArrayIVM, functools.partial(ThreadedIVM, threads=2, force_threads=True)],
+)
+@pytest.mark.parametrize("use_async", [False, True])
+def test_blocking_extrinsics_overlap(host, tmp_path, engine, use_async):
+    """Blocking extrinsics run on the executor together, and reduction waits for them."""
+    host.ivm = engine(extrinsics=host.ivm.extrinsics)
+    other_started = threading.Event()
+
+    def fetch(a, b):
+        # Only finishes if fetch_other is running at the same time.
+        assert other_started.wait(1)
+        return a + b
+
+    def fetch_other(a, b):
+        other_started.set()
+        return a + b
+
+    def io_read_byte(io):
+        return 1, io
+
+    host.add_ext_fun(fetch, blocking=True)
+    host.add_ext_fun(fetch_other, blocking=True)
+    host.add_split_ext_fn(io_read_byte, blocking=True)
+    path = tmp_path / "fetch.iv"
+    path.write_text(FETCH_TWO)
+    host.parse_file(str(path))
+    host.boot("::main", ExtVal(0))
+    if use_async:
+        asyncio.run(host.run_async())
+    else:
+        host.execute()
+    assert output(host) == "AA"
+    assert not host.ivm.offloaded
+
+
+def test_parse_file_deeply_nested(host, tmp_path):
+    host.program_cache = True
+    depth = 20_000
+    path = tmp_path / "deep.iv"
+    path.write_text("::main { " + "x(_ " * depth + "1" + ")" * depth + " }\n")
+    for _ in range(2):  # the second time from the program cache
+        host.parse_file(str(path))
+        instructions = host.gs["::main"].instructions.instructions
+        assert sum(isinstance(i, Binary) for i in instructions) == depth
+    host.boot("::main", ExtVal(0))
+    host.execute()
@@ -0,0 +1,74 @@
+import math
+
+import pytest
+
+from ivm.array_vm import EXT_FN, LABEL_BITS, TAG_BITS, ArrayIVM
+from ivm.extrinsics import ExtFnPort, ExtVal, Extrinsics
+from ivm.heap import make_wire_pair
+from ivm.intrinsics import INTRINSICS, f32, install_intrinsics
+from ivm.labels import intern
+from ivm.vm import IVM
+
+
+def test_n32_wraps():
+    assert INTRINSICS["n32_add"](0xFFFFFFFF, 2) == 1
+    assert INTRINSICS["n32_sub"](2, 3) == 0xFFFFFFFF
+    assert INTRINSICS["n32_mul"](0x10000, 0x10000) == 0
+    assert INTRINSICS["n32_lt"](1, 0xFFFFFFFF) == 1
+    with pytest.raises(ZeroDivisionError):
+        INTRINSICS["n32_div"](1, 0)
+
+
+def test_f32_rounds():
+    assert f32(0.1) != 0.1
+    assert INTRINSICS["f32_add"](0.1, 0.2) == f32(f32(0.1) + f32(0.2))
+    assert INTRINSICS["f32_mul"](1e30, 1e30) == math.inf
+    assert INTRINSICS["f32_div"](1.0, 0.0) == math.inf
+    assert INTRINSICS["f32_div"](-1.0, 0.0) == -math.inf
+    assert math.isnan(INTRINSICS["f32_div"](0.0, 0.0))
+    assert INTRINSICS["f32_rem"](-7.0, 3.0) == -1.0
+    assert INTRINSICS["f32_eq"](1.0, 1.0) == 1.0
+
+
+def intrinsic_ivm(engine=IVM):
+    extrinsics = Extrinsics()
+    install_intrinsics(extrinsics)
+    return engine(extrinsics=extrinsics)
+
+
+def test_ivm_applies_intrinsics():
+    ivm = intrinsic_ivm()
+    outs = []
+    for label in ["n32_sub", "n32_sub$"]:
+        w = make_wire_pair()[0]
+        w.target = ExtVal(3)
+        ivm.link(ExtFnPort(label=intern(label), target=w), ExtVal(2))
+        outs.append(w.other_half)
+    ivm.run()
+    assert [out.load_target().value for out in outs] == [0xFFFFFFFF, 1]
+
+
+def test_array_ivm_applies_intrinsics():
+    ivm = intrinsic_ivm(ArrayIVM)
+    outs = []
+    for label in ["n32_sub", "n32_sub$"]:
+        node = ivm.alloc_node()
+        ivm.heap[node] = ivm.new_value(3)
+        fn = (node << LABEL_BITS | intern(label)) << TAG_BITS | EXT_FN
+        ivm.link(fn, ivm.new_value(2))
+        outs.append(node ^ 1)
+    ivm.run()
+    assert [ivm.take_value(ivm.heap[out]) for out in outs] == [0xFFFFFFFF, 1]
+
+
+def test_registered_function_replaces_intrinsic(host):
+    def n32_add(a, b):
+        return -1
+
+    host.add_ext_fun(n32_add)
+    ivm = host.ivm
+    w = make_wire_pair()[0]
+    w.target = ExtVal(1)
+    ivm.link(ExtFnPort(label=intern("n32_add"), target=w), ExtVal(1))
+    ivm.run()
+    assert w.other_half.load_target().value == -1
@@ -0,0 +1,22 @@
+from ivm.extrinsics import ExtFnPort
+from ivm.heap import make_wire_pair
+from ivm.labels import BRANCH_LABEL, LabelTable, intern, label_name
+
+
+def test_intern_round_trips():
+    table = LabelTable()
+    x = table.intern("x")
+    assert table.intern("x") == x
+    assert table.intern("y") != x
+    assert table.name(x) == "x"
+    assert table.name(table.intern("n32_add$")) == "n32_add$"
+    assert label_name(BRANCH_LABEL) == "" and BRANCH_LABEL == 0
+
+
+def test_swapped_extrinsic_shares_its_name():
+    add, swapped = intern("n32_add"), intern("n32_add$")
+    assert swapped == add ^ 1
+    port = ExtFnPort(target=make_wire_pair()[0], label=add)
+    assert not port.swapped and port.swap().swapped
+    assert port.swap().label == swapped
+    assert port.swap().unwrap_label() == port.unwrap_label() == "n32_add"
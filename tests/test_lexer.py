@@ -1,4 +1,7 @@
+import pytest
+
 from ivm.lexer import (
+    SyntaxError,
     Lexer,
     global_,
     open_brace,
@@ -47,3 +50,26 @@ def test_tokenize():
             close_brace,
         ]
     )
+
+
+def test_tokenize_multiline_comment():
+    lexer = Lexer.from_source("a /* one\n /* two */\n */ ::b\n  c(")
+    tokens = list(lexer.tokenize())
+    assert tokens == [
+        (ident_, "a"),
+        (global_, "::b"),
+        (ident_, "c"),
+        (open_paren, "("),
+    ]
+    assert lexer.position == (3, (3, 4))
+
+
+def test_tokenize_unterminated_comment():
+    lexer = Lexer.from_source("a\n/* /* */")
+    with pytest.raises(SyntaxError, match="line 2"):
+        list(lexer.tokenize())
+
+
+def test_take_source():
+    lexer = Lexer.from_source("ab cd\nef\ngh ij\n")
+    assert lexer.take_source((0, (3, 5)), (2, (0, 2))) == ["cd", "ef"]
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from ivm.array_vm import COMB, LABEL_BITS, TAG_BITS
+from ivm.compat import add_std_compat
+from ivm.extrinsics import ExtVal
+from ivm.globals import GlobalPort
+from ivm.heap import CombPort, WirePort, make_wire_pair
+from ivm.labels import intern
+from ivm.host import Host
+from ivm.parallel_vm import ParallelIVM, WorkerFailed
+from ivm.vm import IVM
+
+SUM = """
+::sum {
+  fn(dup(n0 n1) out)
+  n0 = ?(::one ::node fn(n1 out))
+}
+
+::one { fn(_ 1) }
+
+::node {
+  fn(n out)
+  n = @n32_sub(1 dup(a b))
+  ::sum = fn(a l)
+  ::sum = fn(b r)
+  l = @n32_add(r out)
+}
+"""
+
+# Builds a tree of x nodes, duplicates it (commuting dup through every node)
+# and sums the leaves of both copies.
+DUP_SUM = """
+::tree {
+  fn(dup(n0 n1) t)
+  n0 = ?(::leaf ::branch fn(n1 t))
+}
+
+::leaf { fn(_ 1) }
+
+::branch {
+  fn(n x(l r))
+  n = @n32_sub(1 dup(a b))
+  ::tree = fn(a l)
+  ::tree = fn(b r)
+}
+
+::sum_tree {
+  fn(dup(d0 d1) k)
+  d0 = ?(::id ::sum_branch fn(d1 k))
+}
+
+::id { fn(_ fn(t t)) }
+
+::sum_branch {
+  fn(d fn(x(l r) out))
+  d = @n32_sub(1 dup(a b))
+  ::sum_tree = fn(a fn(l sl))
+  ::sum_tree = fn(b fn(r sr))
+  sl = @n32_add(sr out)
+}
+
+::main {
+  fn(dup(n0 dup(n1 n2)) out)
+  ::tree = fn(n0 t)
+  dup(a b) = t
+  ::sum_tree = fn(n1 fn(a sa))
+  ::sum_tree = fn(n2 fn(b sb))
+  sa = @n32_add(sb out)
+}
+"""
+
+FLOAT = """
+::main {
+  fn(x out)
+  x = @f32_mul(+0.5 @f32_add(+1.25 out))
+}
+"""
+
+
+def load(tmp_path, source: str, ivm) -> Host:
+    path = tmp_path / "program.iv"
+    path.write_text(source)
+    host = Host(ivm=ivm, program_cache=False)
+    add_std_compat(host)
+    host.parse_file(str(path))
+    return host
+
+
+def apply_object(host: Host, name: str, value):
+    wire = make_wire_pair()[0]
+    wire.target = ExtVal(value)
+    host.ivm.link(GlobalPort(global_ref=host.gs[name]), CombPort(target=wire, label=intern("fn")))
+    host.execute()
+    # In normal form the result may still sit at the end of a chain of wires.
+    return host.ivm.follow(WirePort(wire=wire.other_half), False).value
+
+
+def apply_parallel(host: Host, name: str, value):
+    ivm = host.ivm
+    node = ivm.alloc_node()
+    ivm.heap[node] = ivm.new_value(value)
+    fn = (node << LABEL_BITS | intern("fn")) << TAG_BITS | COMB
+    ivm.link(ivm.global_word(host.gs[name]), fn)
+    host.execute()
+    return ivm.take_value(ivm.heap[node ^ 1])
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+@pytest.mark.parametrize(
+    "source, name, value",
+    [(SUM, "::sum", 8), (DUP_SUM, "::main", 6), (FLOAT, "::main", 3.0)],
+)
+def test_matches_object_engine(tmp_path, workers, source, name, value):
+    expected = apply_object(load(tmp_path, source, IVM()), name, value)
+    host = load(tmp_path, source, ParallelIVM(workers=workers, heap_slots=1 << 16))
+    assert apply_parallel(host, name, value) == expected
+
+
+def test_runs_again(tmp_path):
+    """Heap regions carry over between runs, so earlier results stay intact."""
+    host = load(tmp_path, SUM, ParallelIVM(workers=2, heap_slots=1 << 16))
+    assert apply_parallel(host, "::sum", 5) == 32
+    assert apply_parallel(host, "::sum", 6) == 64
+
+
+def test_worker_failure(tmp_path):
+    host = load(tmp_path, SUM, ParallelIVM(workers=2, heap_slots=1 << 16))
+
+    def n32_add(a, b):
+        return 1 // 0
+
+    host.add_ext_fun(n32_add)
+    with pytest.raises(WorkerFailed):
+        apply_parallel(host, "::sum", 3)
+
+
+def test_run_async_refused(tmp_path):
+    host = load(tmp_path, SUM, ParallelIVM(workers=2, heap_slots=1 << 16))
+    host.boot("::sum", ExtVal(3))
+    with pytest.raises(NotImplementedError, match="use execute"):
+        asyncio.run(host.run_async())
+
+
+def test_values_must_be_numbers():
+    with pytest.raises(TypeError):
+        ParallelIVM(workers=1, heap_slots=1 << 10).new_value("text")
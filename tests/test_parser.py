@@ -0,0 +1,63 @@
+import pytest
+
+from ivm.lexer import Lexer
+from ivm.parser import IvyParser, IvyParserState, SyntaxError
+from ivm.tree import (
+    BlackBox,
+    BranchNode,
+    CombNode,
+    Erase,
+    ExtFnNode,
+    F32Node,
+    GlobalNode,
+    N32Node,
+    Net,
+    VarNode,
+)
+
+
+def parse(source: str):
+    return IvyParser(IvyParserState(Lexer.from_source(source), "<test>")).parse_nets()
+
+
+def test_parse_net():
+    nets = parse(
+        """
+::main {
+  fn(a #[b])
+  a = @n32_add$(0x10 ?(::main _ dup(b +1.5)))
+}
+"""
+    )
+    assert nets["::main"] == Net(
+        CombNode("fn", VarNode("a"), BlackBox(VarNode("b"))),
+        (
+            (
+                VarNode("a"),
+                ExtFnNode(
+                    "n32_add$",
+                    N32Node(16),
+                    BranchNode(
+                        GlobalNode("::main"),
+                        Erase(),
+                        CombNode("dup", VarNode("b"), F32Node(1.5)),
+                    ),
+                ),
+            ),
+        ),
+    )
+
+
+def test_parse_deeply_nested():
+    depth = 100_000
+    nets = parse("::list { " + "cons(_ " * depth + "nil" + ")" * depth + " }")
+    tree = nets["::list"].root
+    for _ in range(depth):
+        assert isinstance(tree, CombNode) and tree.label == "cons"
+        tree = tree.right
+    assert tree == VarNode("nil")
+
+
+def test_parse_unclosed():
+    with pytest.raises(SyntaxError, match="Unexpected end of input"):
+        parse("::main { x(a ")
@@ -0,0 +1,63 @@
+from ivm.extrinsics import ExtVal
+from ivm.globals import Binary
+from ivm.labels import intern
+from ivm.prereduce import pre_reduce, reduced_instructions
+from ivm.stats import Stats
+from ivm.vm import IVM
+from tests.conftest import run_program
+from tests.test_programs import fizzbuzz_expected
+
+CONSTS = """
+::main {
+  x(io0 io1)
+  ::consts = x(a b)
+  io0 = @io_print_byte(a @io_print_byte(b io1))
+}
+
+::consts {
+  x(a b)
+  dup(a b) = c
+  1 = ?(_ 72 c)
+}
+"""
+
+
+def run_source(host, tmp_path, source: str) -> str:
+    path = tmp_path / "program.iv"
+    path.write_text(source)
+    host.parse_file(str(path))
+    host.boot("::main", ExtVal(0))
+    host.execute()
+    host.stdout.flush()
+    return host.stdout.buffer.getvalue().decode()
+
+
+def test_constant_global_is_reduced(host, tmp_path):
+    host.pre_reduce = True
+    host.ivm = IVM(extrinsics=host.ivm.extrinsics, stats=Stats())
+    assert run_source(host, tmp_path, CONSTS) == "HH"
+    consts = host.gs["::consts"]
+    # Left with x(72 72): the comb and its two constants.
+    assert len(consts.instructions.instructions) == 3
+    assert not any(
+        isinstance(i, Binary) and i.tag == "Branch" for i in consts.instructions
+    )
+    assert host.ivm.stats.interactions["branch"] == 0
+    assert consts.contains_label(intern("x"))
+
+
+def test_opaque_pairs_are_kept(host):
+    """Global references and extrinsic calls are left for the VM."""
+    host.pre_reduce = True
+    assert run_program(host, "fizzbuzz.iv") == fizzbuzz_expected()
+    assert all(reduced_instructions(g, host.gs) is None for g in host.gs.values())
+
+
+def test_budget(host, tmp_path):
+    path = tmp_path / "program.iv"
+    path.write_text(CONSTS)
+    host.parse_file(str(path))
+    before = host.gs["::consts"].instructions
+    assert reduced_instructions(host.gs["::consts"], host.gs, budget=1) is None
+    assert pre_reduce(host.gs, budget=1) == 0
+    assert host.gs["::consts"].instructions is before
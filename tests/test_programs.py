@@ -1,3 +1,4 @@
+from ivm.vm import IVM
 from tests.conftest import run_program
 
 
@@ -6,10 +7,9 @@ def test_hihi(host):
     assert output == "hi\nhi\n"
 
 
-def test_fizzbuzz(host):
-    output = run_program(host, "fizzbuzz.iv")
+def fizzbuzz_expected(end: int = 20) -> str:
     expected_lines = []
-    for n in range(1, 21):
+    for n in range(1, end + 1):
         if n % 15 == 0:
             expected_lines.append("FizzBuzz")
         elif n % 3 == 0:
@@ -18,10 +18,32 @@ def test_fizzbuzz(host):
             expected_lines.append("Buzz")
         else:
             expected_lines.append(str(n))
-    expected = "\n".join(expected_lines) + "\n"
-    assert output == expected
+    return "\n".join(expected_lines) + "\n"
+
+
+def test_fizzbuzz(host):
+    output = run_program(host, "fizzbuzz.iv")
+    assert output == fizzbuzz_expected()
 
 
 def test_cat(host):
     output = run_program(host, "cat.iv", stdin_data="hello")
     assert output == "hello"
+
+
+def test_fizzbuzz_batched_calls(host):
+    host.ivm = IVM(extrinsics=host.ivm.extrinsics, batch_calls=8)
+    assert run_program(host, "fizzbuzz.iv") == fizzbuzz_expected()
+
+
+def test_added_ext_fn_replaces_batched_form(host):
+    host.ivm = IVM(extrinsics=host.ivm.extrinsics, batch_calls=8)
+    calls = []
+
+    def n32_rem(a, b):
+        calls.append((a, b))
+        return a % b
+
+    host.add_ext_fun(n32_rem)
+    assert run_program(host, "fizzbuzz.iv") == fizzbuzz_expected()
+    assert calls
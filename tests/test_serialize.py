@@ -0,0 +1,86 @@
+from ivm.globals import GlobalPort, Nilary
+from ivm.labels import LABELS, intern
+from ivm.serialize import inline_globals
+from ivm.stats import Stats
+from ivm.vm import IVM
+from tests.conftest import run_program
+from tests.test_programs import fizzbuzz_expected
+
+GRAPH = """
+::main { fn(::small fn(::big fn(::a ::loop))) }
+
+::small { x(_ ::leaf) }
+::leaf { 1 }
+::big { x(x(x(1 2) x(3 4)) x(x(5 6) x(7 8))) }
+
+::a { x(::b _) }
+::b { x(::a _) }
+
+::loop {
+  x(n r)
+  n = ?(::small ::loop r)
+}
+"""
+
+
+def references(g) -> list[str]:
+    return [
+        i.port.global_ref.name
+        for i in g.instructions
+        if isinstance(i, Nilary) and isinstance(i.port, GlobalPort)
+    ]
+
+
+def label_names(g) -> set[str]:
+    return {
+        LABELS.name(label) for label in range(2 * len(LABELS)) if g.contains_label(label)
+    }
+
+
+def test_inlines_small_acyclic_globals(host, tmp_path):
+    path = tmp_path / "graph.iv"
+    path.write_text(GRAPH)
+    host.parse_file(str(path))
+    gs = host.gs
+    # ::leaf into ::small, then ::small (now without references) into ::main.
+    assert inline_globals(gs, 8) == 2
+    assert references(gs["::small"]) == []
+    assert sorted(references(gs["::main"])) == ["::a", "::big", "::loop"]
+    # ::big is too large; cycles and branch arms stay references.
+    assert references(gs["::a"]) == ["::b"]
+    assert references(gs["::b"]) == ["::a"]
+    assert sorted(references(gs["::loop"])) == ["::loop", "::small"]
+    # ::small's comb is now ::main's own.
+    assert gs["::main"].contains_label(intern("x"))
+
+
+def test_inlined_fizzbuzz_expands_less(host):
+    host.ivm = IVM(extrinsics=host.ivm.extrinsics, stats=Stats())
+    assert run_program(host, "fizzbuzz.iv") == fizzbuzz_expected()
+    before = host.ivm.stats.interactions["expand"]
+
+    host.stdout.seek(0)
+    host.stdout.buffer.truncate(0)
+    host.ivm = IVM(extrinsics=host.ivm.extrinsics, stats=Stats())
+    host.inline_threshold = 16
+    assert run_program(host, "fizzbuzz.iv") == fizzbuzz_expected()
+    assert host.ivm.stats.interactions["expand"] < before
+
+
+def test_labels_are_transitive(host, tmp_path):
+    path = tmp_path / "labels.iv"
+    path.write_text(
+        """
+        ::main { fn(::a _) }
+        ::a { x(::b _) }
+        ::b { y(::a ::c) }
+        ::c { z(_ _) }
+        """
+    )
+    host.parse_file(str(path))
+    gs = host.gs
+    assert label_names(gs["::main"]) == {"fn", "x", "y", "z"}
+    # ::a and ::b reach each other, so they have the same set.
+    assert gs["::a"].labels == gs["::b"].labels
+    assert label_names(gs["::a"]) == {"x", "y", "z"}
+    assert label_names(gs["::c"]) == {"z"}
@@ -0,0 +1,83 @@
+import os
+import sys
+from io import BytesIO, TextIOWrapper
+
+import pytest
+
+from ivm import threaded_vm
+from ivm.compat import add_std_compat
+from ivm.extrinsics import ExtVal
+from ivm.host import Host
+from ivm.threaded_vm import ThreadedIVM
+from tests.conftest import PROGRAMS_DIR
+from tests.test_parallel_vm import DUP_SUM, SUM, apply_object, load
+from tests.test_programs import fizzbuzz_expected
+
+
+@pytest.fixture
+def switch_often():
+    """Makes the GIL switch threads as often as it can, to interleave workers."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def threaded(threads: int = 3) -> ThreadedIVM:
+    return ThreadedIVM(threads=threads, force_threads=True)
+
+
+@pytest.mark.parametrize("threads", [2, 4])
+@pytest.mark.parametrize("source, name, value", [(SUM, "::sum", 8), (DUP_SUM, "::main", 6)])
+def test_matches_serial(tmp_path, switch_often, threads, source, name, value):
+    expected = apply_object(load(tmp_path, source, ThreadedIVM(threads=1)), name, value)
+    assert apply_object(load(tmp_path, source, threaded(threads)), name, value) == expected
+
+
+@pytest.mark.parametrize(
+    "program, stdin_data, expected",
+    [
+        ("fizzbuzz.iv", "", fizzbuzz_expected()),
+        ("cat.iv", "hello, world", "hello, world"),
+    ],
+)
+def test_io_stays_ordered(switch_often, program, stdin_data, expected):
+    """Extrinsics run on worker threads, but the IO token keeps them in order."""
+    host = Host(
+        ivm=threaded(),
+        stdout=TextIOWrapper(BytesIO()),
+        stdin=TextIOWrapper(BytesIO(stdin_data.encode())),
+        program_cache=False,
+    )
+    add_std_compat(host)
+    host.parse_file(os.path.join(PROGRAMS_DIR, program))
+    host.boot("::main", ExtVal(0))
+    host.execute()
+    host.stdout.flush()
+    assert host.stdout.buffer.getvalue().decode() == expected
+
+
+@pytest.mark.parametrize("option", [{"eager_erase": True}, {"batch_calls": 4}])
+def test_serial_only_options_refused(tmp_path, option):
+    ivm = load(tmp_path, SUM, ThreadedIVM(threads=2, force_threads=True, **option))
+    with pytest.raises(NotImplementedError):
+        apply_object(ivm, "::sum", 8)
+
+
+def test_worker_error_propagates(tmp_path):
+    host = load(tmp_path, SUM, threaded())
+
+    def n32_add(a, b):
+        return 1 // 0
+
+    host.add_ext_fun(n32_add)
+    with pytest.raises(ZeroDivisionError):
+        apply_object(host, "::sum", 4)
+
+
+def test_serial_with_gil(tmp_path, monkeypatch):
+    """Without force_threads, a GIL build reduces on the calling thread."""
+    monkeypatch.setattr(threaded_vm, "gil_enabled", lambda: True)
+    monkeypatch.setattr(threaded_vm, "_Worker", None)
+    host = load(tmp_path, SUM, ThreadedIVM(threads=4))
+    assert apply_object(host, "::sum", 5) == 32
@@ -1,15 +1,20 @@
 import dataclasses
 
+import pytest
+
 from ivm.extrinsics import PrimitiveExtValPort, ExtFnPort, Extrinsics
 from ivm.globals import GlobalPort, Global, Instructions, Nilary, Binary
 from ivm.heap import (
+    BinaryNodePort,
+    NilaryNodePort,
     ErasePort,
     CombPort,
     BranchPort,
     WirePort,
     make_wire_pair,
 )
-from ivm.vm import IVM
+from ivm.labels import BRANCH_LABEL, intern
+from ivm.vm import IVM, INTERACT_RULES, LINK_RULES, NoRule
 
 
 def make_ivm(**kwargs):
@@ -26,8 +31,8 @@ def test_annihilate():
     ivm = make_ivm()
     w1 = make_wire_pair()[0]
     w2 = make_wire_pair()[0]
-    a = CombPort(label="x", target=w1)
-    b = CombPort(label="x", target=w2)
+    a = CombPort(label=intern("x"), target=w1)
+    b = CombPort(label=intern("x"), target=w2)
     val1 = PrimitiveExtValPort((42))
     val2 = PrimitiveExtValPort((99))
     w1.target = val1
@@ -43,7 +48,7 @@ def test_copy_erase():
     """Erase node copies to both aux ports of a binary node."""
     ivm = make_ivm()
     w = make_wire_pair()[0]
-    comb = CombPort(label="x", target=w)
+    comb = CombPort(label=intern("x"), target=w)
     erase = ErasePort()
     ivm.link(erase, comb)
     run_to_normal(ivm)
@@ -56,7 +61,7 @@ def test_copy_extval():
     """ExtVal copies to both aux ports of a binary node."""
     ivm = make_ivm()
     w = make_wire_pair()[0]
-    comb = CombPort(label="x", target=w)
+    comb = CombPort(label=intern("x"), target=w)
     val = PrimitiveExtValPort((7))
     ivm.link(val, comb)
     run_to_normal(ivm)
@@ -87,8 +92,8 @@ def test_branch_zero():
     instr.append(Nilary(r_val, PrimitiveExtValPort((100))))
     instr.append(Nilary(r_zero, PrimitiveExtValPort((200))))
     instr.append(Nilary(r_nonzero, PrimitiveExtValPort((300))))
-    instr.append(Binary("Branch", "", r_inner, r_val, r_zero))
-    instr.append(Binary("Branch", "", 0, r_inner, r_nonzero))
+    instr.append(Binary("Branch", BRANCH_LABEL, r_inner, r_val, r_zero))
+    instr.append(Binary("Branch", BRANCH_LABEL, 0, r_inner, r_nonzero))
 
     # Boot with condition = 0
     ivm.link(GlobalPort(global_ref=g), PrimitiveExtValPort((0)))
@@ -107,8 +112,8 @@ def test_branch_nonzero():
     instr.append(Nilary(r_val, PrimitiveExtValPort((100))))
     instr.append(Nilary(r_zero, PrimitiveExtValPort((200))))
     instr.append(Nilary(r_nonzero, PrimitiveExtValPort((300))))
-    instr.append(Binary("Branch", "", r_inner, r_val, r_zero))
-    instr.append(Binary("Branch", "", 0, r_inner, r_nonzero))
+    instr.append(Binary("Branch", BRANCH_LABEL, r_inner, r_val, r_zero))
+    instr.append(Binary("Branch", BRANCH_LABEL, 0, r_inner, r_nonzero))
 
     ivm.link(GlobalPort(global_ref=g), PrimitiveExtValPort((1)))
     run_to_normal(ivm)
@@ -123,7 +128,7 @@ def test_call_ext_fn():
     rhs = PrimitiveExtValPort((3))
     w.target = rhs
 
-    fn = ExtFnPort(label="n32_add", target=w)
+    fn = ExtFnPort(label=intern("n32_add"), target=w)
     lhs = PrimitiveExtValPort((5))
 
     ivm.link(fn, lhs)
@@ -156,11 +161,11 @@ def test_expand_global_with_comb():
     r_b = g.instructions.new_register()  # 2
     g.instructions.append(Nilary(r_a, ErasePort()))
     g.instructions.append(Nilary(r_b, ErasePort()))
-    g.instructions.append(Binary("Comb", "x", 0, r_a, r_b))
-    g.add_label("x")
+    g.instructions.append(Binary("Comb", intern("x"), 0, r_a, r_b))
+    g.add_label(intern("x"))
 
     w = make_wire_pair()[0]
-    comb = CombPort(label="x", target=w)
+    comb = CombPort(label=intern("x"), target=w)
 
     ivm.link(GlobalPort(global_ref=g), comb)
     run_to_normal(ivm)
@@ -176,8 +181,8 @@ def test_commute():
     w1 = make_wire_pair()[0]
     w2 = make_wire_pair()[0]
 
-    a = CombPort(label="x", target=w1)
-    b = CombPort(label="y", target=w2)
+    a = CombPort(label=intern("x"), target=w1)
+    b = CombPort(label=intern("y"), target=w2)
 
     # Put erases on all aux ports to let the interaction complete
     w1.target = ErasePort()
@@ -187,3 +192,125 @@ def test_commute():
 
     ivm.link(a, b)
     run_to_normal(ivm)
+
+
+def test_custom_rule():
+    """A new port type only needs handlers registered on copied rule tables."""
+
+    @dataclasses.dataclass
+    class TokenPort(NilaryNodePort):
+        name: str
+
+    class TokenIVM(IVM):
+        link_rules = LINK_RULES.copy()
+        link_rules.register(TokenPort, BinaryNodePort, "push_fast")
+        interact_rules = INTERACT_RULES.copy()
+        interact_rules.register(TokenPort, BinaryNodePort, "stamp")
+
+        def stamp(self, a: TokenPort, b: BinaryNodePort):
+            x, y = b.aux()
+            self.link_wire(x, PrimitiveExtValPort(a.name))
+            self.link_wire(y, PrimitiveExtValPort(b.label))
+
+    ivm = TokenIVM()
+    w = make_wire_pair()[0]
+    ivm.link(CombPort(label=intern("x"), target=w), TokenPort("t"))
+    run_to_normal(ivm)
+    assert w.load_target().value == "t"
+    assert w.other_half.load_target().value == intern("x")
+
+    with pytest.raises(NoRule):
+        IVM().link(TokenPort("t"), CombPort(label=intern("x"), target=w))
+
+
+def test_rule_resolves_subclasses():
+    class TaggedValue(PrimitiveExtValPort):
+        pass
+
+    ivm = make_ivm()
+    w = make_wire_pair()[0]
+    ivm.link(CombPort(label=intern("x"), target=w), TaggedValue(3))
+    run_to_normal(ivm)
+    assert w.load_target().value == 3
+    assert w.other_half.load_target().value == 3
+
+
+def test_stats_counts_interactions():
+    """An IVM built with Stats counts each interaction by kind."""
+    from ivm.stats import Stats
+
+    ivm = make_ivm(stats=Stats())
+    w = make_wire_pair()[0]
+    ivm.link(ErasePort(), CombPort(label=intern("x"), target=w))
+    ivm.link(PrimitiveExtValPort(1), CombPort(label=intern("x"), target=make_wire_pair()[0]))
+    run_to_normal(ivm)
+    assert ivm.stats.interactions == {"erase": 1, "copy": 1}
+    assert ivm.stats.peak_fast == 2
+    assert "Erase" in str(ivm.stats)
+
+
+def test_step_and_run():
+    """step reports the active pairs left and performs interactions in run's order."""
+    ivm = make_ivm()
+    for _ in range(3):
+        ivm.link(ErasePort(), CombPort(label=intern("x"), target=make_wire_pair()[0]))
+    assert ivm.step(2) == 1
+    assert ivm.step(10) == 0
+    ivm.link(ErasePort(), CombPort(label=intern("x"), target=make_wire_pair()[0]))
+    ivm.run()
+    assert not ivm.active_fast and not ivm.active_slow
+
+
+def test_destructive_follow_empties_the_chain():
+    """A chain w1 -> w2 -> erase is walked once and left holding nothing."""
+    from ivm.stats import Stats
+
+    ivm = make_ivm(stats=Stats())
+    w1, w2 = make_wire_pair()[0], make_wire_pair()[0]
+    w1.target = WirePort(wire=w2)
+    w2.target = ErasePort()
+    assert isinstance(ivm.follow(WirePort(wire=w1), False), ErasePort)
+    assert w1.target is not None
+    assert isinstance(ivm.follow(WirePort(wire=w1), True), ErasePort)
+    assert w1.target is None and w2.target is None
+    assert ivm.stats.follows == 2 and ivm.stats.mean_chain == 2
+
+
+def test_eager_erase_sweeps_the_subnet():
+    """With eager_erase, a nested net is erased without queueing its inner pairs."""
+    from ivm.stats import Stats
+
+    ivm = make_ivm(stats=Stats(), eager_erase=True)
+    w_outer, w_inner = make_wire_pair()[0], make_wire_pair()[0]
+    w_outer.target = CombPort(label=intern("y"), target=w_inner)
+    w_outer.other_half.target = PrimitiveExtValPort(3)
+    ivm.link(ErasePort(), CombPort(label=intern("x"), target=w_outer))
+    run_to_normal(ivm)
+    assert ivm.stats.interactions == {"erase": 2}
+    assert ivm.stats.peak_fast == 1
+    assert w_outer.target is None and w_outer.other_half.target is None
+    # The inner comb's free ends are left erasers for whatever arrives there.
+    assert isinstance(w_inner.load_target(), ErasePort)
+    assert isinstance(w_inner.other_half.load_target(), ErasePort)
+
+
+def test_batch_calls_run_together():
+    """With batch_calls, ready calls sharing a label reach the batched form in one call."""
+    batches = []
+
+    def n32_sub(lhs, rhs):
+        batches.append((list(lhs), list(rhs)))
+        return [a - b for a, b in zip(lhs, rhs)]
+
+    ivm = make_ivm(batch_calls=64)
+    ivm.extrinsics.ext_fns["n32_sub"] = lambda a, b: a - b
+    ivm.extrinsics.batched_ext_fns["n32_sub"] = n32_sub
+    outs = []
+    for lhs, rhs, label in [(5, 3, "n32_sub"), (2, 10, "n32_sub$"), (9, 4, "n32_sub")]:
+        w = make_wire_pair()[0]
+        w.target = PrimitiveExtValPort(rhs)
+        ivm.link(ExtFnPort(label=intern(label), target=w), PrimitiveExtValPort(lhs))
+        outs.append(w.other_half)
+    run_to_normal(ivm)
+    assert batches == [([9, 10, 5], [4, 2, 3])]
+    assert [out.load_target().value for out in outs] == [2, 8, 5]